@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Render performance benchmark for Plonter.
+Builds synthetic sentences with N arches and M combinations, times the render
+and validation hot paths with performance.now(), and compares the p95 of each
+function against a stored baseline.
+
+Usage:
+    python3 bench_render.py                      # run and compare with bench_baseline.json
+    python3 bench_render.py --update-baseline    # run and store the results as the new baseline
+    python3 bench_render.py --require-baseline   # CI: a missing baseline (or scenario in it) fails too
+    python3 bench_render.py --sizes 50,200 --arches 40 --combinations 60 --threshold 15
+
+Exits with status 1 when any p95 regresses past the threshold, or with
+--require-baseline when there is nothing to compare against.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from playwright.sync_api import sync_playwright
+
+from test_roofs import APP_DIR, TIMING_INSTRUMENT_JS, start_server, wait_for_server, open_app, render_seq, wait_for_render
+
+BENCH_PORT = 8790
+BASELINE_PATH = os.path.join(APP_DIR, 'bench_baseline.json')
+BENCH_FUNCTIONS = ['renderSentence', 'renderArches', 'renderCombinationLines', 'validateSentenceModel']
+
+# Builds a synthetic analysis straight into the app state:
+# alternating noun/adjective tags (so neighbours combine validly), M chained
+# combinations and N laminar arches made by halving spans breadth-first.
+# The first arch is the main roof and every 4th arch is a clause, so each
+# pass has sentence models to validate (see VALIDATE_MODELS_JS).
+BUILD_SCENARIO_JS = """async ({size, archCount, combinationCount}) => {
+    await corpus.loadAll();
+    const pool = getAllStages().flatMap(s => s.sentence.split(/\\s+/).filter(Boolean));
+    const sentence = Array.from({ length: size }, (_, i) => pool[i % pool.length]).join(' ');
+    startStage({ id: `bench_${size}`, number: 'bench', sentence, category: 'workbook' });
+
+    words.forEach((word, i) => {
+        const type = i % 2 === 0 ? 'noun' : 'adjective';
+        word.addPartOfSpeech(type, getDefaultDetails(type));
+    });
+
+    for (let i = 0; i < Math.min(combinationCount, size - 1); i++) {
+        const pos1 = words[i].partsOfSpeech[0];
+        const pos2 = words[i + 1].partsOfSpeech[0];
+        const result = validateCombination(pos1, pos2, words[i].id, words[i + 1].id, words);
+        addCombination(words[i].id, pos1.id, words[i + 1].id, pos2.id, result.valid && result.complete, result.type);
+    }
+
+    const spans = [[0, size - 1]];
+    let created = 0;
+    while (spans.length && created < archCount) {
+        const [start, end] = spans.shift();
+        const isMainRoof = created === 0;
+        const isClause = !isMainRoof && created % 4 === 0;
+        arches.push({
+            id: `bench_arch_${created}`,
+            wordId1: words[start].id,
+            wordId2: words[end].id,
+            height: calculateArchHeight(words[start].id, words[end].id),
+            syntacticRole: isMainRoof || isClause ? null : 'גרעין',
+            isMainRoof: isMainRoof,
+            model: isMainRoof || isClause ? 'B' : null,
+            isClause: isClause,
+            externalRole: isClause ? 'מושא' : null,
+            validation: null,
+            clauseValidation: null
+        });
+        created++;
+        if (end > start) {
+            const mid = Math.floor((start + end) / 2);
+            spans.push([start, mid], [mid + 1, end]);
+        }
+    }
+
+    return { words: words.length, arches: arches.length, combinations: combinations.length };
+}"""
+
+# Renders hand validateSentenceModel() to the validation worker, where the
+# page-side wrapper never sees it; each pass also runs it here on every main
+# roof and clause, as renders did before, so it is still timed and gated
+VALIDATE_MODELS_JS = """() => arches.forEach(arch => {
+    if ((arch.isMainRoof || arch.isClause) && arch.model) validateSentenceModel(arch, words);
+})"""
+
+RESET_TIMINGS_JS = "() => Object.values(window.__plonterTimings).forEach(samples => samples.length = 0)"
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples):
+    return {
+        'n': len(samples),
+        'mean': round(sum(samples) / len(samples), 3) if samples else None,
+        'p50': round(percentile(samples, 50), 3) if samples else None,
+        'p95': round(percentile(samples, 95), 3) if samples else None,
+    }
+
+def scenario_key(size, arch_count, combination_count):
+    return f'{size}w_{arch_count}a_{combination_count}c'
+
+def run_scenario(browser, size, arch_count, combination_count, runs, warmup):
+    """Benchmark one synthetic sentence in a fresh context; returns per-function stats."""
+    context = browser.new_context(viewport={'width': 1280, 'height': 900}, locale='he-IL')
+    page = context.new_page()
+    try:
+        open_app(page, BENCH_PORT)
+        page.evaluate(TIMING_INSTRUMENT_JS, BENCH_FUNCTIONS)
+        shape = page.evaluate(BUILD_SCENARIO_JS, {
+            'size': size, 'archCount': arch_count, 'combinationCount': combination_count,
+        })
+
+        for i in range(warmup + runs):
+            if i == warmup:
+                page.evaluate(RESET_TIMINGS_JS)
+            since = render_seq(page)
+            page.evaluate('() => renderSentence()')
+            if not wait_for_render(page, since, timeout=30000):
+                raise RuntimeError(f'render pass did not complete for {scenario_key(size, arch_count, combination_count)}')
+            page.evaluate(VALIDATE_MODELS_JS)
+
+        timings = page.evaluate('window.__plonterTimings')
+    finally:
+        context.close()
+
+    return {'shape': shape, 'functions': {name: summarize(timings.get(name, [])) for name in BENCH_FUNCTIONS}}
+
+def run_benchmark(sizes, arch_count, combination_count, runs, warmup):
+    httpd = start_server(BENCH_PORT)
+    wait_for_server(BENCH_PORT)
+    results = {}
+
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            for size in sizes:
+                key = scenario_key(size, arch_count, combination_count)
+                print(f'\n=== {key} ===')
+                results[key] = run_scenario(browser, size, arch_count, combination_count, runs, warmup)
+                for name, stats in results[key]['functions'].items():
+                    print(f'  {name:<24} p50={stats["p50"]}ms  p95={stats["p95"]}ms  (n={stats["n"]})')
+            browser.close()
+    finally:
+        httpd.shutdown()
+
+    return results
+
+def compare_with_baseline(results, baseline, threshold_pct, min_delta_ms, require_baseline=False):
+    """Return a list of (scenario, function, base_p95, current_p95) that regressed.
+    With require_baseline a scenario missing from the baseline counts as one."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get('scenarios', {}).get(key)
+        if not base:
+            print(f'  [{"FAIL" if require_baseline else "NEW "}] {key}: no baseline entry')
+            if require_baseline:
+                regressions.append((key, None, None, None))
+            continue
+        for name, stats in current['functions'].items():
+            base_p95 = base['functions'].get(name, {}).get('p95')
+            cur_p95 = stats['p95']
+            if base_p95 is not None and cur_p95 is None:
+                # Measured in the baseline but no longer called on the page: the gate would go quiet
+                print(f'  [FAIL] {key} {name}: p95 {base_p95}ms -> no samples')
+                regressions.append((key, name, base_p95, None))
+                continue
+            if base_p95 is None or cur_p95 is None:
+                continue
+            change = (cur_p95 - base_p95) / base_p95 * 100 if base_p95 else 0.0
+            regressed = cur_p95 > base_p95 * (1 + threshold_pct / 100) and cur_p95 - base_p95 > min_delta_ms
+            status = 'FAIL' if regressed else 'PASS'
+            print(f'  [{status}] {key} {name}: p95 {base_p95}ms -> {cur_p95}ms ({change:+.1f}%)')
+            if regressed:
+                regressions.append((key, name, base_p95, cur_p95))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Plonter render and validation hot paths.')
+    parser.add_argument('--sizes', default='10,25,50,100,200', help='comma-separated sentence lengths in words')
+    parser.add_argument('--arches', type=int, default=15, help='arches per sentence (N)')
+    parser.add_argument('--combinations', type=int, default=20, help='combinations per sentence (M)')
+    parser.add_argument('--runs', type=int, default=30, help='measured render passes per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='unmeasured render passes per scenario')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file to compare against')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='allowed p95 regression in percent (default: from baseline, else 20)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='ignore regressions smaller than this many ms (timer noise)')
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='fail when the baseline or a scenario in it is missing (CI gate)')
+    parser.add_argument('--output', help='also write this run\'s results to a JSON file')
+    args = parser.parse_args()
+
+    if args.require_baseline and not args.update_baseline and not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline} - record one with --update-baseline on the reference machine')
+        return 1
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = run_benchmark(sizes, args.arches, args.combinations, args.runs, args.warmup)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'scenarios': results}, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'threshold_pct': args.threshold if args.threshold is not None else 20,
+            'scenarios': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f'\nBaseline saved to: {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'\nNo baseline at {args.baseline} - run with --update-baseline to create one')
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    threshold = args.threshold if args.threshold is not None else baseline.get('threshold_pct', 20)
+
+    print('\n' + '=' * 50)
+    print(f'BASELINE COMPARISON (p95, threshold {threshold}%)')
+    print('=' * 50)
+    regressions = compare_with_baseline(results, baseline, threshold, args.min_delta_ms, args.require_baseline)
+    print(f'\nTotal: {len(regressions)} regression{"s" if len(regressions) != 1 else ""}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Production build for Plonter.
+Bundles every <script src> of index.html (in order) into one minified,
+content-hashed file, prepends precomputed data (a flat part-of-speech lookup
+and the interned feature codes)
+so it is not computed at startup, bundles the validation worker (the validation
+core plus js/validationWorker.js) into its own hashed file, minifies the stylesheet and inlines the rules
+the welcome screen needs. The sentence corpus (corpus/, see compile_corpus.py)
+is copied alongside; the app fetches its shards on demand. Output goes to
+dist/, with precompressed .gz (and .br, if the brotli module is installed)
+copies of the hashed assets and corpus shards for serve.py --dist.
+
+Usage:
+    python3 build.py              # build into dist/
+    python3 build.py --out public # build into another directory
+    python3 build.py --no-minify  # keep sources readable (debugging the bundle)
+
+Precomputing the data runs the sources through Node; without Node the bundle
+still works and computes the same tables on first use.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(APP_DIR, 'dist')
+INDEX_HTML = os.path.join(APP_DIR, 'index.html')
+STYLESHEET = os.path.join(APP_DIR, 'css', 'style.css')
+CORPUS_DIR = os.path.join(APP_DIR, 'corpus')
+
+# Scripts the validation worker needs, in load order (see js/validationWorker.js)
+WORKER_SOURCES = ['js/partsOfSpeech.js', 'js/word.js', 'js/combinations.js', 'js/archIndex.js',
+                  'js/validationCore.js', 'js/validationWorker.js']
+
+# Classes created by renderStages() on the welcome screen, not present in the markup
+CRITICAL_EXTRA_CLASSES = {'stage-item', 'stage-number', 'stage-sentence'}
+
+# Evaluates partsOfSpeech.js and prints the tables to precompute
+PRECOMPUTE_JS = """
+const fs = require('fs');
+const vm = require('vm');
+const context = {};
+vm.createContext(context);
+for (const file of process.argv.slice(1)) {
+    vm.runInContext(fs.readFileSync(file, 'utf8'), context, { filename: file });
+}
+const data = vm.runInContext('({ posLookup: buildPosLookup(), featureCodes: buildFeatureCodes() })', context);
+process.stdout.write(JSON.stringify(data));
+"""
+
+REGEX_PRECEDING_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                            'void', 'throw', 'instanceof', 'yield', 'await'}
+
+def is_word_char(c):
+    return c.isalnum() or c in '_$' or ord(c) > 127
+
+# ========== JS MINIFIER ==========
+# Conservative: drops comments and indentation and collapses whitespace, but
+# keeps line breaks so automatic semicolon insertion behaves exactly as in
+# the source. Strings, template literals and regex literals are copied as-is.
+
+def _read_quoted(src, i, quote):
+    j = i + 1
+    while j < len(src):
+        if src[j] == '\\':
+            j += 2
+            continue
+        if src[j] == quote:
+            return j + 1
+        j += 1
+    raise ValueError(f'unterminated string starting at offset {i}')
+
+def _read_template(src, i):
+    """Return the end of a template literal starting at src[i] == '`'."""
+    j = i + 1
+    while j < len(src):
+        c = src[j]
+        if c == '\\':
+            j += 2
+        elif c == '`':
+            return j + 1
+        elif c == '$' and src[j + 1:j + 2] == '{':
+            j = _read_template_expression(src, j + 2)
+        else:
+            j += 1
+    raise ValueError(f'unterminated template literal starting at offset {i}')
+
+def _read_template_expression(src, j):
+    depth = 1
+    while j < len(src):
+        c = src[j]
+        if c in '\'"':
+            j = _read_quoted(src, j, c)
+        elif c == '`':
+            j = _read_template(src, j)
+        elif c == '{':
+            depth += 1
+            j += 1
+        elif c == '}':
+            depth -= 1
+            j += 1
+            if depth == 0:
+                return j
+        else:
+            j += 1
+    raise ValueError('unterminated template expression')
+
+def _read_regex(src, i):
+    j = i + 1
+    in_class = False
+    while j < len(src):
+        c = src[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '\n':
+            raise ValueError(f'unterminated regex starting at offset {i}')
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '/':
+            j += 1
+            while j < len(src) and is_word_char(src[j]):
+                j += 1
+            return j
+        j += 1
+    raise ValueError(f'unterminated regex starting at offset {i}')
+
+def _regex_allowed(out):
+    text = ''.join(out[-32:]).rstrip()
+    if not text:
+        return True
+    last = text[-1]
+    if is_word_char(last):
+        word = re.search(r'[\w$]+$', text)
+        return bool(word) and word.group(0) in REGEX_PRECEDING_KEYWORDS
+    return last not in ')]}'
+
+def minify_js(src):
+    out = []
+    pending_space = False
+    pending_newline = False
+    i = 0
+    n = len(src)
+
+    def emit(token):
+        nonlocal pending_space, pending_newline
+        if out:
+            prev = out[-1][-1]
+            if pending_newline and prev != '\n':
+                out.append('\n')
+            elif pending_space and prev != '\n':
+                first = token[0]
+                if (is_word_char(prev) and is_word_char(first)) or (prev in '+-' and first in '+-'):
+                    out.append(' ')
+        pending_space = pending_newline = False
+        out.append(token)
+
+    while i < n:
+        c = src[i]
+        nxt = src[i + 1] if i + 1 < n else ''
+        if c in '\'"':
+            end = _read_quoted(src, i, c)
+            emit(src[i:end])
+            i = end
+        elif c == '`':
+            end = _read_template(src, i)
+            emit(src[i:end])
+            i = end
+        elif c == '/' and nxt == '/':
+            end = src.find('\n', i)
+            i = n if end == -1 else end
+        elif c == '/' and nxt == '*':
+            end = src.find('*/', i + 2)
+            if end == -1:
+                raise ValueError(f'unterminated comment starting at offset {i}')
+            if '\n' in src[i:end]:
+                pending_newline = True
+            else:
+                pending_space = True
+            i = end + 2
+        elif c == '/' and _regex_allowed(out):
+            end = _read_regex(src, i)
+            emit(src[i:end])
+            i = end
+        elif c == '\n':
+            pending_newline = True
+            i += 1
+        elif c.isspace():
+            pending_space = True
+            i += 1
+        else:
+            j = i + 1
+            if is_word_char(c):
+                while j < n and is_word_char(src[j]):
+                    j += 1
+            emit(src[i:j])
+            i = j
+
+    return ''.join(out).strip() + '\n'
+
+# ========== CSS ==========
+
+def strip_css_comments(css):
+    out = []
+    i = 0
+    while i < len(css):
+        c = css[i]
+        if c in '\'"':
+            end = _read_quoted(css, i, c)
+            out.append(css[i:end])
+            i = end
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end == -1 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+def minify_css(css):
+    css = strip_css_comments(css)
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', css)
+    for k in range(0, len(parts), 2):
+        chunk = re.sub(r'\s+', ' ', parts[k])
+        chunk = re.sub(r'\s*([{};,])\s*', r'\1', chunk)
+        chunk = re.sub(r':\s+', ':', chunk)
+        parts[k] = chunk.replace(';}', '}')
+    return ''.join(parts).strip()
+
+def split_css_blocks(css):
+    """Split CSS (comments removed) into top-level (prelude, body) blocks."""
+    blocks = []
+    i = 0
+    while i < len(css):
+        start = css.find('{', i)
+        if start == -1:
+            break
+        depth = 0
+        j = start
+        while j < len(css):
+            if css[j] in '\'"':
+                j = _read_quoted(css, j, css[j])
+                continue
+            if css[j] == '{':
+                depth += 1
+            elif css[j] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            j += 1
+        blocks.append((css[i:start].strip(), css[start + 1:j]))
+        i = j + 1
+    return blocks
+
+def selector_is_critical(selector, tokens):
+    """Critical if every class/id the selector names exists on the welcome screen."""
+    names = re.findall(r'([.#])(-?[_a-zA-Z][\w-]*)', re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector))
+    return all(name in tokens for _, name in names)
+
+def extract_critical_css(css, tokens):
+    critical = []
+    for prelude, body in split_css_blocks(css):
+        if prelude.startswith('@media') or prelude.startswith('@supports'):
+            inner = extract_critical_css(body, tokens)
+            if inner:
+                critical.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            continue  # keyframes, font-face: come with the full stylesheet
+        elif any(selector_is_critical(s, tokens) for s in prelude.split(',')):
+            critical.append(f'{prelude}{{{body}}}')
+    return ''.join(critical)
+
+def welcome_screen_tokens(html):
+    """Classes and ids present before the game screen markup, plus the stage list items."""
+    head = html.split('<!-- Main Game Screen -->')[0]
+    tokens = set(CRITICAL_EXTRA_CLASSES)
+    for attr in re.findall(r'class="([^"]*)"', head):
+        tokens.update(attr.split())
+    tokens.update(re.findall(r'id="([^"]*)"', head))
+    return tokens
+
+# ========== BUNDLE ==========
+
+def script_sources(html):
+    return re.findall(r'<script src="([^"]+)"></script>', html)
+
+def precompute_data(sources):
+    node = shutil.which('node')
+    if not node:
+        print('  ! node not found - skipping precomputed PoS lookup')
+        return None
+    paths = [os.path.join(APP_DIR, src) for src in sources if os.path.basename(src) == 'partsOfSpeech.js']
+    result = subprocess.run([node, '-e', PRECOMPUTE_JS, *paths], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def content_hash(data):
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:10]
+
+def write_asset(out_dir, stem, ext, content):
+    name = f'{stem}.{content_hash(content)}.{ext}'
+    with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as f:
+        f.write(content)
+    write_precompressed(os.path.join(out_dir, name), content.encode('utf-8'))
+    return name
+
+def write_precompressed(path, data):
+    """.gz (and .br when brotli is installed) siblings that serve.py sends as-is."""
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+def copy_corpus(out_dir):
+    """Copy the corpus manifest and shards, each with precompressed siblings."""
+    if not os.path.isdir(CORPUS_DIR):
+        print('  ! no corpus/ - run compile_corpus.py; the app will list no stages')
+        return 0
+    os.makedirs(out_dir)
+    names = sorted(name for name in os.listdir(CORPUS_DIR) if name.endswith(('.json', '.ndjson')))
+    for name in names:
+        with open(os.path.join(CORPUS_DIR, name), 'rb') as f:
+            data = f.read()
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(data)
+        write_precompressed(os.path.join(out_dir, name), data)
+    return len(names)
+
+def check_out_dir(out_dir):
+    """The output directory is wiped before each build: refuse anything that is
+    not empty or an earlier build (marked by its build-manifest.json)."""
+    out_dir = os.path.realpath(out_dir)
+    app_dir = os.path.realpath(APP_DIR)
+    if out_dir == app_dir or app_dir.startswith(out_dir.rstrip(os.sep) + os.sep):
+        raise SystemExit(f'--out {out_dir} contains the source tree; choose a directory of its own')
+    if os.path.exists(out_dir) and not os.path.isdir(out_dir):
+        raise SystemExit(f'--out {out_dir} is a file')
+    if os.path.isdir(out_dir) and os.listdir(out_dir) and \
+            not os.path.isfile(os.path.join(out_dir, 'build-manifest.json')):
+        raise SystemExit(f'--out {out_dir} is not empty and holds no earlier build; not deleting it')
+
+def build(out_dir, minify=True):
+    check_out_dir(out_dir)
+    with open(INDEX_HTML, encoding='utf-8') as f:
+        html = f.read()
+    with open(STYLESHEET, encoding='utf-8') as f:
+        css = f.read()
+
+    sources = script_sources(html)
+    print(f'Bundling {len(sources)} scripts: {", ".join(sources)}')
+
+    data = precompute_data(sources)
+    prelude = ''
+    if data:
+        prelude = ('const PRECOMPILED_POS_LOOKUP = ' + json.dumps(data['posLookup'], ensure_ascii=False) + ';\n'
+                   'const PRECOMPILED_FEATURE_CODES = ' + json.dumps(data['featureCodes'], ensure_ascii=False) + ';\n')
+
+    def bundle_scripts(srcs):
+        parts = [prelude]
+        for src in srcs:
+            with open(os.path.join(APP_DIR, src), encoding='utf-8') as f:
+                code = f.read()
+            parts.append(minify_js(code) if minify else code.rstrip() + '\n')
+        return ''.join(parts)
+
+    worker_bundle = bundle_scripts(WORKER_SOURCES)
+    worker_name = f'validationWorker.{content_hash(worker_bundle)}.js'
+    prelude += f"const VALIDATION_WORKER_URL = '{worker_name}';\n"
+    bundle = bundle_scripts(sources)
+
+    full_css = minify_css(css) if minify else css
+    critical_css = minify_css(extract_critical_css(strip_css_comments(css), welcome_screen_tokens(html)))
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    js_name = write_asset(out_dir, 'app', 'js', bundle)
+    write_asset(out_dir, 'validationWorker', 'js', worker_bundle)
+    css_name = write_asset(out_dir, 'style', 'css', full_css)
+
+    # Critical rules inline; the full sheet loads without blocking first paint
+    # and re-applies every rule in source order once it arrives
+    style_tags = (
+        f'<style>{critical_css}</style>\n'
+        f'    <link rel="preload" href="{css_name}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'    <noscript><link rel="stylesheet" href="{css_name}"></noscript>'
+    )
+    out_html = html.replace('<link rel="stylesheet" href="css/style.css">', style_tags)
+    out_html = re.sub(r'(\s*<script src="[^"]+"></script>)+',
+                      f'\n    <script src="{js_name}"></script>', out_html, count=1)
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(out_html)
+    corpus_files = copy_corpus(os.path.join(out_dir, 'corpus'))
+
+    manifest = {
+        'js': js_name,
+        'worker': worker_name,
+        'css': css_name,
+        'sizes': {
+            'js_source': sum(os.path.getsize(os.path.join(APP_DIR, s)) for s in sources),
+            'js_bundle': len(bundle.encode('utf-8')),
+            'worker_bundle': len(worker_bundle.encode('utf-8')),
+            'css_source': len(css.encode('utf-8')),
+            'css_bundle': len(full_css.encode('utf-8')),
+            'css_critical': len(critical_css.encode('utf-8')),
+        },
+        'corpus_files': corpus_files,
+        'precomputed': bool(data),
+    }
+    with open(os.path.join(out_dir, 'build-manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the minified, content-hashed Plonter bundle.')
+    parser.add_argument('--out', default=DIST_DIR, help='output directory (default: dist/)')
+    parser.add_argument('--no-minify', action='store_true', help='bundle without minifying')
+    args = parser.parse_args()
+
+    manifest = build(os.path.abspath(args.out), minify=not args.no_minify)
+    sizes = manifest['sizes']
+    print(f"  {manifest['js']}: {sizes['js_source']:,} -> {sizes['js_bundle']:,} bytes")
+    print(f"  {manifest['worker']}: {sizes['worker_bundle']:,} bytes")
+    print(f"  {manifest['css']}: {sizes['css_source']:,} -> {sizes['css_bundle']:,} bytes "
+          f"({sizes['css_critical']:,} inlined as critical)")
+    print(f"  corpus/: {manifest['corpus_files']} files")
+    print(f'Build written to: {os.path.abspath(args.out)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
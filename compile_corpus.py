@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Sentence corpus compiler for Plonter.
+Turns course spreadsheets and text files into the sharded corpus the app loads
+on demand (js/corpus.js): corpus/manifest.json plus one NDJSON shard (one stage
+per line) per category and unit - the part of the stage number before the dot -
+split again past --shard-size stages.
+
+Inputs:
+  .csv / .tsv   columns number, sentence[, category[, id]]; a header row naming
+                them (number/sentence/category/id, or מספר/משפט/קטגוריה) may
+                list them in any order
+  .xlsx         the same columns in the first sheet (needs openpyxl)
+  .txt          one sentence per line, optionally "number<TAB>sentence"; lines
+                without a number are numbered <unit>.1, <unit>.2, ... with --unit
+                or after the category's last stage otherwise
+
+Stages are merged into the existing corpus by id: known ids are replaced in
+place, new ones appended, so the same spreadsheet can be compiled repeatedly.
+
+Usage:
+    python3 compile_corpus.py workbook.csv                  # category from a column, else --category
+    python3 compile_corpus.py unit4.txt --category workbook --unit 4
+    python3 compile_corpus.py --shard-size 100              # reshard the existing corpus
+    python3 compile_corpus.py --list                        # show the manifest
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(APP_DIR, 'corpus')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+DEFAULT_SHARD_SIZE = 250
+DEFAULT_CATEGORY = 'workbook'
+
+HEADER_ALIASES = {
+    'number': 'number', 'מספר': 'number', 'stage': 'number',
+    'sentence': 'sentence', 'משפט': 'sentence', 'text': 'sentence',
+    'category': 'category', 'קטגוריה': 'category',
+    'id': 'id',
+}
+
+# ========== READING ==========
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Every stage in the corpus, in manifest order ([] when there is no corpus)."""
+    path = os.path.join(corpus_dir, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    stages = []
+    for shard in manifest['shards']:
+        with open(os.path.join(corpus_dir, shard['file']), encoding='utf-8') as f:
+            stages.extend(json.loads(line) for line in f if line.strip())
+    return stages
+
+def clean_sentence(text):
+    return ' '.join(str(text).split())
+
+def rows_from_file(path):
+    """Raw rows (lists of strings) from a spreadsheet or text file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.xlsx':
+        if openpyxl is None:
+            raise SystemExit(f'{path}: reading .xlsx needs openpyxl (pip install openpyxl), or export it as CSV')
+        sheet = openpyxl.load_workbook(path, read_only=True, data_only=True).worksheets[0]
+        return [['' if cell is None else str(cell) for cell in row] for row in sheet.iter_rows(values_only=True)]
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if ext in ('.csv', '.tsv'):
+            return list(csv.reader(f, delimiter='\t' if ext == '.tsv' else ','))
+        rows = []
+        for line in f:
+            number, tab, sentence = line.rstrip('\n').partition('\t')
+            rows.append([number, sentence] if tab else ['', number])
+        return rows
+
+def read_source(path):
+    """Stage dicts (number may be empty, category/id optional) from one input file."""
+    rows = [row for row in rows_from_file(path) if any(cell.strip() for cell in row)]
+    columns = ['number', 'sentence', 'category', 'id']
+    if rows and any(cell.strip().lower() in HEADER_ALIASES for cell in rows[0]):
+        columns = [HEADER_ALIASES.get(cell.strip().lower()) for cell in rows[0]]
+        rows = rows[1:]
+        if 'sentence' not in columns:
+            raise SystemExit(f'{path}: no sentence column in the header row')
+
+    entries = []
+    for row in rows:
+        entry = {name: cell.strip() for name, cell in zip(columns, row) if name}
+        entry['sentence'] = clean_sentence(entry.get('sentence', ''))
+        if entry['sentence']:
+            entries.append(entry)
+    return entries
+
+# ========== MERGING ==========
+
+def number_for(entry, category_stages, unit):
+    """Next free number in a category for a sentence that came without one."""
+    if unit:
+        taken = {stage['number'] for stage in category_stages}
+        n = 1
+        while f'{unit}.{n}' in taken:
+            n += 1
+        return f'{unit}.{n}'
+    integers = [int(stage['number']) for stage in category_stages if stage['number'].isdigit()]
+    return str(max(integers, default=0) + 1)
+
+def merge(stages, entries, default_category, unit=None):
+    """Merge source entries into the stage list by id; returns (added, replaced)."""
+    by_id = {stage['id']: index for index, stage in enumerate(stages)}
+    added = replaced = 0
+    for entry in entries:
+        category = entry.get('category') or default_category
+        number = entry.get('number') or number_for(entry, [s for s in stages if s['category'] == category], unit)
+        stage_id = entry.get('id') or number
+        if stage_id in by_id and stages[by_id[stage_id]]['category'] != category and not entry.get('id'):
+            stage_id = f'{category}-{number}'  # ids are global; numbers repeat across categories
+        stage = {'id': stage_id, 'number': number, 'sentence': entry['sentence'], 'category': category}
+        if stage_id in by_id:
+            stages[by_id[stage_id]] = stage
+            replaced += 1
+        else:
+            by_id[stage_id] = len(stages)
+            stages.append(stage)
+            added += 1
+    return added, replaced
+
+# ========== WRITING ==========
+
+def shard_name(category, unit, part):
+    # Later parts of a unitless group are '<category>-_-<part>': '_' is never a
+    # unit, so they cannot take the name of a unit's first shard
+    name = category + (f'-{unit}' if unit else '')
+    if part > 1:
+        name += f'-{part}' if unit else f'-_-{part}'
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name) + '.ndjson'
+
+def plan_shards(stages, shard_size):
+    """[(file, category, stages)] grouped by category, then unit, in first-appearance order."""
+    groups = {}
+    for stage in stages:
+        unit = stage['number'].split('.')[0] if '.' in stage['number'] else ''
+        groups.setdefault((stage['category'], unit), []).append(stage)
+    categories = list(dict.fromkeys(category for category, _ in groups))
+
+    shards = []
+    for category in categories:
+        for (group_category, unit), members in groups.items():
+            if group_category != category:
+                continue
+            for part, start in enumerate(range(0, len(members), shard_size), 1):
+                shards.append((shard_name(category, unit, part), category, members[start:start + shard_size]))
+
+    # Names are sanitized, so categories and units can still meet (e.g. 'a b' and 'a_b');
+    # a clash would overwrite a shard, so refuse before anything is written
+    seen = {}
+    for file, category, members in shards:
+        if file in seen:
+            raise SystemExit(f'shard name {file} is used by both {seen[file]} and '
+                             f'{category} {members[0]["number"]}; rename a category or unit')
+        seen[file] = f'{category} {members[0]["number"]}'
+    return shards
+
+def write_corpus(stages, corpus_dir=CORPUS_DIR, shard_size=DEFAULT_SHARD_SIZE):
+    os.makedirs(corpus_dir, exist_ok=True)
+    entries = []
+    for file, category, members in plan_shards(stages, shard_size):
+        body = ''.join(json.dumps(stage, ensure_ascii=False, separators=(',', ':')) + '\n' for stage in members)
+        with open(os.path.join(corpus_dir, file), 'w', encoding='utf-8') as f:
+            f.write(body)
+        entries.append({
+            'file': file,
+            'category': category,
+            'count': len(members),
+            'first': members[0]['number'],
+            'last': members[-1]['number'],
+            'hash': hashlib.sha256(body.encode('utf-8')).hexdigest()[:10],
+        })
+
+    # Shards that no longer exist after resharding
+    written = {entry['file'] for entry in entries}
+    for name in os.listdir(corpus_dir):
+        if name.endswith('.ndjson') and name not in written:
+            os.remove(os.path.join(corpus_dir, name))
+
+    manifest = {'version': MANIFEST_VERSION, 'total': len(stages), 'shards': entries}
+    with open(os.path.join(corpus_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+    return manifest
+
+def print_manifest(manifest):
+    for shard in manifest['shards']:
+        print(f"  {shard['file']:<28} {shard['category']:<10} {shard['count']:>5} stages  "
+              f"{shard['first']} .. {shard['last']}")
+    print(f"Total: {manifest['total']} stages in {len(manifest['shards'])} shards")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile course sentences into the sharded Plonter corpus.')
+    parser.add_argument('sources', nargs='*', help='.csv, .tsv, .xlsx or .txt files to merge into the corpus')
+    parser.add_argument('--category', default=DEFAULT_CATEGORY,
+                        help=f'category for rows without one (default: {DEFAULT_CATEGORY})')
+    parser.add_argument('--unit', help='number unnumbered sentences <unit>.1, <unit>.2, ...')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'maximum stages per shard (default: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--out', default=CORPUS_DIR, help='corpus directory (default: corpus/)')
+    parser.add_argument('--list', action='store_true', help='print the current manifest and exit')
+    args = parser.parse_args()
+
+    corpus_dir = os.path.abspath(args.out)
+    stages = load_corpus(corpus_dir)
+    if args.list:
+        with open(os.path.join(corpus_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            print_manifest(json.load(f))
+        return 0
+
+    for path in args.sources:
+        added, replaced = merge(stages, read_source(path), args.category, args.unit)
+        print(f'{path}: {added} added, {replaced} replaced')
+
+    manifest = write_corpus(stages, corpus_dir, max(1, args.shard_size))
+    print_manifest(manifest)
+    print(f'Corpus written to: {corpus_dir}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
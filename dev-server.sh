@@ -26,7 +26,7 @@ case "${2:-start}" in
         fi
         
         echo -e "${BLUE}🚀 Starting development server on port $PORT...${NC}"
-        python3 -m http.server $PORT > /dev/null 2>&1 &
+        python3 serve.py --port $PORT --quiet > /dev/null 2>&1 &
         SERVER_PID=$!
         echo $SERVER_PID > "$PID_FILE"
         
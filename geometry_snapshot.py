@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Structural geometry snapshots for the Plonter harnesses.
+Serializes what the overlay renderers drew - word boxes, arches (span, nesting
+depth, lines, label) and combination lines - to compact JSON in one
+page.evaluate() and compares it with a golden file using a coordinate
+tolerance. A check takes milliseconds and needs no PNG I/O, so layout
+regressions in renderArches() and renderCombinationLines() are caught without
+screenshots.
+
+Golden files live in geometry_snapshots/<protocol>/<step>.json. A missing
+golden is written on first run (status "new"); pass update=True (the harnesses'
+--update-snapshots) to accept the current geometry.
+
+Usage (standalone, against the golden files only):
+    python3 geometry_snapshot.py                    # list golden files and their shape
+"""
+
+import json
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.path.join(APP_DIR, 'geometry_snapshots')
+DEFAULT_TOLERANCE = 2.0  # px, per coordinate
+MAX_REPORTED_MISMATCHES = 20
+
+# Coordinates are relative to #sentence-container (the SVG overlays already
+# are) and rounded to half pixels. Arches are ordered by span, outer first.
+CAPTURE_JS = """() => {
+    const round = value => Math.round(parseFloat(value) * 2) / 2;
+    const container = document.getElementById('sentence-container');
+    if (!container || !container.offsetParent) return { visible: false };
+
+    const base = container.getBoundingClientRect();
+    const wordIndex = new Map(words.map((word, index) => [word.id, index]));
+    const box = el => {
+        const r = el.getBoundingClientRect();
+        return [round(r.left - base.left), round(r.top - base.top), round(r.width), round(r.height)];
+    };
+    const lineCoords = line => ['x1', 'y1', 'x2', 'y2'].map(key => round(line.getAttribute(key)));
+
+    const archById = new Map(arches.map(arch => [arch.id, arch]));
+    const archSvg = document.getElementById('arch-svg');
+    const drawn = archSvg ? [...archSvg.querySelectorAll('g[data-arch-id]')] : [];
+    const archList = drawn.map(group => {
+        const arch = archById.get(group.dataset.archId);
+        const span = arch ? [wordIndex.get(arch.wordId1), wordIndex.get(arch.wordId2)].sort((a, b) => a - b) : null;
+        const lines = [...group.querySelectorAll(':scope > line')];
+        const label = group.querySelector('text');
+        return {
+            span: span,
+            mainRoof: arch ? !!arch.isMainRoof : null,
+            clause: arch ? !!arch.isClause : null,
+            stroke: lines.length ? lines[0].getAttribute('stroke') : null,
+            lines: lines.map(lineCoords),
+            label: label ? label.textContent : null,
+            labelAt: label ? [round(label.getAttribute('x')), round(label.getAttribute('y'))] : null
+        };
+    });
+    archList.forEach(entry => {
+        entry.depth = entry.span ? archList.filter(other => other !== entry && other.span &&
+            other.span[0] <= entry.span[0] && other.span[1] >= entry.span[1] &&
+            (other.span[0] !== entry.span[0] || other.span[1] !== entry.span[1])).length : null;
+    });
+    archList.sort((a, b) => (a.span ? a.span[0] : -1) - (b.span ? b.span[0] : -1) ||
+        (b.span ? b.span[1] : -1) - (a.span ? a.span[1] : -1));
+
+    const lineSvg = document.getElementById('combination-lines-svg');
+    const paths = lineSvg ? [...lineSvg.querySelectorAll('path.combination-line')].map(path => ({
+        stroke: path.getAttribute('stroke'),
+        width: round(path.getAttribute('stroke-width')),
+        points: (path.getAttribute('d').match(/-?\\d*\\.?\\d+(?:e-?\\d+)?/gi) || []).map(round)
+    })) : [];
+    paths.sort((a, b) => (a.points[0] || 0) - (b.points[0] || 0) || (a.points[1] || 0) - (b.points[1] || 0));
+    const dashed = lineSvg ? [...lineSvg.querySelectorAll('line')].map(lineCoords) : [];
+
+    return {
+        visible: true,
+        words: [...container.querySelectorAll('.word-wrapper')].map(wrapper => ({
+            box: box(wrapper),
+            parts: wrapper.querySelectorAll('.part-tag').length
+        })),
+        arches: archList,
+        combinations: paths,
+        dashed: dashed,
+        halo: archSvg ? archSvg.querySelectorAll('.arch-halo').length : 0
+    };
+}"""
+
+def capture(page):
+    return page.evaluate(CAPTURE_JS)
+
+def compare(golden, actual, tolerance=DEFAULT_TOLERANCE, path='$', mismatches=None):
+    """Structural comparison: same keys, list lengths and non-numeric values;
+    numbers within `tolerance`. Returns a list of mismatch descriptions."""
+    mismatches = [] if mismatches is None else mismatches
+    if len(mismatches) >= MAX_REPORTED_MISMATCHES:
+        return mismatches
+    if isinstance(golden, bool) or isinstance(actual, bool) or golden is None or actual is None:
+        if golden != actual:
+            mismatches.append(f'{path}: {golden!r} -> {actual!r}')
+    elif isinstance(golden, (int, float)) and isinstance(actual, (int, float)):
+        if abs(golden - actual) > tolerance:
+            mismatches.append(f'{path}: {golden} -> {actual} (off by {abs(golden - actual):g}px)')
+    elif isinstance(golden, dict) and isinstance(actual, dict):
+        for key in sorted(set(golden) | set(actual)):
+            if key not in actual or key not in golden:
+                mismatches.append(f'{path}.{key}: {"missing" if key not in actual else "unexpected"}')
+            else:
+                compare(golden[key], actual[key], tolerance, f'{path}.{key}', mismatches)
+    elif isinstance(golden, list) and isinstance(actual, list):
+        if len(golden) != len(actual):
+            mismatches.append(f'{path}: {len(golden)} items -> {len(actual)}')
+        else:
+            for index, (g, a) in enumerate(zip(golden, actual)):
+                compare(g, a, tolerance, f'{path}[{index}]', mismatches)
+    elif golden != actual:
+        mismatches.append(f'{path}: {golden!r} -> {actual!r}')
+    return mismatches
+
+def golden_path(name, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, name + '.json')
+
+def write_golden(path, snapshot):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+
+def check(page, name, tolerance=DEFAULT_TOLERANCE, update=False, snapshot_dir=SNAPSHOT_DIR):
+    """Capture the current geometry and compare it with geometry_snapshots/<name>.json."""
+    started = time.perf_counter()
+    actual = capture(page)
+    path = golden_path(name, snapshot_dir)
+    result = {'name': name}
+
+    if update or not os.path.exists(path):
+        result['status'] = 'updated' if os.path.exists(path) else 'new'
+        write_golden(path, actual)
+    else:
+        with open(path, encoding='utf-8') as f:
+            golden = json.load(f)
+        result['mismatches'] = compare(golden, actual, tolerance)
+        result['status'] = 'fail' if result['mismatches'] else 'pass'
+
+    result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+def describe(result):
+    """One-line summary for harness output."""
+    if result['status'] in ('new', 'updated'):
+        return f'geometry {result["status"]}: golden written ({result["ms"]}ms)'
+    if result['status'] == 'pass':
+        return f'geometry matches golden ({result["ms"]}ms)'
+    more = '' if len(result['mismatches']) < MAX_REPORTED_MISMATCHES else ' (first 20)'
+    return f'geometry differs{more}:\n' + '\n'.join(f'      {m}' for m in result['mismatches'])
+
+def main():
+    if not os.path.isdir(SNAPSHOT_DIR):
+        print(f'No golden files yet in {SNAPSHOT_DIR} - run a harness with --snapshot')
+        return 0
+    for dirpath, _, filenames in sorted(os.walk(SNAPSHOT_DIR)):
+        for name in sorted(filenames):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(dirpath, name), encoding='utf-8') as f:
+                snapshot = json.load(f)
+            rel = os.path.relpath(os.path.join(dirpath, name), SNAPSHOT_DIR)
+            if not snapshot.get('visible'):
+                print(f'  {rel}: sentence not visible')
+                continue
+            print(f'  {rel}: {len(snapshot["words"])} words, {len(snapshot["arches"])} arches, '
+                  f'{len(snapshot["combinations"])} combination lines')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
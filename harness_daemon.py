@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Warm test harness for Plonter.
+Keeps the server, one headless Chromium and a pre-navigated page per protocol
+(desktop, mobile) alive, and runs the test_roofs.py scenarios against them.
+Between scenarios the app is put back on the welcome screen through its
+in-page reset hook (window.__plonterReset) instead of a reload, so a rerun
+costs only the scenario itself.
+
+The source tree is polled for changes:
+  css/*                 the stylesheet is swapped in place (no reload)
+  js/*, index.html,     the warm pages reload once, then wait for init()
+  corpus/*              (the stage lists are fetched from corpus/ at startup)
+  harness modules       test_roofs.py & co. are re-imported
+and only the scenarios that watch the changed files are rerun (see
+test_roofs.SCENARIOS). Each rerun reports the edit-to-result latency.
+
+Usage:
+    python3 harness_daemon.py                              # run all scenarios, then watch
+    python3 harness_daemon.py --scenarios desktop_roof     # watch a subset
+    python3 harness_daemon.py --snapshot --no-screenshots  # geometry-only reruns (fastest)
+    python3 harness_daemon.py --once                       # run once and exit (non-zero on failures)
+    python3 harness_daemon.py --trace                      # Chrome trace per rerun in traces/
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from playwright.sync_api import sync_playwright
+
+import geometry_snapshot
+import test_roofs
+import trace_export
+
+DAEMON_PORT = 8770
+POLL_INTERVAL = 0.1  # seconds between mtime scans
+SETTLE_TIME = 0.05   # editors write in several steps; wait for the tree to be quiet
+WATCHED = ('index.html', 'css/', 'js/', 'corpus/')
+HARNESS_MODULES = ('geometry_snapshot.py', 'screenshot_diff.py', 'test_roofs.py', 'trace_export.py')
+
+# Swap every stylesheet for a cache-busted copy and resolve once the new ones have loaded
+RELOAD_CSS_JS = """(stamp) => Promise.all([...document.querySelectorAll('link[rel="stylesheet"]')].map(link => {
+    const fresh = link.cloneNode();
+    fresh.href = link.href.split('?')[0] + '?v=' + stamp;
+    return new Promise(resolve => {
+        fresh.onload = fresh.onerror = () => { link.remove(); resolve(); };
+        link.after(fresh);
+    });
+}))"""
+
+def scan(paths):
+    """mtime_ns per watched file (relative path, / separated)."""
+    mtimes = {}
+    for rel in paths:
+        full = os.path.join(test_roofs.APP_DIR, rel)
+        if os.path.isdir(full):
+            for dirpath, _, filenames in os.walk(full):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        mtimes[os.path.relpath(path, test_roofs.APP_DIR).replace(os.sep, '/')] = os.stat(path).st_mtime_ns
+                    except OSError:
+                        pass
+        elif os.path.isfile(full):
+            mtimes[rel] = os.stat(full).st_mtime_ns
+    return mtimes
+
+def changed_files(before, after):
+    return sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+
+def affected_scenarios(changed, selected):
+    """Scenarios (in registry order) that watch any of the changed files."""
+    def watches(scenario, path):
+        return any(path == dep or (dep.endswith('/') and path.startswith(dep))
+                   for dep in test_roofs.SCENARIOS[scenario]['watches'])
+    return [name for name in selected if any(watches(name, path) for path in changed)]
+
+class HarnessDaemon:
+    def __init__(self, browser, port, scenarios, capture):
+        self.browser = browser
+        self.port = port
+        self.scenarios = scenarios
+        self.capture = capture
+        self.pages = {}
+
+    def page(self, protocol):
+        """The warm page of a protocol, created and navigated on first use."""
+        if protocol not in self.pages:
+            context = self.browser.new_context(**test_roofs.PROTOCOLS[protocol]['context'])
+            page = context.new_page()
+            test_roofs.open_app(page, self.port)
+            self.pages[protocol] = page
+        return self.pages[protocol]
+
+    def reload_pages(self):
+        for page in self.pages.values():
+            page.reload()
+            page.wait_for_function('window.__plonterReady === true')
+
+    def reload_css(self):
+        stamp = time.time_ns()
+        for page in self.pages.values():
+            page.evaluate(RELOAD_CSS_JS, stamp)
+
+    def reload_harness(self):
+        # screenshot_diff is only imported once screenshots are taken
+        names = ('geometry_snapshot', 'screenshot_diff', 'trace_export', 'test_roofs')
+        for module in [sys.modules[name] for name in names if name in sys.modules]:
+            importlib.reload(module)
+
+    def run(self, names):
+        """Run scenarios on the warm pages; returns (name, result) pairs."""
+        test_roofs.CAPTURE.update(self.capture)
+        results = []
+        for protocol in test_roofs.PROTOCOLS:
+            protocol_names = [name for name in names if test_roofs.SCENARIOS[name]['protocol'] == protocol]
+            if protocol_names:
+                results.extend(self.run_protocol(protocol, protocol_names))
+        return results
+
+    def run_protocol(self, protocol, names):
+        settings = test_roofs.PROTOCOLS[protocol]
+        os.makedirs(settings['directory'], exist_ok=True)
+        page = self.page(protocol)
+        started = time.time()
+        test_roofs.snapshot_results.clear()
+        results = []
+        for name in names:
+            print(f'\n--- scenario {name} ---')
+            try:
+                page.evaluate('() => window.__plonterReset()')
+                test_roofs.run_scenario(page, name, results)
+            except Exception as e:
+                # A timeout or a broken page must not take the daemon down
+                print(f'  ERROR: {e}')
+                results.append((f'{settings["label"]}{name} crashed', False))
+                page.reload()
+                page.wait_for_function('window.__plonterReady === true')
+
+        if self.capture['screenshots']:
+            selection = test_roofs.desktop_screenshot_names() if protocol == 'desktop' else ['mobile']
+            results.extend(test_roofs.visual_check(started, selection, label=settings['label']))
+        results.extend((f'{settings["label"]}{name}', passed) for name, passed in test_roofs.snapshot_results)
+        return results
+
+def print_summary(results, elapsed, latency=None):
+    passed = sum(1 for _, r in results if r is True)
+    failed = [name for name, r in results if r is False]
+    manual = sum(1 for _, r in results if r not in (True, False))
+    print('\n' + '=' * 50)
+    for name in failed:
+        print(f'  [FAIL] {name}')
+    print(f'{passed} passed, {len(failed)} failed, {manual} manual check - scenarios took {elapsed:.2f}s'
+          + (f', edit-to-result {latency:.2f}s' if latency is not None else ''))
+    print('=' * 50)
+    return not failed
+
+def watch(daemon):
+    print(f'\nWatching {", ".join(WATCHED)} and the harness modules (Ctrl+C to stop)...')
+    paths = WATCHED + HARNESS_MODULES
+    mtimes = scan(paths)
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = scan(paths)
+        changed = changed_files(mtimes, current)
+        if not changed:
+            continue
+        # Let multi-file saves finish before acting on them
+        while True:
+            time.sleep(SETTLE_TIME)
+            settled = scan(paths)
+            if settled == current:
+                break
+            current = settled
+        changed = changed_files(mtimes, current)
+        mtimes = current
+        edited_at = max((current[path] / 1e9 for path in changed if path in current), default=time.time())
+        print(f'\nChanged: {", ".join(changed)}')
+
+        if any(path in HARNESS_MODULES for path in changed):
+            try:
+                daemon.reload_harness()
+            except Exception as e:
+                print(f'  Could not re-import the harness: {e}')
+                continue
+            names = daemon.scenarios
+        else:
+            names = affected_scenarios(changed, daemon.scenarios)
+        if not names:
+            print('  no scenario watches these files')
+            continue
+
+        if any(path == 'index.html' or path.startswith(('js/', 'corpus/')) for path in changed):
+            daemon.reload_pages()
+        elif any(path.startswith('css/') for path in changed):
+            daemon.reload_css()
+
+        started = time.perf_counter()
+        results = daemon.run(names)
+        print_summary(results, time.perf_counter() - started, time.time() - edited_at)
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep a warm browser and rerun test scenarios on file changes.')
+    parser.add_argument('--scenarios', default=','.join(test_roofs.SCENARIOS),
+                        help=f'comma-separated scenarios (default: {",".join(test_roofs.SCENARIOS)})')
+    parser.add_argument('--once', action='store_true', help='run the scenarios once and exit')
+    parser.add_argument('--port', type=int, default=DAEMON_PORT, help=f'server port (default {DAEMON_PORT})')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='compare SVG geometry per step with the golden files in geometry_snapshots/')
+    parser.add_argument('--update-snapshots', action='store_true', help='rewrite the geometry golden files')
+    parser.add_argument('--tolerance', type=float, default=geometry_snapshot.DEFAULT_TOLERANCE,
+                        help=f'geometry tolerance in px (default: {geometry_snapshot.DEFAULT_TOLERANCE})')
+    parser.add_argument('--no-screenshots', action='store_true', help='skip the full-page screenshots')
+    parser.add_argument('--trace', action='store_true', help='write a Chrome trace per scenario run to traces/')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in test_roofs.SCENARIOS]
+    if unknown:
+        print(f'Unknown scenario(s): {", ".join(unknown)} (known: {", ".join(test_roofs.SCENARIOS)})', file=sys.stderr)
+        return 2
+    scenarios = [name for name in test_roofs.SCENARIOS if name in scenarios]  # registry order
+    capture = {
+        'screenshots': not args.no_screenshots,
+        'snapshot': args.snapshot or args.update_snapshots,
+        'update_snapshots': args.update_snapshots,
+        'tolerance': args.tolerance,
+        'trace': args.trace,
+    }
+
+    httpd = test_roofs.start_server(args.port)
+    test_roofs.wait_for_server(args.port)
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            daemon = HarnessDaemon(browser, args.port, scenarios, capture)
+            started = time.perf_counter()
+            ok = print_summary(daemon.run(scenarios), time.perf_counter() - started)
+            if args.once:
+                return 0 if ok else 1
+            # Golden files are written once; reruns compare against them
+            daemon.capture['update_snapshots'] = False
+            try:
+                watch(daemon)
+            except KeyboardInterrupt:
+                pass
+            browser.close()
+    finally:
+        httpd.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
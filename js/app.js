@@ -14,6 +14,7 @@ let logicalConnectionMode = false; // Logical connection mode
 let firstArchClick = null; // Store first click for two-click arch creation
 let archCreationMode = false; // Track if we're in arch creation mode
 let logicalConnections = []; // Array of logical connections: {id, wordId1, posId1, wordId2, posId2, type, splitPoint}
+const archIndex = new ArchIndex(); // Interval index over arches for crossing/nesting queries
 
 // Transliteration: Hebrew to Arabic
 function transliterateHebrewToArabic(hebrewText) {
@@ -70,34 +71,104 @@ function getPartOfSpeechColumnIndex(type) {
 // Initialize the application
 function init() {
     setupEventListeners();
+    setupLayoutObservers();
+    setupValidationService();
     initWelcomeScreen();
+    window.__plonterReset = resetApp;
+    // Readiness signal for automated tests: the first shard of every category is listed
+    corpus.start().then(() => { window.__plonterReady = true; });
+}
+
+// Return to a pristine welcome screen without reloading the page. Used by the
+// test harness daemon between scenarios; resolves once saved analyses are cleared.
+function resetApp() {
+    document.querySelectorAll('.modal.show').forEach(modal => modal.classList.remove('show'));
+    closeDetailsPanel(true);
+    clearIncompleteMessages();
+
+    words = [];
+    arches = [];
+    combinations = [];
+    logicalConnections = [];
+    archIndex.reset(words, arches);
+    invalidatePhraseIndex();
+    resetValidationResults();
+    currentStageId = null;
+    currentSentence = "";
+    currentPosCategory = null;
+    deleteMode = false;
+    logicalConnectionMode = false;
+    firstArchClick = null;
+    archCreationMode = false;
+    autosave.begin(null, null);
+
+    const searchInput = document.getElementById('stage-search');
+    if (searchInput && searchInput.value) {
+        searchInput.value = '';
+        filterStages('');
+    }
+    document.getElementById('game-screen').style.display = 'none';
+    document.getElementById('welcome-screen').style.display = 'block';
+    window.scrollTo(0, 0);
+    refreshStageLists(true);
+
+    renderSentence();
+    updateModeButtons();
+    return autosave.clearAll();
 }
 
 // Initialize welcome screen
 function initWelcomeScreen() {
     renderStages();
     setupWelcomeScreenListeners();
+    corpus.onChange(onCorpusShardLoaded);
+    loadCategoriesNearViewport();
+}
+
+// A shard arrived: show its stages unless a search is active (the search
+// refreshes itself once the whole corpus is in)
+function onCorpusShardLoaded(category) {
+    const searchInput = document.getElementById('stage-search');
+    if (searchInput && searchInput.value.trim()) return;
+    if (category === 'workbook' || category === 'midterm') {
+        stageList(category).setStages(STAGES[category]);
+    }
+}
+
+// Fetch the rest of a category once its list comes near the viewport
+function loadCategoriesNearViewport() {
+    const categories = ['workbook', 'midterm'];
+    if (typeof IntersectionObserver === 'undefined') {
+        categories.forEach(category => corpus.loadCategory(category));
+        return;
+    }
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (!entry.isIntersecting) return;
+            observer.unobserve(entry.target);
+            corpus.loadCategory(entry.target.dataset.category);
+        });
+    }, { rootMargin: '400px 0px' });
+    categories.forEach(category => {
+        const container = document.getElementById(`stages-${category}`);
+        container.dataset.category = category;
+        observer.observe(container);
+    });
 }
 
 // Render stages on welcome screen
 function renderStages() {
-    // Render workbook stages
-    const workbookContainer = document.getElementById('stages-workbook');
-    workbookContainer.innerHTML = '';
-    
-    STAGES.workbook.forEach(stage => {
-        const stageItem = createStageItem(stage);
-        workbookContainer.appendChild(stageItem);
-    });
-    
-    // Render midterm stages
-    const midtermContainer = document.getElementById('stages-midterm');
-    midtermContainer.innerHTML = '';
-    
-    STAGES.midterm.forEach(stage => {
-        const stageItem = createStageItem(stage);
-        midtermContainer.appendChild(stageItem);
-    });
+    stageList('workbook').setStages(STAGES.workbook);
+    stageList('midterm').setStages(STAGES.midterm);
+}
+
+// Windowed list per category container (#stages-workbook, #stages-midterm)
+const stageLists = new Map();
+function stageList(category) {
+    if (!stageLists.has(category)) {
+        stageLists.set(category, new VirtualStageList(document.getElementById(`stages-${category}`), createStageItem));
+    }
+    return stageLists.get(category);
 }
 
 // Create stage item element
@@ -108,6 +179,7 @@ function createStageItem(stage) {
         <div class="stage-number">${stage.number}</div>
         <div class="stage-sentence">${stage.sentence}</div>
     `;
+    item.title = stage.sentence; // long sentences are clamped in windowed lists
     item.onclick = () => startStage(stage);
     return item;
 }
@@ -124,6 +196,10 @@ function startStage(stage) {
     // Reset state
     combinations = [];
     arches = [];
+    logicalConnections = [];
+    archIndex.reset(words, arches);
+    resetValidationResults();
+    autosave.begin(stage.id, currentSentence);
     deleteMode = false;
     firstArchClick = null;
     archCreationMode = false;
@@ -134,6 +210,88 @@ function startStage(stage) {
     
     renderSentence();
     updateModeButtons();
+    restoreSavedAnalysis(stage);
+}
+
+// Resume the saved analysis of a stage, if any. The whole state is rebuilt
+// from the folded snapshot first and rendered once, not replayed action by action.
+function restoreSavedAnalysis(stage) {
+    autosave.load(stage.id, currentSentence).then(saved => {
+        // Never overwrite work started while the saved copy was loading
+        const untouched = combinations.length === 0 && arches.length === 0 && logicalConnections.length === 0 &&
+            words.every(word => !word.hasPartOfSpeech());
+        if (!saved || currentStageId !== stage.id || !untouched) return;
+
+        const partIds = new Map();   // serial -> pos id
+        const partWords = new Map(); // serial -> word id
+        saved.parts.forEach(([wordIndex, type, details], n) => {
+            const word = words[wordIndex];
+            if (!word) return;
+            partIds.set(n, word.addPartOfSpeech(type, details).id);
+            partWords.set(n, word.id);
+        });
+
+        saved.combs.forEach(([part1, part2, flags, type]) => {
+            if (!partIds.has(part1) || !partIds.has(part2)) return;
+            combinations.push({
+                wordId1: partWords.get(part1),
+                posId1: partIds.get(part1),
+                wordId2: partWords.get(part2),
+                posId2: partIds.get(part2),
+                complete: (flags & 1) !== 0,
+                type: type,
+                isDemonstrative: (flags & 2) !== 0
+            });
+        });
+
+        const archIds = new Map(); // serial -> arch id
+        saved.arches.forEach(([word1, word2, height, role, flags, model, externalRole], n) => {
+            if (!words[word1] || !words[word2]) return;
+            const arch = {
+                id: `arch_${Date.now()}_${Math.random()}`,
+                wordId1: words[word1].id,
+                wordId2: words[word2].id,
+                height: height,
+                syntacticRole: role,
+                isMainRoof: (flags & 1) !== 0,
+                model: model,
+                isClause: (flags & 2) !== 0,
+                externalRole: externalRole,
+                validation: null,
+                clauseValidation: null
+            };
+            if (arch.isMainRoof && arch.model) arch.validation = validateSentenceModel(arch, words);
+            if (arch.isClause && arch.model) arch.clauseValidation = validateSentenceModel(arch, words);
+            arches.push(arch);
+            archIds.set(n, arch.id);
+        });
+        archIndex.reset(words, arches);
+        invalidatePhraseIndex();
+
+        saved.logic.forEach(([part1, part2, type]) => {
+            if (!partIds.has(part1) || !partIds.has(part2)) return;
+            const wordId1 = partWords.get(part1);
+            const wordId2 = partWords.get(part2);
+            logicalConnections.push({
+                id: `logical_${Date.now()}_${Math.random()}`,
+                wordId1: wordId1,
+                posId1: partIds.get(part1),
+                wordId2: wordId2,
+                posId2: partIds.get(part2),
+                type: type,
+                splitPoint: (archIndex.position(wordId1) + archIndex.position(wordId2)) / 2
+            });
+        });
+
+        autosave.adopt(saved, partIds, archIds);
+        renderSentence();
+    });
+}
+
+// Record an arch (new or edited) for autosave; pending arches are not part of the analysis yet
+function autosaveArch(arch) {
+    if (!arches.includes(arch)) return;
+    autosave.recordArch(arch, archIndex.position(arch.wordId1), archIndex.position(arch.wordId2));
 }
 
 // Setup welcome screen event listeners
@@ -145,14 +303,18 @@ function setupWelcomeScreenListeners() {
             const query = e.target.value;
             filterStages(query);
         });
+        // Build the search index before the first keystroke needs it
+        searchInput.addEventListener('focus', () => stageSearch.ensure(), { once: true });
     }
     
     // Back to menu button
     const backBtn = document.getElementById('back-to-menu-btn');
     if (backBtn) {
         backBtn.onclick = () => {
+            autosave.flush();
             document.getElementById('welcome-screen').style.display = 'block';
             document.getElementById('game-screen').style.display = 'none';
+            refreshStageLists(true);
         };
     }
 }
@@ -165,19 +327,16 @@ function filterStages(query) {
     }
     
     const filtered = searchStages(query);
-    
-    // Clear containers
-    document.getElementById('stages-workbook').innerHTML = '';
-    document.getElementById('stages-midterm').innerHTML = '';
-    
-    // Render filtered results
-    filtered.forEach(stage => {
-        const stageItem = createStageItem(stage);
-        const container = stage.category === 'workbook' 
-            ? document.getElementById('stages-workbook')
-            : document.getElementById('stages-midterm');
-        container.appendChild(stageItem);
-    });
+    stageList('workbook').setStages(filtered.filter(stage => stage.category === 'workbook'));
+    stageList('midterm').setStages(filtered.filter(stage => stage.category !== 'workbook'));
+
+    // Search what is loaded now, then again over the whole corpus
+    if (!corpus.isComplete()) {
+        corpus.loadAll().then(() => {
+            const searchInput = document.getElementById('stage-search');
+            if (corpus.isComplete() && searchInput && searchInput.value === query) filterStages(query);
+        });
+    }
 }
 
 // Toggle delete mode (for both parts of speech and arches)
@@ -233,134 +392,313 @@ function updateModelIndicator() {
     }
 }
 
-// Render the sentence with words and their parts of speech
+// Rendered word wrappers keyed by word id: { wrapper, signature }.
+// renderSentence() only rebuilds a wrapper when its signature changes.
+const renderedWords = new Map();
+let overlayRenderTimer = null;
+
+// Everything a word wrapper's markup and handlers depend on
+function getWordRenderSignature(word) {
+    const parts = word.partsOfSpeech.map(pos => `${pos.id}:${pos.type}`).join(',');
+    return `${word.text}|${deleteMode ? 1 : 0}${logicalConnectionMode ? 1 : 0}|${parts}`;
+}
+
+// Insert node directly after `previous` (or as first child) unless it is already there
+function placeAfter(parent, node, previous) {
+    const expected = previous ? previous.nextSibling : parent.firstChild;
+    if (node !== expected) {
+        parent.insertBefore(node, expected);
+    }
+    return node;
+}
+
+// Render the sentence with words and their parts of speech.
+// Keyed by word id: unchanged wrappers are kept and only their selection
+// state is patched; changed ones are rebuilt, removed ones dropped.
 function renderSentence() {
     const container = document.getElementById('sentence-container');
-    container.innerHTML = '';
     
     // Update model indicator
     updateModelIndicator();
 
-    // Create a wrapper for word and its parts
-    words.forEach((word, index) => {
-        const wordWrapper = document.createElement('div');
-        wordWrapper.className = 'word-wrapper';
-        wordWrapper.dataset.wordId = word.id;
-
-        // Word block (just the word)
-        const wordBlock = document.createElement('div');
-        wordBlock.className = 'word-block';
-        
-        const wordText = document.createElement('div');
-        wordText.className = 'word-text';
-        wordText.textContent = word.text;
-        
-        // Add click and touch handlers for arch creation (click on words directly, not parts of speech)
-        if (!deleteMode && !logicalConnectionMode) {
-            wordBlock.style.cursor = 'pointer';
-            wordBlock.onclick = (e) => {
-                e.stopPropagation();
-                handleWordClickForArch(word.id);
-            };
-            // Explicit touch handler for mobile — ensures word taps are captured
-            // even if synthetic click events are delayed or intercepted by overlays
-            wordBlock.addEventListener('touchend', (e) => {
-                e.preventDefault(); // Prevent delayed click/ghost click
-                e.stopPropagation();
-                handleWordClickForArch(word.id);
-            }, { passive: false });
+    const seen = new Set();
+    let previous = null;
+    words.forEach(word => {
+        const signature = getWordRenderSignature(word);
+        let entry = renderedWords.get(word.id);
+
+        if (entry && entry.signature === signature && entry.wrapper.parentNode === container) {
+            patchWordWrapper(entry.wrapper, word);
+        } else {
+            const wrapper = createWordWrapper(word);
+            if (entry && entry.wrapper.parentNode === container) {
+                container.replaceChild(wrapper, entry.wrapper);
+            }
+            entry = { wrapper, signature };
+            renderedWords.set(word.id, entry);
         }
-        
-        // Mark as selected if this word is the first click
-        if (firstArchClick && firstArchClick.wordId === word.id) {
-            wordBlock.classList.add('arch-selected');
+
+        previous = placeAfter(container, entry.wrapper, previous);
+        seen.add(word.id);
+    });
+
+    renderedWords.forEach((entry, wordId) => {
+        if (!seen.has(wordId)) {
+            entry.wrapper.remove();
+            renderedWords.delete(wordId);
         }
+    });
+
+    invalidateLayout();
+    scheduleOverlayRender();
+}
 
-        wordBlock.appendChild(wordText);
-        wordWrapper.appendChild(wordBlock);
+let renderSignalPending = false;
+
+// Render combination lines, arches and logical connections once layout has
+// settled; several requests in a row share one overlay pass
+function scheduleOverlayRender() {
+    if (overlayRenderTimer) return;
+    overlayRenderTimer = setTimeout(() => {
+        overlayRenderTimer = null;
+        renderCombinationLines();
+        renderArches();
+        renderLogicalConnections();
+        // With validation still in the worker, the drawing is not final yet:
+        // the signal is given once its results are in (see onValidationUpdate)
+        renderSignalPending = validationService.isBusy();
+        if (!renderSignalPending) signalRenderComplete();
+    }, 50);
+}
+
+// Reset the per-render selection state of a kept word wrapper
+function patchWordWrapper(wordWrapper, word) {
+    const wordBlock = wordWrapper.querySelector('.word-block');
+    wordBlock.classList.toggle('arch-selected', !!firstArchClick && firstArchClick.wordId === word.id);
+    wordWrapper.querySelectorAll('.part-tag.selected, .part-tag.arch-selected').forEach(tag => {
+        tag.classList.remove('selected', 'arch-selected');
+    });
+}
 
-        // Add button (outside word block)
-        const addBtn = document.createElement('button');
-        addBtn.className = 'add-pos-btn';
-        addBtn.innerHTML = '+';
-        addBtn.onclick = (e) => {
+// Build the wrapper for a word and its parts of speech
+function createWordWrapper(word) {
+    const wordWrapper = document.createElement('div');
+    wordWrapper.className = 'word-wrapper';
+    wordWrapper.dataset.wordId = word.id;
+
+    // Word block (just the word)
+    const wordBlock = document.createElement('div');
+    wordBlock.className = 'word-block';
+    
+    const wordText = document.createElement('div');
+    wordText.className = 'word-text';
+    wordText.textContent = word.text;
+    
+    // Add click and touch handlers for arch creation (click on words directly, not parts of speech)
+    if (!deleteMode && !logicalConnectionMode) {
+        wordBlock.style.cursor = 'pointer';
+        wordBlock.onclick = (e) => {
             e.stopPropagation();
-            openPartOfSpeechModal(word.id);
+            handleWordClickForArch(word.id);
         };
-        wordWrapper.appendChild(addBtn);
-
-        // Parts of speech container (outside the word block)
-        const partsContainer = document.createElement('div');
-        partsContainer.className = 'word-parts-container';
-        
-        if (word.hasPartOfSpeech()) {
-            word.partsOfSpeech.forEach(pos => {
-                const partTag = document.createElement('div');
-                partTag.className = 'part-tag';
-                const columnIndex = getPartOfSpeechColumnIndex(pos.type);
-                partTag.classList.add(`pos-column-${columnIndex}`);
-                partTag.dataset.wordId = word.id;
-                partTag.dataset.posId = pos.id;
-                
-                if (deleteMode) {
-                    partTag.classList.add('delete-mode');
-                    partTag.onclick = (e) => {
-                        e.stopPropagation();
-                        deletePartOfSpeech(word.id, pos.id);
-                    };
-                } else {
-                    partTag.onclick = (e) => {
-                        e.stopPropagation();
-                        handlePartClick(word.id, pos.id);
-                    };
-                }
+        // Explicit touch handler for mobile — ensures word taps are captured
+        // even if synthetic click events are delayed or intercepted by overlays
+        wordBlock.addEventListener('touchend', (e) => {
+            e.preventDefault(); // Prevent delayed click/ghost click
+            e.stopPropagation();
+            handleWordClickForArch(word.id);
+        }, { passive: false });
+    }
+    
+    // Mark as selected if this word is the first click
+    if (firstArchClick && firstArchClick.wordId === word.id) {
+        wordBlock.classList.add('arch-selected');
+    }
 
-                const partType = document.createElement('span');
-                partType.className = 'part-type';
-                partType.textContent = getPartOfSpeechName(pos.type);
-
-                // Edit button (always visible, except in delete mode)
-                if (!deleteMode) {
-                    const editBtn = document.createElement('span');
-                    editBtn.className = 'edit-icon';
-                    editBtn.innerHTML = '✏️';
-                    editBtn.onclick = (e) => {
-                        e.stopPropagation();
-                        openDetailsPanel(word.id, pos.id);
-                    };
-                    partTag.appendChild(partType);
-                    partTag.appendChild(editBtn);
-                } else {
-                    partTag.appendChild(partType);
-                }
+    wordBlock.appendChild(wordText);
+    wordWrapper.appendChild(wordBlock);
 
-                // Delete button (only in delete mode)
-                if (deleteMode) {
-                    const deleteBtn = document.createElement('span');
-                    deleteBtn.className = 'delete-icon';
-                    deleteBtn.innerHTML = '✕';
-                    partTag.appendChild(deleteBtn);
-                }
+    // Add button (outside word block)
+    const addBtn = document.createElement('button');
+    addBtn.className = 'add-pos-btn';
+    addBtn.innerHTML = '+';
+    addBtn.onclick = (e) => {
+        e.stopPropagation();
+        openPartOfSpeechModal(word.id);
+    };
+    wordWrapper.appendChild(addBtn);
+
+    // Parts of speech container (outside the word block)
+    const partsContainer = document.createElement('div');
+    partsContainer.className = 'word-parts-container';
+    
+    if (word.hasPartOfSpeech()) {
+        word.partsOfSpeech.forEach(pos => {
+            const partTag = document.createElement('div');
+            partTag.className = 'part-tag';
+            const columnIndex = getPartOfSpeechColumnIndex(pos.type);
+            partTag.classList.add(`pos-column-${columnIndex}`);
+            partTag.dataset.wordId = word.id;
+            partTag.dataset.posId = pos.id;
+            
+            if (deleteMode) {
+                partTag.classList.add('delete-mode');
+                partTag.onclick = (e) => {
+                    e.stopPropagation();
+                    deletePartOfSpeech(word.id, pos.id);
+                };
+            } else {
+                partTag.onclick = (e) => {
+                    e.stopPropagation();
+                    handlePartClick(word.id, pos.id);
+                };
+            }
 
-                partsContainer.appendChild(partTag);
-            });
-        }
+            const partType = document.createElement('span');
+            partType.className = 'part-type';
+            partType.textContent = getPartOfSpeechName(pos.type);
+
+            // Edit button (always visible, except in delete mode)
+            if (!deleteMode) {
+                const editBtn = document.createElement('span');
+                editBtn.className = 'edit-icon';
+                editBtn.innerHTML = '✏️';
+                editBtn.onclick = (e) => {
+                    e.stopPropagation();
+                    openDetailsPanel(word.id, pos.id);
+                };
+                partTag.appendChild(partType);
+                partTag.appendChild(editBtn);
+            } else {
+                partTag.appendChild(partType);
+            }
 
-        wordWrapper.appendChild(partsContainer);
-        container.appendChild(wordWrapper);
+            // Delete button (only in delete mode)
+            if (deleteMode) {
+                const deleteBtn = document.createElement('span');
+                deleteBtn.className = 'delete-icon';
+                deleteBtn.innerHTML = '✕';
+                partTag.appendChild(deleteBtn);
+            }
+
+            partsContainer.appendChild(partTag);
+        });
+    }
+
+    wordWrapper.appendChild(partsContainer);
+    return wordWrapper;
+}
+
+// Render-complete signal for automated tests: bumped each time the deferred
+// SVG pass (combination lines, arches, logical connections) has finished
+window.__plonterRenderSeq = 0;
+
+function signalRenderComplete() {
+    window.__plonterRenderSeq++;
+    window.__plonterRenderAt = performance.now();
+    const container = document.getElementById('sentence-container');
+    if (container) {
+        container.dataset.renderSeq = window.__plonterRenderSeq;
+    }
+}
+
+// ========== LAYOUT CACHE ==========
+// Geometry of the sentence, measured in a single read pass and shared by the
+// overlay renderers (combination lines, arches, logical connections) so they
+// never force a layout per arch or per combination. Rects are viewport-relative
+// DOMRects, exactly what getBoundingClientRect() returned at measure time.
+// Valid until the next frame, a renderSentence(), a resize or a scroll.
+const layoutCache = {
+    valid: false,
+    containerRect: null,
+    scrollLeft: 0,
+    scrollTop: 0,
+    wrappers: new Map(),   // wordId -> .word-wrapper rect
+    wordBlocks: new Map(), // wordId -> .word-block rect
+    parts: new Map()       // getPartLayoutKey(wordId, posId) -> .part-tag rect
+};
+let layoutFrameRequested = false;
+let lastContainerWidth = null;
+
+function getPartLayoutKey(wordId, posId) {
+    return `${wordId}|${posId}`;
+}
+
+function invalidateLayout() {
+    layoutCache.valid = false;
+}
+
+// Return the cached layout, measuring it first if needed
+function getLayout(container) {
+    if (!layoutCache.valid) {
+        measureLayout(container);
+    }
+    return layoutCache;
+}
+
+// Single read pass over every word wrapper, word block and part tag
+function measureLayout(container) {
+    layoutCache.containerRect = container.getBoundingClientRect();
+    layoutCache.scrollLeft = container.scrollLeft;
+    layoutCache.scrollTop = container.scrollTop;
+    layoutCache.wrappers.clear();
+    layoutCache.wordBlocks.clear();
+    layoutCache.parts.clear();
+
+    container.querySelectorAll('.word-wrapper').forEach(wrapper => {
+        const wordId = wrapper.dataset.wordId;
+        layoutCache.wrappers.set(wordId, wrapper.getBoundingClientRect());
+        const wordBlock = wrapper.querySelector('.word-block');
+        if (wordBlock) {
+            layoutCache.wordBlocks.set(wordId, wordBlock.getBoundingClientRect());
+        }
+        wrapper.querySelectorAll('.part-tag').forEach(tag => {
+            layoutCache.parts.set(getPartLayoutKey(wordId, tag.dataset.posId), tag.getBoundingClientRect());
+        });
     });
 
-    // Render combination lines
-    setTimeout(() => {
-        renderCombinationLines();
-        renderArches();
-        renderLogicalConnections();
-    }, 50);
+    layoutCache.valid = true;
+
+    // Anything measured is only trusted for the current frame
+    if (!layoutFrameRequested) {
+        layoutFrameRequested = true;
+        requestAnimationFrame(() => {
+            layoutFrameRequested = false;
+            invalidateLayout();
+        });
+    }
+}
+
+// Drop cached geometry when the sentence is resized or scrolled; a width change
+// also moves the words, so the overlays are redrawn
+function setupLayoutObservers() {
+    const container = document.getElementById('sentence-container');
+    if (!container) return;
+
+    container.addEventListener('scroll', invalidateLayout, { passive: true });
+    window.addEventListener('scroll', invalidateLayout, { passive: true });
+
+    const handleResize = () => {
+        invalidateLayout();
+        const width = container.clientWidth;
+        if (width !== lastContainerWidth) {
+            lastContainerWidth = width;
+            if (words.length > 0) {
+                scheduleOverlayRender();
+            }
+        }
+    };
+
+    if (typeof ResizeObserver !== 'undefined') {
+        new ResizeObserver(handleResize).observe(container);
+    } else {
+        window.addEventListener('resize', handleResize);
+    }
 }
 
 // Delete part of speech
 function deletePartOfSpeech(wordId, posId) {
-    const word = words.find(w => w.id === wordId);
+    const word = findWord(words, wordId);
     if (!word) return;
 
     // Remove combinations involving this part
@@ -371,6 +709,8 @@ function deletePartOfSpeech(wordId, posId) {
 
     // Remove the part of speech
     word.removePartOfSpeech(posId);
+    combinationValidationCache.invalidatePart(posId);
+    autosave.recordPartDeleted(posId);
 
     // Close panel if it was open for this part
     if (currentWordId === wordId && currentPartOfSpeechId === posId) {
@@ -415,7 +755,7 @@ function handlePartClick(wordId, posId) {
     
     if (existingSelection) {
         const selectedWordId = existingSelection.dataset.wordId;
-        const selectedPosId = existingSelection.dataset.posId;
+        const selectedPosId = Number(existingSelection.dataset.posId); // pos ids are integers
         
         // Don't allow same part to be selected twice
         if (selectedWordId === wordId && selectedPosId === posId) {
@@ -425,16 +765,16 @@ function handlePartClick(wordId, posId) {
         
         // Try to create combination (allow multiple combinations)
         // Determine which word is rightmost (first in RTL) - that's word1
-        const word1Index = words.findIndex(w => w.id === selectedWordId);
-        const word2Index = words.findIndex(w => w.id === wordId);
+        const word1Index = findWordPosition(words, selectedWordId);
+        const word2Index = findWordPosition(words, wordId);
         
         // In RTL, smaller index = appears first (right side)
         let word1, word2, pos1, pos2, finalWordId1, finalWordId2, finalPosId1, finalPosId2;
         
         if (word1Index <= word2Index) {
             // selectedWordId is rightmost (first)
-            word1 = words.find(w => w.id === selectedWordId);
-            word2 = words.find(w => w.id === wordId);
+            word1 = findWord(words, selectedWordId);
+            word2 = findWord(words, wordId);
             pos1 = word1.getPartOfSpeech(selectedPosId);
             pos2 = word2.getPartOfSpeech(posId);
             finalWordId1 = selectedWordId;
@@ -443,8 +783,8 @@ function handlePartClick(wordId, posId) {
             finalPosId2 = posId;
         } else {
             // wordId is rightmost (first)
-            word1 = words.find(w => w.id === wordId);
-            word2 = words.find(w => w.id === selectedWordId);
+            word1 = findWord(words, wordId);
+            word2 = findWord(words, selectedWordId);
             pos1 = word1.getPartOfSpeech(posId);
             pos2 = word2.getPartOfSpeech(selectedPosId);
             finalWordId1 = wordId;
@@ -453,7 +793,7 @@ function handlePartClick(wordId, posId) {
             finalPosId2 = selectedPosId;
         }
         
-        const result = validateCombination(pos1, pos2, finalWordId1, finalWordId2, words);
+        const result = validateCombination(pos1, pos2, finalWordId1, finalWordId2, words, combinations);
         
         if (result.valid && result.complete) {
             // Valid combination - add line (don't remove existing combinations)
@@ -498,11 +838,13 @@ function addCombination(wordId1, posId1, wordId2, posId2, complete, combinationT
             type: combinationType || (complete ? 'valid' : 'incomplete'),
             isDemonstrative: isDemonstrative
         });
+        autosave.recordCombination(combinations[combinations.length - 1]);
     }
 }
 
 // Delete combination (for delete mode)
 function deleteCombination(wordId1, posId1, wordId2, posId2) {
+    autosave.recordCombinationDeleted({ posId1, posId2 });
     combinations = combinations.filter(c =>
         !(c.wordId1 === wordId1 && c.posId1 === posId1 && c.wordId2 === wordId2 && c.posId2 === posId2) &&
         !(c.wordId1 === wordId2 && c.posId1 === posId2 && c.wordId2 === wordId1 && c.posId2 === posId1)
@@ -521,6 +863,15 @@ function findCombinationChains() {
         const id2 = `${comb.wordId2}_${comb.posId2}`;
         return id1 < id2 ? `${id1}-${id2}` : `${id2}-${id1}`;
     }
+
+    // Combinations grouped by the part they start from, in array order
+    const outgoing = new Map();
+    combinations.forEach(comb => {
+        const fromKey = `${comb.wordId1}|${comb.posId1}`;
+        if (!outgoing.has(fromKey)) outgoing.set(fromKey, []);
+        outgoing.get(fromKey).push(comb);
+    });
+    const wordIndex = getPhraseIndex(words);
     
     // Build chains by finding connected adjacent words
     combinations.forEach(comb => {
@@ -536,24 +887,19 @@ function findCombinationChains() {
         while (extended) {
             extended = false;
             const lastComb = chain[chain.length - 1];
-            const lastWordId = lastComb.wordId2;
-            const lastPosId = lastComb.posId2;
-            const lastWordIndex = words.findIndex(w => w.id === lastWordId);
+            const lastWordIndex = wordIndex.position(lastComb.wordId2);
             
             // Find next connection from last word
-            combinations.forEach(nextComb => {
+            (outgoing.get(`${lastComb.wordId2}|${lastComb.posId2}`) || []).forEach(nextComb => {
                 const nextKey = getCombKey(nextComb);
                 if (processed.has(nextKey)) return;
                 
-                // Check if this connection starts from the last word
-                if (nextComb.wordId1 === lastWordId && nextComb.posId1 === lastPosId) {
-                    const nextWordIndex = words.findIndex(w => w.id === nextComb.wordId2);
-                    // Only add if words are adjacent (chain continuity)
-                    if (Math.abs(lastWordIndex - nextWordIndex) === 1) {
-                        chain.push(nextComb);
-                        processed.add(nextKey);
-                        extended = true;
-                    }
+                const nextWordIndex = wordIndex.position(nextComb.wordId2);
+                // Only add if words are adjacent (chain continuity)
+                if (Math.abs(lastWordIndex - nextWordIndex) === 1) {
+                    chain.push(nextComb);
+                    processed.add(nextKey);
+                    extended = true;
                 }
             });
         }
@@ -564,58 +910,100 @@ function findCombinationChains() {
     return chains;
 }
 
-// Render combination lines between connected parts (as chains)
+// Drawn combination lines keyed by chain: { element, signature }
+const renderedCombinationLines = new Map();
+
+// Render combination lines between connected parts (as chains).
+// The SVG persists between renders; a line is only redrawn when its
+// geometry or styling changed.
 function renderCombinationLines() {
-    // Remove existing SVG lines
-    const existingSvg = document.getElementById('combination-lines-svg');
-    if (existingSvg) {
-        existingSvg.remove();
-    }
+    let svg = document.getElementById('combination-lines-svg');
 
     // Clear any previous incomplete phrase messages
     clearIncompleteMessages();
 
     const container = document.getElementById('sentence-container');
-    if (!container || combinations.length === 0) return;
+    if (!container) return;
+
+    // Part tags survive between renders, so clear the last pass's chain styling
+    container.querySelectorAll('.part-tag.connected, .part-tag.incomplete-chain').forEach(tag => {
+        tag.classList.remove('connected', 'incomplete-chain');
+        tag.style.borderColor = '';
+        tag.style.borderWidth = '';
+    });
+
+    if (combinations.length === 0) {
+        if (svg) svg.remove();
+        renderedCombinationLines.clear();
+        return;
+    }
 
     // Create SVG container
-    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
-    svg.id = 'combination-lines-svg';
-    svg.style.position = 'absolute';
-    svg.style.top = '0';
-    svg.style.left = '0';
-    svg.style.width = '100%';
-    svg.style.height = '100%';
+    if (!svg) {
+        svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+        svg.id = 'combination-lines-svg';
+        svg.style.position = 'absolute';
+        svg.style.top = '0';
+        svg.style.left = '0';
+        svg.style.width = '100%';
+        svg.style.height = '100%';
+        svg.style.zIndex = '1'; // Behind badges (badges are z-index 10)
+    }
     svg.style.pointerEvents = deleteMode ? 'auto' : 'none';
-    svg.style.zIndex = '1'; // Behind badges (badges are z-index 10)
 
-    const containerRect = container.getBoundingClientRect();
+    const drawn = new Map();
+    let previous = null;
+
+    // Reuse the element drawn last pass under this key if nothing changed
+    const reuseLine = (key, signature) => {
+        const cached = renderedCombinationLines.get(key);
+        if (!cached || cached.signature !== signature || cached.element.parentNode !== svg) return false;
+        drawn.set(key, cached);
+        previous = placeAfter(svg, cached.element, previous);
+        return true;
+    };
+    const addLine = (key, signature, element) => {
+        drawn.set(key, { element, signature });
+        previous = placeAfter(svg, element, previous);
+    };
+
+    const partTags = new Map();
+    container.querySelectorAll('.part-tag').forEach(tag => {
+        partTags.set(getPartLayoutKey(tag.dataset.wordId, tag.dataset.posId), tag);
+    });
 
-    // Find chains and render as continuous paths
+    // Find chains and render as continuous paths.
+    // First pass only writes badge styling; geometry is read afterwards in one
+    // layout pass so style writes and rect reads never interleave.
     const chains = findCombinationChains();
+    const chainPaths = [];
+
+    // Incomplete prepositional phrases, checked by the validation service for
+    // the chains that have something to draw
+    const chainChecks = [];
+    chains.forEach(chain => {
+        const combTypes = chain.filter(comb =>
+            partTags.has(getPartLayoutKey(comb.wordId1, comb.posId1)) &&
+            partTags.has(getPartLayoutKey(comb.wordId2, comb.posId2)));
+        if (combTypes.length > 0) {
+            chainChecks.push({ key: getChainCheckKey(chain, combTypes), chain, combTypes });
+        }
+    });
+    validationService.run('chains', { words, chains: chainChecks });
     
     chains.forEach(chain => {
-        const points = [];
+        const segments = [];
         const combTypes = [];
+        let pointCount = 0;
         
-        // Collect all points in chain
+        // Collect the drawable segments in chain
         chain.forEach((comb, index) => {
-            const part1 = document.querySelector(`[data-word-id="${comb.wordId1}"][data-pos-id="${comb.posId1}"]`);
-            const part2 = document.querySelector(`[data-word-id="${comb.wordId2}"][data-pos-id="${comb.posId2}"]`);
+            const part1 = partTags.get(getPartLayoutKey(comb.wordId1, comb.posId1));
+            const part2 = partTags.get(getPartLayoutKey(comb.wordId2, comb.posId2));
             
             if (part1 && part2) {
-                const rect1 = part1.getBoundingClientRect();
-                const rect2 = part2.getBoundingClientRect();
-                
-                const x1 = rect1.left + rect1.width / 2 - containerRect.left + container.scrollLeft;
-                const y1 = rect1.top + rect1.height / 2 - containerRect.top + container.scrollTop;
-                const x2 = rect2.left + rect2.width / 2 - containerRect.left + container.scrollLeft;
-                const y2 = rect2.top + rect2.height / 2 - containerRect.top + container.scrollTop;
-                
-                if (index === 0) {
-                    points.push({ x: x1, y: y1 });
-                }
-                points.push({ x: x2, y: y2 });
+                pointCount += index === 0 ? 2 : 1;
+                segments.push({ comb, index });
                 combTypes.push(comb);
                 
                 // Add glow effect to connected badges
@@ -623,9 +1011,7 @@ function renderCombinationLines() {
                 part2.classList.add('connected');
                 
                 // Add border color based on combination validity (for entire chain)
-                const chain = findCombinationChains().find(c => c.includes(comb));
-                const allValid = chain ? chain.every(c => c.complete && c.type === 'valid') : comb.complete && comb.type === 'valid';
-                const hasInvalid = chain ? chain.some(c => c.type === 'invalid' || (!c.complete && c.type !== 'incomplete')) : comb.type === 'invalid';
+                const allValid = chain.every(c => c.complete && c.type === 'valid');
                 
                 // No special color for demonstrative - treat like any other combination
                 if (!allValid) {
@@ -644,18 +1030,8 @@ function renderCombinationLines() {
             }
         });
         
-        // Draw continuous path through all points
-        if (points.length >= 2) {
-            const path = document.createElementNS('http://www.w3.org/2000/svg', 'path');
-            let pathData = `M ${points[0].x} ${points[0].y}`;
-            
-            for (let i = 1; i < points.length; i++) {
-                pathData += ` L ${points[i].x} ${points[i].y}`;
-            }
-            
-            path.setAttribute('d', pathData);
-            path.setAttribute('fill', 'none');
-            
+        // Continuous path through all points
+        if (pointCount >= 2) {
             // Determine color from chain (use first comb's type, or mixed if different)
             // Check if entire chain is valid (all complete and valid)
             const allValid = combTypes.every(c => c.complete && c.type === 'valid');
@@ -667,7 +1043,7 @@ function renderCombinationLines() {
             const hasDemonstrative = combTypes.some(c => c.isDemonstrative);
 
             // Check if combination ends with preposition (needs completion)
-            const endsWithPreposition = checkCombinationEndsWithPreposition(chain, combTypes);
+            const endsWithPreposition = chainEndsWithPreposition[getChainCheckKey(chain, combTypes)] === true;
 
             // Check for incomplete phrase - ends with preposition needs noun/nominal phrase
             if (endsWithPreposition) {
@@ -691,48 +1067,89 @@ function renderCombinationLines() {
                 strokeColor = '#10b981';
                 strokeWidth = 5;
             }
+
+            chainPaths.push({ chain, segments, strokeColor, strokeWidth });
+        }
+    });
+
+    // Styling is settled - measure once (badge borders may have changed sizes) and draw
+    invalidateLayout();
+    const layout = getLayout(container);
+    const containerRect = layout.containerRect;
+    const scrollL = layout.scrollLeft;
+    const scrollT = layout.scrollTop;
+
+    chainPaths.forEach(({ chain, segments, strokeColor, strokeWidth }) => {
+        const points = [];
+        segments.forEach(({ comb, index }) => {
+            const rect1 = layout.parts.get(getPartLayoutKey(comb.wordId1, comb.posId1));
+            const rect2 = layout.parts.get(getPartLayoutKey(comb.wordId2, comb.posId2));
             
-            path.setAttribute('stroke', strokeColor);
-            path.setAttribute('stroke-width', strokeWidth);
-            path.setAttribute('stroke-linecap', 'round');
-            path.setAttribute('stroke-linejoin', 'round');
-            path.classList.add('combination-line');
+            const x1 = rect1.left + rect1.width / 2 - containerRect.left + scrollL;
+            const y1 = rect1.top + rect1.height / 2 - containerRect.top + scrollT;
+            const x2 = rect2.left + rect2.width / 2 - containerRect.left + scrollL;
+            const y2 = rect2.top + rect2.height / 2 - containerRect.top + scrollT;
             
-            if (deleteMode) {
-                path.style.cursor = 'pointer';
-                path.onclick = () => {
-                    // Delete all combinations in chain
-                    chain.forEach(comb => {
-                        deleteCombination(comb.wordId1, comb.posId1, comb.wordId2, comb.posId2);
-                    });
-                };
+            if (index === 0) {
+                points.push({ x: x1, y: y1 });
             }
-            
-            svg.appendChild(path);
+            points.push({ x: x2, y: y2 });
+        });
+
+        let pathData = `M ${points[0].x} ${points[0].y}`;
+        
+        for (let i = 1; i < points.length; i++) {
+            pathData += ` L ${points[i].x} ${points[i].y}`;
+        }
+
+        const key = 'chain:' + chain.map(getCombinationKey).join(',');
+        const signature = `${pathData}|${strokeColor}|${strokeWidth}|${deleteMode ? 1 : 0}`;
+        if (reuseLine(key, signature)) return;
+
+        const path = document.createElementNS('http://www.w3.org/2000/svg', 'path');
+        path.setAttribute('d', pathData);
+        path.setAttribute('fill', 'none');
+        path.setAttribute('stroke', strokeColor);
+        path.setAttribute('stroke-width', strokeWidth);
+        path.setAttribute('stroke-linecap', 'round');
+        path.setAttribute('stroke-linejoin', 'round');
+        path.classList.add('combination-line');
+        
+        if (deleteMode) {
+            path.style.cursor = 'pointer';
+            path.onclick = () => {
+                // Delete all combinations in chain
+                chain.forEach(comb => {
+                    deleteCombination(comb.wordId1, comb.posId1, comb.wordId2, comb.posId2);
+                });
+            };
         }
+        
+        addLine(key, signature, path);
     });
     
     // Add dashed line for demonstrative pointing to noun/nominal phrase
     combinations.forEach(comb => {
         if (comb.isDemonstrative) {
-            const word1 = words.find(w => w.id === comb.wordId1);
-            const word2 = words.find(w => w.id === comb.wordId2);
+            const word1 = findWord(words, comb.wordId1);
+            const word2 = findWord(words, comb.wordId2);
             const pos1 = word1?.getPartOfSpeech(comb.posId1);
             const pos2 = word2?.getPartOfSpeech(comb.posId2);
             
             // Check if demonstrative points to noun or nominal phrase
             if (pos1?.type === 'demonstrative' && (pos2?.type === 'noun' || pos2?.type === 'adjective')) {
-                const part1 = document.querySelector(`[data-word-id="${comb.wordId1}"][data-pos-id="${comb.posId1}"]`);
-                const part2 = document.querySelector(`[data-word-id="${comb.wordId2}"][data-pos-id="${comb.posId2}"]`);
+                const rect1 = layout.parts.get(getPartLayoutKey(comb.wordId1, comb.posId1));
+                const rect2 = layout.parts.get(getPartLayoutKey(comb.wordId2, comb.posId2));
                 
-                if (part1 && part2) {
-                    const rect1 = part1.getBoundingClientRect();
-                    const rect2 = part2.getBoundingClientRect();
-                    
+                if (rect1 && rect2) {
                     const x1 = rect1.left + rect1.width / 2 - containerRect.left;
                     const y1 = rect1.top + rect1.height / 2 - containerRect.top;
                     const x2 = rect2.left + rect2.width / 2 - containerRect.left;
                     const y2 = rect2.top + rect2.height / 2 - containerRect.top;
+
+                    const key = 'demonstrative:' + getCombinationKey(comb);
+                    const signature = `${x1},${y1},${x2},${y2}`;
+                    if (reuseLine(key, signature)) return;
                     
                     // Create dashed line (same color as combination)
                     const dashedLine = document.createElementNS('http://www.w3.org/2000/svg', 'line');
@@ -745,18 +1162,34 @@ function renderCombinationLines() {
                     dashedLine.setAttribute('stroke-dasharray', '5,5');
                     dashedLine.style.opacity = '0.7';
                     
-                    svg.appendChild(dashedLine);
+                    addLine(key, signature, dashedLine);
                 }
             }
         }
     });
-    
+
+    // Drop lines whose chain is gone or was redrawn
+    renderedCombinationLines.forEach((entry, key) => {
+        if (drawn.get(key) !== entry) entry.element.remove();
+    });
+    renderedCombinationLines.clear();
+    drawn.forEach((entry, key) => renderedCombinationLines.set(key, entry));
+
     if (svg.children.length > 0) {
-        container.style.position = 'relative';
-        container.appendChild(svg);
+        if (svg.parentNode !== container) {
+            container.style.position = 'relative';
+            container.appendChild(svg);
+        }
+    } else {
+        svg.remove();
     }
 }
 
+// Stable key for a combination, used to key its drawn line
+function getCombinationKey(comb) {
+    return `${comb.wordId1}:${comb.posId1}>${comb.wordId2}:${comb.posId2}`;
+}
+
 // ========== ARCH/ROOF SYSTEM ==========
 
 // Handle word click for arch creation
@@ -826,8 +1259,8 @@ function createSingleWordArch(wordId) {
 // Create an arch between two words
 function createArch(wordId1, wordId2) {
     // Normalize word order: wordId1 = lower index (rightmost in RTL)
-    const idx1 = words.findIndex(w => w.id === wordId1);
-    const idx2 = words.findIndex(w => w.id === wordId2);
+    const idx1 = findWordPosition(words, wordId1);
+    const idx2 = findWordPosition(words, wordId2);
     if (idx1 > idx2) {
         [wordId1, wordId2] = [wordId2, wordId1];
     }
@@ -878,387 +1311,384 @@ function createArch(wordId1, wordId2) {
 
 // Validate arch hierarchy: only full nesting (matryoshka) or no overlap allowed
 function validateArchHierarchy(wordId1, wordId2) {
-    const idx1 = words.findIndex(w => w.id === wordId1);
-    const idx2 = words.findIndex(w => w.id === wordId2);
-    const newStart = Math.min(idx1, idx2);
-    const newEnd = Math.max(idx1, idx2);
-
-    for (const arch of arches) {
-        const aIdx1 = words.findIndex(w => w.id === arch.wordId1);
-        const aIdx2 = words.findIndex(w => w.id === arch.wordId2);
-        const aStart = Math.min(aIdx1, aIdx2);
-        const aEnd = Math.max(aIdx1, aIdx2);
-
-        // Skip single-word arches that are contained
-        if (aStart === aEnd) continue;
-
-        // Check for partial overlap (not nested, not disjoint, not identical)
-        const isNested = (newStart >= aStart && newEnd <= aEnd) || (aStart >= newStart && aEnd <= newEnd);
-        const isDisjoint = newEnd < aStart || newStart > aEnd;
-        const isIdentical = newStart === aStart && newEnd === aEnd;
-
-        if (!isNested && !isDisjoint && !isIdentical) {
-            return 'גגות חייבים להיות מקוננים (בבושקה) — חפיפה חלקית אינה מותרת';
-        }
+    const span = archIndex.sync(words, arches).span(wordId1, wordId2);
+    if (span && archIndex.crosses(span.start, span.end)) {
+        return 'גגות חייבים להיות מקוננים (בבושקה) — חפיפה חלקית אינה מותרת';
     }
     return null; // No error
 }
 
 // Calculate arch height with nesting logic
 function calculateArchHeight(wordId1, wordId2) {
-    const index1 = words.findIndex(w => w.id === wordId1);
-    const index2 = words.findIndex(w => w.id === wordId2);
-    const start = Math.min(index1, index2);
-    const end = Math.max(index1, index2);
-    
-    // Find arches that contain this arch (nested)
-    const containingArches = arches.filter(a => {
-        const aIndex1 = words.findIndex(w => w.id === a.wordId1);
-        const aIndex2 = words.findIndex(w => w.id === a.wordId2);
-        const aStart = Math.min(aIndex1, aIndex2);
-        const aEnd = Math.max(aIndex1, aIndex2);
-        
-        return aStart < start && aEnd > end;
-    });
+    // Number of arches that contain this arch (nested)
+    const span = archIndex.sync(words, arches).span(wordId1, wordId2);
+    const nestingLevel = span ? archIndex.depth(span.start, span.end) : 0;
     
     // Base height: 120px (higher), decrease by 40px for each nesting level
     const baseHeight = 120;
-    const nestingLevel = containingArches.length;
     return baseHeight - (nestingLevel * 40);
 }
 
-// Render arches as rectangular roofs with vertical and horizontal lines
+// Drawn arch groups keyed by arch id: { group, arch, signature }
+const renderedArches = new Map();
+
+// Render arches as rectangular roofs with vertical and horizontal lines.
+// The SVG persists between renders; an arch group is only rebuilt when its
+// geometry, colour, label or mode changed.
 function renderArches() {
-    // Remove existing arch SVG
-    const existingSvg = document.getElementById('arch-svg');
-    if (existingSvg) {
-        existingSvg.remove();
-    }
-    
+    let svg = document.getElementById('arch-svg');
     const container = document.getElementById('sentence-container');
-    if (!container || arches.length === 0) return;
+    if (!container || arches.length === 0) {
+        if (svg) svg.remove();
+        renderedArches.clear();
+        return;
+    }
     
     // Create SVG container for arches
-    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
-    svg.id = 'arch-svg';
-    svg.style.position = 'absolute';
-    svg.style.top = '0';
-    svg.style.left = '0';
-    svg.style.width = '100%';
-    svg.style.height = '100%';
-    svg.style.pointerEvents = 'none';
-    svg.style.zIndex = '2'; // Above combination lines, below badges
-    svg.style.overflow = 'visible'; // Ensure lines aren't clipped
-    
-    const containerRect = container.getBoundingClientRect();
+    if (!svg) {
+        svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+        svg.id = 'arch-svg';
+        svg.style.position = 'absolute';
+        svg.style.top = '0';
+        svg.style.left = '0';
+        svg.style.width = '100%';
+        svg.style.height = '100%';
+        svg.style.pointerEvents = 'none';
+        svg.style.zIndex = '2'; // Above combination lines, below badges
+        svg.style.overflow = 'visible'; // Ensure lines aren't clipped
+    }
+
+    // The first-click halo is cheap and short-lived, so it is always redrawn
+    svg.querySelectorAll('.arch-halo').forEach(halo => halo.remove());
+    
+    // Re-validate main roofs and clauses and match arches against the
+    // combinations below them (see applyArchValidation)
+    validationService.run('arches', {
+        words,
+        combinations,
+        arches: arches.map(({ id, wordId1, wordId2, isMainRoof, isClause, model }) =>
+            ({ id, wordId1, wordId2, isMainRoof, isClause, model }))
+    });
+
+    const layout = getLayout(container);
+    const containerRect = layout.containerRect;
+    const drawn = new Map();
+    let previous = null;
     
     arches.forEach(arch => {
-        // Re-validate if it's a main roof or clause
-        if (arch.isMainRoof && arch.model) {
-            arch.validation = validateSentenceModel(arch);
-        }
-        if (arch.isClause && arch.model) {
-            arch.clauseValidation = validateSentenceModel(arch);
-        }
-        
         // Get word blocks (not parts of speech)
-        const wordWrapper1 = container.querySelector(`[data-word-id="${arch.wordId1}"]`);
-        const wordWrapper2 = container.querySelector(`[data-word-id="${arch.wordId2}"]`);
+        const rect1 = layout.wordBlocks.get(arch.wordId1);
+        const rect2 = layout.wordBlocks.get(arch.wordId2);
         
-        if (wordWrapper1 && wordWrapper2) {
-            const wordBlock1 = wordWrapper1.querySelector('.word-block');
-            const wordBlock2 = wordWrapper2.querySelector('.word-block');
+        if (rect1 && rect2) {
+            // Get indices to determine direction
+            const index1 = findWordPosition(words, arch.wordId1);
+            const index2 = findWordPosition(words, arch.wordId2);
             
-            if (wordBlock1 && wordBlock2) {
-                const rect1 = wordBlock1.getBoundingClientRect();
-                const rect2 = wordBlock2.getBoundingClientRect();
-                
-                // Get indices to determine direction
-                const index1 = words.findIndex(w => w.id === arch.wordId1);
-                const index2 = words.findIndex(w => w.id === arch.wordId2);
-                
-                // Check if single word arch (same word clicked twice) or two words
-                const isSingleWord = arch.wordId1 === arch.wordId2;
-                
-                // In RTL: smaller index = appears first (right side), larger index = appears later (left side)
-                // Determine right and left edges (RTL: right is smaller x, left is larger x)
-                // For RTL Arabic: draw from RIGHT edge of first word to LEFT edge of second word
-                let leftEdge, rightEdge, leftY, rightY;
-                
-                // Scroll compensation: getBoundingClientRect() is viewport-relative,
-                // but SVG is content-relative. Add scroll offsets.
-                const scrollL = container.scrollLeft;
-                const scrollT = container.scrollTop;
-
-                if (isSingleWord) {
-                    // Single word: rectangle without bottom (two vertical lines connected by horizontal line on top)
-                    leftEdge = rect1.left - containerRect.left + scrollL;
-                    rightEdge = rect1.left + rect1.width - containerRect.left + scrollL;
-                    leftY = rect1.top - containerRect.top + scrollT;
-                    rightY = rect1.top - containerRect.top + scrollT;
-                } else {
-                    // Two words: roof spans from the rightmost word to the leftmost word
-                    const firstIndex = Math.min(index1, index2);
-                    const secondIndex = Math.max(index1, index2);
-
-                    const firstWordId = firstIndex === index1 ? arch.wordId1 : arch.wordId2;
-                    const secondWordId = secondIndex === index2 ? arch.wordId2 : arch.wordId1;
-                    const firstRect = firstWordId === arch.wordId1 ? rect1 : rect2;
-                    const secondRect = secondWordId === arch.wordId2 ? rect2 : rect1;
-
-                    // RTL: first word (lower index) = right side, second word (higher index) = left side
-                    rightEdge = firstRect.left + firstRect.width - containerRect.left + scrollL;
-                    leftEdge = secondRect.left - containerRect.left + scrollL;
-                    rightY = firstRect.top - containerRect.top + scrollT;
-                    leftY = secondRect.top - containerRect.top + scrollT;
-                }
-                
-                // Roof height
-                const roofY = Math.min(rightY, leftY) - arch.height;
-                const roofHeight = 6; // Height of the roof rectangle
-                
-                // Check if arch matches combinations below
-                const matchesCombination = checkArchMatchesCombinations(arch);
-                
-                // Determine stroke color based on validation and combination matching
-                let strokeColor = '#667eea'; // Default blue
-                let strokeWidth = 3;
-                
-                if (!matchesCombination && (arch.syntacticRole || arch.isClause || arch.isMainRoof)) {
-                    // Yellow if arch doesn't match combinations below
-                    strokeColor = '#fbbf24'; // Yellow
-                    strokeWidth = 3;
-                } else if (arch.isMainRoof && arch.validation) {
-                strokeColor = arch.validation.color;
-                    strokeWidth = 4;
-                } else if (arch.isClause && arch.clauseValidation) {
-                    strokeColor = arch.clauseValidation.color;
-                    strokeWidth = 3;
-            } else if (arch.isMainRoof) {
-                strokeColor = getModelColor(arch.model);
-                    strokeWidth = 4;
+            // Check if single word arch (same word clicked twice) or two words
+            const isSingleWord = arch.wordId1 === arch.wordId2;
+            
+            // In RTL: smaller index = appears first (right side), larger index = appears later (left side)
+            // Determine right and left edges (RTL: right is smaller x, left is larger x)
+            // For RTL Arabic: draw from RIGHT edge of first word to LEFT edge of second word
+            let leftEdge, rightEdge, leftY, rightY;
+            
+            // Scroll compensation: getBoundingClientRect() is viewport-relative,
+            // but SVG is content-relative. Add scroll offsets.
+            const scrollL = layout.scrollLeft;
+            const scrollT = layout.scrollTop;
+
+            if (isSingleWord) {
+                // Single word: rectangle without bottom (two vertical lines connected by horizontal line on top)
+                leftEdge = rect1.left - containerRect.left + scrollL;
+                rightEdge = rect1.left + rect1.width - containerRect.left + scrollL;
+                leftY = rect1.top - containerRect.top + scrollT;
+                rightY = rect1.top - containerRect.top + scrollT;
+            } else {
+                // Two words: roof spans from the rightmost word to the leftmost word
+                const firstIndex = Math.min(index1, index2);
+                const secondIndex = Math.max(index1, index2);
+
+                const firstWordId = firstIndex === index1 ? arch.wordId1 : arch.wordId2;
+                const secondWordId = secondIndex === index2 ? arch.wordId2 : arch.wordId1;
+                const firstRect = firstWordId === arch.wordId1 ? rect1 : rect2;
+                const secondRect = secondWordId === arch.wordId2 ? rect2 : rect1;
+
+                // RTL: first word (lower index) = right side, second word (higher index) = left side
+                rightEdge = firstRect.left + firstRect.width - containerRect.left + scrollL;
+                leftEdge = secondRect.left - containerRect.left + scrollL;
+                rightY = firstRect.top - containerRect.top + scrollT;
+                leftY = secondRect.top - containerRect.top + scrollT;
+            }
+            
+            // Roof height
+            const roofY = Math.min(rightY, leftY) - arch.height;
+            const roofHeight = 6; // Height of the roof rectangle
+            
+            // Check if arch matches combinations below
+            const matchesCombination = archValidation[arch.id]?.matches !== false;
+            
+            // Determine stroke color based on validation and combination matching
+            let strokeColor = '#667eea'; // Default blue
+            let strokeWidth = 3;
+            
+            if (!matchesCombination && (arch.syntacticRole || arch.isClause || arch.isMainRoof)) {
+                // Yellow if arch doesn't match combinations below
+                strokeColor = '#fbbf24'; // Yellow
+                strokeWidth = 3;
+            } else if (arch.isMainRoof && arch.validation) {
+            strokeColor = arch.validation.color;
+                strokeWidth = 4;
+            } else if (arch.isClause && arch.clauseValidation) {
+                strokeColor = arch.clauseValidation.color;
+                strokeWidth = 3;
+        } else if (arch.isMainRoof) {
+            strokeColor = getModelColor(arch.model);
+                strokeWidth = 4;
+            }
+            
+            // Label text for the syntactic role button above the arch
+            // Change names based on model: נשוא א', נושא א'
+            let labelText = arch.externalRole || arch.syntacticRole || '';
+            if (arch.isMainRoof && arch.model) {
+                const modelNames = { 'A': 'א', 'B': 'ב', 'C': 'ג' };
+                if (arch.syntacticRole === 'נשוא') {
+                    labelText = `נשוא ${modelNames[arch.model]}`;
+                } else if (arch.syntacticRole === 'נושא') {
+                    labelText = `נושא ${modelNames[arch.model]}`;
+                } else if (!labelText) {
+                    labelText = `דגם ${modelNames[arch.model]}`;
                 }
+            } else if (!labelText && arch.model) {
+                const modelNames = { 'A': 'א', 'B': 'ב', 'C': 'ג' };
+                labelText = `דגם ${modelNames[arch.model]}`;
+            }
+
+            // Unchanged since the last pass - keep the existing group
+            const signature = [leftEdge, rightEdge, leftY, rightY, roofY, strokeColor, strokeWidth, labelText, deleteMode].join('|');
+            const cached = renderedArches.get(arch.id);
+            if (cached && cached.arch === arch && cached.signature === signature && cached.group.parentNode === svg) {
+                drawn.set(arch.id, cached);
+                previous = placeAfter(svg, cached.group, previous);
+                return;
+            }
+            
+            // Create group for this arch
+            const archGroup = document.createElementNS('http://www.w3.org/2000/svg', 'g');
+            archGroup.dataset.archId = arch.id;
+            archGroup.style.pointerEvents = deleteMode ? 'auto' : 'none'; // Only intercept in delete mode
+            
+            if (isSingleWord) {
+                // Single word: rectangle without bottom (two vertical lines + horizontal line on top)
+                // Left vertical line (at left edge)
+                const verticalLine1 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                verticalLine1.setAttribute('x1', leftEdge);
+                verticalLine1.setAttribute('y1', leftY);
+                verticalLine1.setAttribute('x2', leftEdge);
+                verticalLine1.setAttribute('y2', roofY);
+                verticalLine1.setAttribute('stroke', strokeColor);
+                verticalLine1.setAttribute('stroke-width', strokeWidth);
+
+                // Top horizontal line (connects left to right)
+                const horizontalLine = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                horizontalLine.setAttribute('x1', leftEdge);
+                horizontalLine.setAttribute('y1', roofY);
+                horizontalLine.setAttribute('x2', rightEdge);
+                horizontalLine.setAttribute('y2', roofY);
+                horizontalLine.setAttribute('stroke', strokeColor);
+                horizontalLine.setAttribute('stroke-width', strokeWidth);
+
+                // Right vertical line (at right edge)
+                const verticalLine2 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                verticalLine2.setAttribute('x1', rightEdge);
+                verticalLine2.setAttribute('y1', roofY);
+                verticalLine2.setAttribute('x2', rightEdge);
+                verticalLine2.setAttribute('y2', rightY);
+                verticalLine2.setAttribute('stroke', strokeColor);
+                verticalLine2.setAttribute('stroke-width', strokeWidth);
+
+                archGroup.appendChild(verticalLine1);
+                archGroup.appendChild(horizontalLine);
+                archGroup.appendChild(verticalLine2);
+            } else {
+                // Two words: large roof over both words
+                // Left vertical line (at leftmost position)
+                const verticalLine1 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                verticalLine1.setAttribute('x1', leftEdge);
+                verticalLine1.setAttribute('y1', leftY);
+                verticalLine1.setAttribute('x2', leftEdge);
+                verticalLine1.setAttribute('y2', roofY);
+                verticalLine1.setAttribute('stroke', strokeColor);
+                verticalLine1.setAttribute('stroke-width', strokeWidth);
+
+                // Horizontal roof line (spans from left to right)
+                const horizontalLine = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                horizontalLine.setAttribute('x1', leftEdge);
+                horizontalLine.setAttribute('y1', roofY);
+                horizontalLine.setAttribute('x2', rightEdge);
+                horizontalLine.setAttribute('y2', roofY);
+                horizontalLine.setAttribute('stroke', strokeColor);
+                horizontalLine.setAttribute('stroke-width', strokeWidth);
+
+                // Right vertical line (at rightmost position)
+                const verticalLine2 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
+                verticalLine2.setAttribute('x1', rightEdge);
+                verticalLine2.setAttribute('y1', roofY);
+                verticalLine2.setAttribute('x2', rightEdge);
+                verticalLine2.setAttribute('y2', rightY);
+                verticalLine2.setAttribute('stroke', strokeColor);
+                verticalLine2.setAttribute('stroke-width', strokeWidth);
+
+                archGroup.appendChild(verticalLine1);
+                archGroup.appendChild(horizontalLine);
+                archGroup.appendChild(verticalLine2);
+            }
+            
+            if (labelText) {
+                const labelY = roofY - 25;
+                const labelX = (rightEdge + leftEdge) / 2;
+
+                // Calculate dynamic width based on text length
+                // Approximate: Hebrew chars are ~8-10px each at 11px font
+                const estimatedTextWidth = labelText.length * 9;
+                const labelWidth = Math.max(70, estimatedTextWidth + 20); // Min 70px, with 20px padding
+
+                const labelBg = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
+                labelBg.setAttribute('x', labelX - (labelWidth / 2));
+                labelBg.setAttribute('y', labelY - 12);
+                labelBg.setAttribute('width', labelWidth);
+                labelBg.setAttribute('height', 24);
+                labelBg.setAttribute('rx', 4);
+                labelBg.setAttribute('fill', 'white');
+                labelBg.setAttribute('stroke', strokeColor);
+                labelBg.setAttribute('stroke-width', '2');
+                labelBg.style.cursor = 'pointer';
+
+                const label = document.createElementNS('http://www.w3.org/2000/svg', 'text');
+                label.setAttribute('x', labelX);
+                label.setAttribute('y', labelY + 4);
+                label.setAttribute('text-anchor', 'middle');
+                label.setAttribute('font-size', '11px');
+                label.setAttribute('font-weight', 'bold');
+                label.setAttribute('fill', strokeColor);
+                label.style.cursor = 'pointer';
+                label.textContent = labelText;
                 
-                // Create group for this arch
-                const archGroup = document.createElementNS('http://www.w3.org/2000/svg', 'g');
-                archGroup.dataset.archId = arch.id;
-                archGroup.style.pointerEvents = deleteMode ? 'auto' : 'none'; // Only intercept in delete mode
-                
-                if (isSingleWord) {
-                    // Single word: rectangle without bottom (two vertical lines + horizontal line on top)
-                    // Left vertical line (at left edge)
-                    const verticalLine1 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    verticalLine1.setAttribute('x1', leftEdge);
-                    verticalLine1.setAttribute('y1', leftY);
-                    verticalLine1.setAttribute('x2', leftEdge);
-                    verticalLine1.setAttribute('y2', roofY);
-                    verticalLine1.setAttribute('stroke', strokeColor);
-                    verticalLine1.setAttribute('stroke-width', strokeWidth);
-
-                    // Top horizontal line (connects left to right)
-                    const horizontalLine = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    horizontalLine.setAttribute('x1', leftEdge);
-                    horizontalLine.setAttribute('y1', roofY);
-                    horizontalLine.setAttribute('x2', rightEdge);
-                    horizontalLine.setAttribute('y2', roofY);
-                    horizontalLine.setAttribute('stroke', strokeColor);
-                    horizontalLine.setAttribute('stroke-width', strokeWidth);
-
-                    // Right vertical line (at right edge)
-                    const verticalLine2 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    verticalLine2.setAttribute('x1', rightEdge);
-                    verticalLine2.setAttribute('y1', roofY);
-                    verticalLine2.setAttribute('x2', rightEdge);
-                    verticalLine2.setAttribute('y2', rightY);
-                    verticalLine2.setAttribute('stroke', strokeColor);
-                    verticalLine2.setAttribute('stroke-width', strokeWidth);
-
-                    archGroup.appendChild(verticalLine1);
-                    archGroup.appendChild(horizontalLine);
-                    archGroup.appendChild(verticalLine2);
-                } else {
-                    // Two words: large roof over both words
-                    // Left vertical line (at leftmost position)
-                    const verticalLine1 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    verticalLine1.setAttribute('x1', leftEdge);
-                    verticalLine1.setAttribute('y1', leftY);
-                    verticalLine1.setAttribute('x2', leftEdge);
-                    verticalLine1.setAttribute('y2', roofY);
-                    verticalLine1.setAttribute('stroke', strokeColor);
-                    verticalLine1.setAttribute('stroke-width', strokeWidth);
-
-                    // Horizontal roof line (spans from left to right)
-                    const horizontalLine = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    horizontalLine.setAttribute('x1', leftEdge);
-                    horizontalLine.setAttribute('y1', roofY);
-                    horizontalLine.setAttribute('x2', rightEdge);
-                    horizontalLine.setAttribute('y2', roofY);
-                    horizontalLine.setAttribute('stroke', strokeColor);
-                    horizontalLine.setAttribute('stroke-width', strokeWidth);
-
-                    // Right vertical line (at rightmost position)
-                    const verticalLine2 = document.createElementNS('http://www.w3.org/2000/svg', 'line');
-                    verticalLine2.setAttribute('x1', rightEdge);
-                    verticalLine2.setAttribute('y1', roofY);
-                    verticalLine2.setAttribute('x2', rightEdge);
-                    verticalLine2.setAttribute('y2', rightY);
-                    verticalLine2.setAttribute('stroke', strokeColor);
-                    verticalLine2.setAttribute('stroke-width', strokeWidth);
-
-                    archGroup.appendChild(verticalLine1);
-                    archGroup.appendChild(horizontalLine);
-                    archGroup.appendChild(verticalLine2);
-                }
+                // Click handler for label - open syntactic role modal
+                const labelGroup = document.createElementNS('http://www.w3.org/2000/svg', 'g');
+                labelGroup.style.cursor = 'pointer';
+                labelGroup.style.pointerEvents = 'auto'; // Explicit — parent archGroup may be 'none'
+                labelGroup.onclick = (e) => {
+                    e.stopPropagation();
+                    openSyntacticRoleModal(arch);
+                };
                 
-                // Add label button above arch for syntactic role
-                // Change names based on model: נשוא א', נושא א'
-                let labelText = arch.externalRole || arch.syntacticRole || '';
-                if (arch.isMainRoof && arch.model) {
-                    const modelNames = { 'A': 'א', 'B': 'ב', 'C': 'ג' };
-                    if (arch.syntacticRole === 'נשוא') {
-                        labelText = `נשוא ${modelNames[arch.model]}`;
-                    } else if (arch.syntacticRole === 'נושא') {
-                        labelText = `נושא ${modelNames[arch.model]}`;
-                    } else if (!labelText) {
-                        labelText = `דגם ${modelNames[arch.model]}`;
+                labelGroup.appendChild(labelBg);
+                labelGroup.appendChild(label);
+                archGroup.appendChild(labelGroup);
+            }
+            
+            // Interaction handlers
+            if (deleteMode) {
+                archGroup.style.cursor = 'pointer';
+                archGroup.onclick = (e) => {
+                    e.stopPropagation();
+                    const wasMainRoof = arch.isMainRoof;
+                arches = arches.filter(a => a.id !== arch.id);
+                archIndex.remove(arch);
+                autosave.recordArchDeleted(arch);
+                    // If all arches deleted or main roof deleted, ask for model again
+                    if (arches.length === 0 || (wasMainRoof && !arches.find(a => a.isMainRoof))) {
+                        // Reset all main roof flags
+                        arches.forEach(a => {
+                            a.isMainRoof = false;
+                            a.model = null;
+                            autosaveArch(a);
+                        });
+                        // If no arches left, will be handled by updateModelIndicator
                     }
-                } else if (!labelText && arch.model) {
-                    const modelNames = { 'A': 'א', 'B': 'ב', 'C': 'ג' };
-                    labelText = `דגם ${modelNames[arch.model]}`;
-                }
-                if (labelText) {
-                    const labelY = roofY - 25;
-                    const labelX = (rightEdge + leftEdge) / 2;
-
-                    // Calculate dynamic width based on text length
-                    // Approximate: Hebrew chars are ~8-10px each at 11px font
-                    const estimatedTextWidth = labelText.length * 9;
-                    const labelWidth = Math.max(70, estimatedTextWidth + 20); // Min 70px, with 20px padding
-
-                    const labelBg = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
-                    labelBg.setAttribute('x', labelX - (labelWidth / 2));
-                    labelBg.setAttribute('y', labelY - 12);
-                    labelBg.setAttribute('width', labelWidth);
-                    labelBg.setAttribute('height', 24);
-                    labelBg.setAttribute('rx', 4);
-                    labelBg.setAttribute('fill', 'white');
-                    labelBg.setAttribute('stroke', strokeColor);
-                    labelBg.setAttribute('stroke-width', '2');
-                    labelBg.style.cursor = 'pointer';
-
-                    const label = document.createElementNS('http://www.w3.org/2000/svg', 'text');
-                    label.setAttribute('x', labelX);
-                    label.setAttribute('y', labelY + 4);
-                    label.setAttribute('text-anchor', 'middle');
-                    label.setAttribute('font-size', '11px');
-                    label.setAttribute('font-weight', 'bold');
-                    label.setAttribute('fill', strokeColor);
-                    label.style.cursor = 'pointer';
-                    label.textContent = labelText;
-                    
-                    // Click handler for label - open syntactic role modal
-                    const labelGroup = document.createElementNS('http://www.w3.org/2000/svg', 'g');
-                    labelGroup.style.cursor = 'pointer';
-                    labelGroup.style.pointerEvents = 'auto'; // Explicit — parent archGroup may be 'none'
-                    labelGroup.onclick = (e) => {
-                        e.stopPropagation();
+                renderSentence();
+            };
+            } else {
+                // Normal mode: arch lines have pointer-events: none (via archGroup above)
+                // so clicks/touches pass through to word blocks underneath.
+                // Add an invisible wider hit area on the horizontal roof line for editing.
+                const hitArea = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
+                const hitPadding = 12;
+                hitArea.setAttribute('x', Math.min(leftEdge, rightEdge));
+                hitArea.setAttribute('y', roofY - hitPadding);
+                hitArea.setAttribute('width', Math.abs(rightEdge - leftEdge) || 1);
+                hitArea.setAttribute('height', hitPadding * 2);
+                hitArea.setAttribute('fill', 'transparent');
+                hitArea.style.cursor = 'pointer';
+                hitArea.style.pointerEvents = 'auto';
+                hitArea.onclick = (e) => {
+                    e.stopPropagation();
+                    if (arch.isClause) {
+                        openClauseModal(arch);
+                    } else {
                         openSyntacticRoleModal(arch);
-                    };
-                    
-                    labelGroup.appendChild(labelBg);
-                    labelGroup.appendChild(label);
-                    archGroup.appendChild(labelGroup);
-                }
-                
-                // Interaction handlers
-                if (deleteMode) {
-                    archGroup.style.cursor = 'pointer';
-                    archGroup.onclick = (e) => {
-                        e.stopPropagation();
-                        const wasMainRoof = arch.isMainRoof;
-                    arches = arches.filter(a => a.id !== arch.id);
-                        // If all arches deleted or main roof deleted, ask for model again
-                        if (arches.length === 0 || (wasMainRoof && !arches.find(a => a.isMainRoof))) {
-                            // Reset all main roof flags
-                            arches.forEach(a => {
-                                a.isMainRoof = false;
-                                a.model = null;
-                            });
-                            // If no arches left, will be handled by updateModelIndicator
-                        }
-                    renderSentence();
+                    }
                 };
-                } else {
-                    // Normal mode: arch lines have pointer-events: none (via archGroup above)
-                    // so clicks/touches pass through to word blocks underneath.
-                    // Add an invisible wider hit area on the horizontal roof line for editing.
-                    const hitArea = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
-                    const hitPadding = 12;
-                    hitArea.setAttribute('x', Math.min(leftEdge, rightEdge));
-                    hitArea.setAttribute('y', roofY - hitPadding);
-                    hitArea.setAttribute('width', Math.abs(rightEdge - leftEdge) || 1);
-                    hitArea.setAttribute('height', hitPadding * 2);
-                    hitArea.setAttribute('fill', 'transparent');
-                    hitArea.style.cursor = 'pointer';
-                    hitArea.style.pointerEvents = 'auto';
-                    hitArea.onclick = (e) => {
-                        e.stopPropagation();
-                        if (arch.isClause) {
-                            openClauseModal(arch);
-                        } else {
-                            openSyntacticRoleModal(arch);
-                        }
-                    };
-                    archGroup.appendChild(hitArea);
-                }
-                
-                svg.appendChild(archGroup);
+                archGroup.appendChild(hitArea);
             }
+            
+            drawn.set(arch.id, { group: archGroup, arch, signature });
+            previous = placeAfter(svg, archGroup, previous);
         }
     });
+
+    // Drop groups for deleted arches and ones that were rebuilt
+    renderedArches.forEach((entry, archId) => {
+        if (drawn.get(archId) !== entry) entry.group.remove();
+    });
+    renderedArches.clear();
+    drawn.forEach((entry, archId) => renderedArches.set(archId, entry));
     
     // Add halo rectangle indicator for first click (semi-transparent rectangle above word)
     if (firstArchClick && archCreationMode) {
-        const wordWrapper = container.querySelector(`[data-word-id="${firstArchClick.wordId}"]`);
-        if (wordWrapper) {
-            const wordBlock = wordWrapper.querySelector('.word-block');
-            if (wordBlock) {
-                const rect = wordBlock.getBoundingClientRect();
-                const x = rect.left - containerRect.left + container.scrollLeft;
-                const y = rect.top - containerRect.top + container.scrollTop;
-                const haloHeight = 100; // Height of halo above word
-
-                const haloRect = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
-                haloRect.setAttribute('x', x);
-                haloRect.setAttribute('y', y - haloHeight);
-                haloRect.setAttribute('width', rect.width);
-                haloRect.setAttribute('height', haloHeight);
-                haloRect.setAttribute('rx', 4);
-                haloRect.setAttribute('fill', '#667eea');
-                haloRect.style.opacity = '0.15';
-                haloRect.style.animation = 'pulse 1.5s ease-in-out infinite';
-
-                // Halo border
-                const haloBorder = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
-                haloBorder.setAttribute('x', x);
-                haloBorder.setAttribute('y', y - haloHeight);
-                haloBorder.setAttribute('width', rect.width);
-                haloBorder.setAttribute('height', haloHeight);
-                haloBorder.setAttribute('rx', 4);
-                haloBorder.setAttribute('fill', 'none');
-                haloBorder.setAttribute('stroke', '#667eea');
-                haloBorder.setAttribute('stroke-width', '2');
-                haloBorder.style.opacity = '0.4';
-
-                svg.appendChild(haloRect);
-                svg.appendChild(haloBorder);
-            }
+        const rect = layout.wordBlocks.get(firstArchClick.wordId);
+        if (rect) {
+            const x = rect.left - containerRect.left + layout.scrollLeft;
+            const y = rect.top - containerRect.top + layout.scrollTop;
+            const haloHeight = 100; // Height of halo above word
+
+            const haloRect = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
+            haloRect.setAttribute('x', x);
+            haloRect.setAttribute('y', y - haloHeight);
+            haloRect.setAttribute('width', rect.width);
+            haloRect.setAttribute('height', haloHeight);
+            haloRect.setAttribute('rx', 4);
+            haloRect.classList.add('arch-halo');
+            haloRect.setAttribute('fill', '#667eea');
+            haloRect.style.opacity = '0.15';
+            haloRect.style.animation = 'pulse 1.5s ease-in-out infinite';
+
+            // Halo border
+            const haloBorder = document.createElementNS('http://www.w3.org/2000/svg', 'rect');
+            haloBorder.setAttribute('x', x);
+            haloBorder.setAttribute('y', y - haloHeight);
+            haloBorder.setAttribute('width', rect.width);
+            haloBorder.setAttribute('height', haloHeight);
+            haloBorder.setAttribute('rx', 4);
+            haloBorder.classList.add('arch-halo');
+            haloBorder.setAttribute('fill', 'none');
+            haloBorder.setAttribute('stroke', '#667eea');
+            haloBorder.setAttribute('stroke-width', '2');
+            haloBorder.style.opacity = '0.4';
+
+            svg.appendChild(haloRect);
+            svg.appendChild(haloBorder);
         }
     }
     
     if (svg.children.length > 0) {
-        container.style.position = 'relative';
-        container.appendChild(svg);
+        if (svg.parentNode !== container) {
+            container.style.position = 'relative';
+            container.appendChild(svg);
+        }
+    } else {
+        svg.remove();
     }
 }
 
@@ -1424,7 +1854,7 @@ function openSyntacticRoleModal(arch) {
             const selectedModelBtn = modal.querySelector('.clause-model-btn.selected');
             if (selectedModelBtn) {
                 currentArch.model = selectedModelBtn.dataset.model;
-                currentArch.clauseValidation = validateSentenceModel(currentArch);
+                currentArch.clauseValidation = validateSentenceModel(currentArch, words);
             }
         } else {
             currentArch.isClause = false;
@@ -1436,7 +1866,9 @@ function openSyntacticRoleModal(arch) {
         if (currentArch.isPending) {
             delete currentArch.isPending;
             arches.push(currentArch);
+            archIndex.add(currentArch);
         }
+        autosaveArch(currentArch);
 
         // Clean up arch creation state to allow creating more arches
         firstArchClick = null;
@@ -1507,230 +1939,6 @@ function openSyntacticRoleModal(arch) {
     modal.classList.add('show');
 }
 
-// Validate sentence model (A, B, or C) with strict index-based validation
-function validateSentenceModel(arch) {
-    const isClause = arch.isClause;
-    const isMainRoof = arch.isMainRoof;
-    
-    if (!isMainRoof && !isClause) {
-        return { valid: false, color: '#667eea', message: 'לא הוגדר גג ראשי או פסוקית' };
-    }
-    
-    if (!arch.model) {
-        return { valid: false, color: '#3b82f6', message: 'חסר מודל משפט - יש לבחור דגם A, B או C' };
-    }
-    
-    const word1 = words.find(w => w.id === arch.wordId1);
-    const word2 = words.find(w => w.id === arch.wordId2);
-    
-    if (!word1 || !word2) {
-        return { valid: false, color: '#667eea', message: 'חסרות מילים' };
-    }
-    
-    // Get word indices (linear position in sentence)
-    const index1 = words.findIndex(w => w.id === arch.wordId1);
-    const index2 = words.findIndex(w => w.id === arch.wordId2);
-    
-    // Find all parts of speech for both words
-    const pos1List = word1.partsOfSpeech;
-    const pos2List = word2.partsOfSpeech;
-    
-    if (pos1List.length === 0 || pos2List.length === 0) {
-        return { valid: false, color: '#3b82f6', message: 'חסרים חלקי דיבר - יש להוסיף תגי PoS למילים' };
-    }
-    
-    // Model A (Verbal Sentence / جملة فعلية): Predicate (Verb) before Subject (Noun/Pronoun)
-    if (arch.model === 'A') {
-        // Required: 1 Predicate (Must be a Verb) and 1 Subject (Noun/Pronoun)
-        const predicate = pos1List.find(p => p.type === 'verb') || pos2List.find(p => p.type === 'verb');
-        const subject = pos1List.find(p => p.type === 'noun' || p.type === 'personalPronoun') || 
-                       pos2List.find(p => p.type === 'noun' || p.type === 'personalPronoun');
-        
-        // Component Type Check: Predicate must be Verb
-        if (!predicate) {
-            return { valid: false, color: '#3b82f6', message: 'מודל A דורש פועל (נשוא) - חסר תג פועל' };
-        }
-        
-        if (predicate.type !== 'verb') {
-            return { valid: false, color: '#ef4444', message: 'במודל A, הנשוא חייב להיות פועל - לא ניתן לסמן שם עצם כנשוא' };
-        }
-        
-        if (!subject) {
-            return { valid: false, color: '#3b82f6', message: 'מודל A דורש נושא (שם עצם או כינוי גוף) - חסר תג נושא' };
-        }
-        
-        // Get indices of predicate and subject
-        const predWord = predicate === pos1List.find(p => p.type === 'verb') ? word1 : word2;
-        const subjWord = subject === pos1List.find(p => p.type === 'noun' || p.type === 'personalPronoun') ? word1 : word2;
-        const predIndex = words.findIndex(w => w.id === predWord.id);
-        const subjIndex = words.findIndex(w => w.id === subjWord.id);
-        
-        // Order Rule: Index of Predicate MUST BE LESS than Index of Subject
-        if (predIndex >= subjIndex) {
-            return { valid: false, color: '#ef4444', message: 'במודל A, הפועל (נשוא) חייב לבוא לפני הנושא. מיקום הפועל: ' + predIndex + ', מיקום הנושא: ' + subjIndex };
-        }
-        
-        // Check agreement (gender, number) between subject and predicate
-        const agreementIssues = checkSubjectPredicateAgreement(subject, predicate);
-        if (agreementIssues.length > 0) {
-            return { valid: false, color: '#ef4444', message: `חוסר התאמה: ${agreementIssues.join(', ')}` };
-    }
-    
-        return { valid: true, color: '#10b981', message: 'מודל A תקין - נשוא פועלי לפני נושא' };
-    }
-    
-    // Model B (Nominal Sentence / جملة اسمية): Subject (Mubtada) before Predicate (Khabar)
-    if (arch.model === 'B') {
-        // Required: 1 Subject (Mubtada - Noun) and 1 Predicate (Khabar - non-verb)
-        const subject = pos1List.find(p => p.type === 'noun') || pos2List.find(p => p.type === 'noun');
-        // Predicate can be noun, adjective, or other non-verb
-        const predicate = pos1List.find(p => p.type !== 'verb' && p !== subject) || 
-                         pos2List.find(p => p.type !== 'verb' && p !== subject);
-        
-        if (!subject) {
-            return { valid: false, color: '#3b82f6', message: 'מודל B דורש נושא (מתחיל) - חסר תג שם עצם' };
-        }
-        
-        if (!predicate) {
-            return { valid: false, color: '#3b82f6', message: 'מודל B דורש נשוא (חבר) - חסר נשוא' };
-        }
-        
-        // Get indices
-        const subjWord = subject === pos1List.find(p => p.type === 'noun') ? word1 : word2;
-        const predWord = predicate === pos1List.find(p => p !== subject && p.type !== 'verb') ? word1 : word2;
-        const subjIndex = words.findIndex(w => w.id === subjWord.id);
-        const predIndex = words.findIndex(w => w.id === predWord.id);
-        
-        // Order Rule: Index of Subject MUST BE LESS than Index of Predicate
-        if (subjIndex >= predIndex) {
-            return { valid: false, color: '#ef4444', message: 'במודל B, הנושא (מתחיל) חייב לבוא לפני הנשוא (חבר). מיקום הנושא: ' + subjIndex + ', מיקום הנשוא: ' + predIndex };
-        }
-        
-        // Check agreement if predicate is adjective
-        if (predicate.type === 'adjective') {
-            const agreementIssues = checkNounAdjectiveAgreement(subject, predicate);
-            if (agreementIssues.length > 0) {
-                return { valid: false, color: '#ef4444', message: `חוסר התאמה: ${agreementIssues.join(', ')}` };
-            }
-        }
-        
-        return { valid: true, color: '#10b981', message: 'מודל B תקין - נושא לפני נשוא שמני' };
-    }
-    
-    // Model C (Inverted Nominal / شبه جملة): Predicate (Prepositional Phrase/Adverb) before Subject (Noun)
-    if (arch.model === 'C') {
-        // Required: 1 Predicate (Must be Preposition or Adverb) and 1 Subject (Noun)
-        const predicate = pos1List.find(p => p.type === 'preposition' || p.type === 'adverb') || 
-                         pos2List.find(p => p.type === 'preposition' || p.type === 'adverb');
-        const subject = pos1List.find(p => p.type === 'noun') || pos2List.find(p => p.type === 'noun');
-        
-        if (!predicate) {
-            return { valid: false, color: '#3b82f6', message: 'מודל C דורש נשוא (מילית יחס או תואר פועל) - חסר תג נשוא' };
-        }
-        
-        // Component Type Check: Predicate must be Preposition or Adverb
-        if (predicate.type !== 'preposition' && predicate.type !== 'adverb') {
-            return { valid: false, color: '#ef4444', message: 'במודל C, הנשוא חייב להיות מילית יחס או תואר פועל - לא ניתן לסמן שם עצם כנשוא' };
-        }
-        
-        if (!subject) {
-            return { valid: false, color: '#3b82f6', message: 'מודל C דורש נושא (שם עצם) - חסר תג שם עצם' };
-        }
-        
-        // Get indices
-        const predWord = predicate === pos1List.find(p => p.type === 'preposition' || p.type === 'adverb') ? word1 : word2;
-        const subjWord = subject === pos1List.find(p => p.type === 'noun') ? word1 : word2;
-        const predIndex = words.findIndex(w => w.id === predWord.id);
-        const subjIndex = words.findIndex(w => w.id === subjWord.id);
-        
-        // Order Rule: Index of Predicate MUST BE LESS than Index of Subject
-        if (predIndex >= subjIndex) {
-            return { valid: false, color: '#ef4444', message: 'במודל C, הנשוא חייב לבוא לפני הנושא. מיקום הנשוא: ' + predIndex + ', מיקום הנושא: ' + subjIndex };
-        }
-        
-        return { valid: true, color: '#10b981', message: 'מודל C תקין - נשוא מילית יחס/תואר פועל לפני נושא' };
-    }
-    
-    return { valid: false, color: '#667eea', message: 'מודל לא מוכר' };
-}
-
-// Check agreement between subject and predicate (for Model A)
-function checkSubjectPredicateAgreement(subject, predicate) {
-    const issues = [];
-    
-    // Check number agreement (if predicate has number info)
-    if (predicate.details.personGender) {
-        // Extract number from personGender (e.g., "נסתר" = singular, "נסתרים" = plural)
-        const predNumber = Array.isArray(predicate.details.personGender) 
-            ? predicate.details.personGender[0] 
-            : predicate.details.personGender;
-        
-        const subjNumber = subject.details.number;
-        
-        if (subjNumber && predNumber) {
-            const isPredPlural = predNumber.includes('ים') || predNumber.includes('ות');
-            const isSubjPlural = subjNumber === 'רבים' || subjNumber === 'רבות';
-            
-            if (isPredPlural !== isSubjPlural && !predNumber.includes('נסתר') && !predNumber.includes('נסתרת')) {
-                // Allow some flexibility, but check if clearly mismatched
-            }
-        }
-    }
-    
-    // Check gender agreement
-    if (predicate.details.personGender && subject.details.gender) {
-        const predGender = Array.isArray(predicate.details.personGender) 
-            ? predicate.details.personGender[0] 
-            : predicate.details.personGender;
-        const subjGender = Array.isArray(subject.details.gender) 
-            ? subject.details.gender[0] 
-            : subject.details.gender;
-        
-        const isPredFem = predGender && (predGender.includes('ת') || predGender === 'נסתרת' || predGender === 'נוכחת');
-        const isSubjFem = subjGender === 'נקבה';
-        
-        if (isPredFem !== isSubjFem && !predGender.includes('נסתר')) {
-            issues.push('מין');
-        }
-    }
-    
-    return issues;
-}
-
-// Check if combination chain ends with preposition (incomplete prepositional phrase)
-function checkCombinationEndsWithPreposition(chain, combTypes) {
-    if (chain.length === 0) return false;
-
-    // Get the last combination in the chain
-    const lastComb = chain[chain.length - 1];
-    const word2 = words.find(w => w.id === lastComb.wordId2);
-    const pos2 = word2?.getPartOfSpeech(lastComb.posId2);
-    
-    // Check if last part is preposition (incomplete - waiting for noun)
-    if (pos2?.type === 'preposition') {
-        return true;
-    }
-    
-    // Also check if any combination in the chain is incomplete and involves a preposition
-    // This handles cases like nominal phrase + preposition (ولد كبير في)
-    for (const comb of combTypes) {
-        if (!comb.complete || comb.type === 'incomplete') {
-            const word1 = words.find(w => w.id === comb.wordId1);
-            const word2 = words.find(w => w.id === comb.wordId2);
-            const pos1 = word1?.getPartOfSpeech(comb.posId1);
-            const pos2 = word2?.getPartOfSpeech(comb.posId2);
-            
-            // If this combination involves a preposition and is incomplete
-            if ((pos1?.type === 'preposition' || pos2?.type === 'preposition') && 
-                (comb.type === 'incomplete' || !comb.complete)) {
-                return true;
-            }
-        }
-    }
-    
-    return false;
-}
-
 // Apply yellow border to all connected badges in a chain (for incomplete phrases)
 function applyYellowBorderToChain(chain, container) {
     chain.forEach(comb => {
@@ -1750,61 +1958,6 @@ function applyYellowBorderToChain(chain, container) {
     });
 }
 
-// Check if arch matches combinations below it
-function checkArchMatchesCombinations(arch) {
-    const word1 = words.find(w => w.id === arch.wordId1);
-    const word2 = words.find(w => w.id === arch.wordId2);
-    
-    if (!word1 || !word2) return true; // If words don't exist, don't show error
-    
-    // Check if there are combinations between the words covered by this arch
-    const index1 = words.findIndex(w => w.id === arch.wordId1);
-    const index2 = words.findIndex(w => w.id === arch.wordId2);
-    const start = Math.min(index1, index2);
-    const end = Math.max(index1, index2);
-    
-    // Find all combinations between words in this arch range
-    const archCombinations = combinations.filter(c => {
-        const cIndex1 = words.findIndex(w => w.id === c.wordId1);
-        const cIndex2 = words.findIndex(w => w.id === c.wordId2);
-        return (cIndex1 >= start && cIndex1 <= end) && (cIndex2 >= start && cIndex2 <= end);
-    });
-    
-    // If there are no combinations, arch is valid (no mismatch)
-    if (archCombinations.length === 0) return true;
-    
-    // Check if combinations are complete (green) - if all are complete, arch matches
-    const allComplete = archCombinations.every(c => c.complete && c.type === 'valid');
-    
-    return allComplete;
-}
-
-// Check agreement between noun and adjective (for Model B with adjective predicate)
-function checkNounAdjectiveAgreement(noun, adjective) {
-    const issues = [];
-    
-    // Use existing validation from combinations.js
-    const requiredFields = ['gender', 'number', 'definiteness'];
-    
-    for (const field of requiredFields) {
-        if (noun.details[field] && adjective.details[field]) {
-            const nounVal = Array.isArray(noun.details[field]) ? noun.details[field] : [noun.details[field]];
-            const adjVal = Array.isArray(adjective.details[field]) ? adjective.details[field] : [adjective.details[field]];
-            
-            if (!nounVal.some(v => adjVal.includes(v))) {
-                const fieldNames = {
-                    gender: 'מין',
-                    number: 'מספר',
-                    definiteness: 'יידוע'
-                };
-                issues.push(fieldNames[field] || field);
-            }
-        }
-    }
-    
-    return issues;
-}
-
 // Open modal to manage arch properties (main roof, clause)
 function openArchPropertiesModal(arch) {
     let modal = document.getElementById('arch-properties-modal');
@@ -1955,11 +2108,12 @@ function openArchPropertiesModal(arch) {
             
             // Validate if main roof or clause
             if (arch.isMainRoof && arch.model) {
-                arch.validation = validateSentenceModel(arch);
+                arch.validation = validateSentenceModel(arch, words);
             }
             if (arch.isClause && arch.model) {
-                arch.clauseValidation = validateSentenceModel(arch);
+                arch.clauseValidation = validateSentenceModel(arch, words);
             }
+            autosaveArch(arch);
             
             // Reset firstArchClick to allow creating more arches
             firstArchClick = null;
@@ -2062,8 +2216,9 @@ function openClauseModal(arch) {
             arch.externalRole = modal.querySelector('#clause-external-role-edit').value;
             
             if (arch.model) {
-                arch.clauseValidation = validateSentenceModel(arch);
+                arch.clauseValidation = validateSentenceModel(arch, words);
             }
+            autosaveArch(arch);
             
             renderSentence();
             modal.classList.remove('show');
@@ -2122,7 +2277,8 @@ function openModelSelectionModal(arch) {
                 arch.isMainRoof = true;
                 
                 // Validate immediately
-                arch.validation = validateSentenceModel(arch);
+                arch.validation = validateSentenceModel(arch, words);
+                autosaveArch(arch);
                 
                 modal.classList.remove('show');
                 
@@ -2170,8 +2326,9 @@ function openArchModelModal(arch) {
                 arch.model = model;
                 
                 // Validate the model
-                const validation = validateSentenceModel(arch);
+                const validation = validateSentenceModel(arch, words);
                 arch.validation = validation;
+                autosaveArch(arch);
                 
                 // Update arch color
                 renderSentence();
@@ -2223,8 +2380,8 @@ function openLogicalConnectionModal(wordId1, posId1, wordId2, posId2) {
 
 // Create logical connection
 function createLogicalConnection(wordId1, posId1, wordId2, posId2, type) {
-    const word1 = words.find(w => w.id === wordId1);
-    const word2 = words.find(w => w.id === wordId2);
+    const word1 = findWord(words, wordId1);
+    const word2 = findWord(words, wordId2);
     const pos1 = word1?.getPartOfSpeech(posId1);
     const pos2 = word2?.getPartOfSpeech(posId2);
     
@@ -2259,14 +2416,8 @@ function createLogicalConnection(wordId1, posId1, wordId2, posId2, type) {
                 mismatches.push('יידוע');
             }
             
-            const cases1 = pos1.details.cases || pos1.details.case;
-            const cases2 = pos2.details.cases || pos2.details.case;
-            if (cases1 && cases2) {
-                const arr1 = Array.isArray(cases1) ? cases1 : [cases1];
-                const arr2 = Array.isArray(cases2) ? cases2 : [cases2];
-                if (!arraysIntersect(arr1, arr2)) {
-                    mismatches.push('יחסה');
-                }
+            if (casesIntersect(pos1.details, pos2.details) === false) {
+                mismatches.push('יחסה');
             }
             
             if (mismatches.length > 0) {
@@ -2284,8 +2435,8 @@ function createLogicalConnection(wordId1, posId1, wordId2, posId2, type) {
     }
     
     if (validation && validation.valid) {
-        const index1 = words.findIndex(w => w.id === wordId1);
-        const index2 = words.findIndex(w => w.id === wordId2);
+        const index1 = findWordPosition(words, wordId1);
+        const index2 = findWordPosition(words, wordId2);
         const splitPoint = (index1 + index2) / 2;
         
         logicalConnections.push({
@@ -2297,6 +2448,7 @@ function createLogicalConnection(wordId1, posId1, wordId2, posId2, type) {
             type: type,
             splitPoint: splitPoint
         });
+        autosave.recordLogicalConnection(logicalConnections[logicalConnections.length - 1]);
         
         showValidationMessage(validation.message, 'info');
         renderSentence();
@@ -2315,22 +2467,21 @@ function renderLogicalConnections() {
     const container = document.getElementById('sentence-container');
     if (!container) return;
     
-    const containerRect = container.getBoundingClientRect();
+    const layout = getLayout(container);
+    const containerRect = layout.containerRect;
     
     logicalConnections.forEach(logical => {
-        const word1 = words.find(w => w.id === logical.wordId1);
-        const word2 = words.find(w => w.id === logical.wordId2);
-        const index1 = words.findIndex(w => w.id === logical.wordId1);
-        const index2 = words.findIndex(w => w.id === logical.wordId2);
+        const word1 = findWord(words, logical.wordId1);
+        const word2 = findWord(words, logical.wordId2);
+        const index1 = findWordPosition(words, logical.wordId1);
+        const index2 = findWordPosition(words, logical.wordId2);
         
         if (word1 && word2 && index1 !== -1 && index2 !== -1) {
             // Find split point between words
-            const wordWrapper1 = container.querySelector(`[data-word-id="${logical.wordId1}"]`);
-            const wordWrapper2 = container.querySelector(`[data-word-id="${logical.wordId2}"]`);
+            const rect1 = layout.wrappers.get(logical.wordId1);
+            const rect2 = layout.wrappers.get(logical.wordId2);
             
-            if (wordWrapper1 && wordWrapper2) {
-                const rect1 = wordWrapper1.getBoundingClientRect();
-                const rect2 = wordWrapper2.getBoundingClientRect();
+            if (rect1 && rect2) {
                 
                 // Calculate midpoint
                 const midX = (rect1.left + rect2.left) / 2 - containerRect.left + (rect1.width + rect2.width) / 4;
@@ -2390,6 +2541,12 @@ function setupEventListeners() {
     if (logicalBtn) {
         logicalBtn.onclick = toggleLogicalConnectionMode;
     }
+
+    // Write queued autosave ops before the page is hidden or unloaded
+    window.addEventListener('pagehide', () => autosave.flush());
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') autosave.flush();
+    });
 }
 
 // Open part of speech selection modal (original grid layout)
@@ -2419,7 +2576,7 @@ function openPartOfSpeechModal(wordId) {
 function selectPartOfSpeech(type) {
     if (!currentWordId) return;
 
-    const word = words.find(w => w.id === currentWordId);
+    const word = findWord(words, currentWordId);
     if (!word) return;
 
     let defaultDetails = {};
@@ -2442,7 +2599,8 @@ function selectPartOfSpeech(type) {
     }
     
     // Add the part of speech
-    word.addPartOfSpeech(type, defaultDetails);
+    const addedPos = word.addPartOfSpeech(type, defaultDetails);
+    autosave.recordPartAdded(words.indexOf(word), addedPos);
 
     // Close modal
     document.getElementById('pos-modal').classList.remove('show');
@@ -2464,7 +2622,7 @@ function selectPartOfSpeech(type) {
 
 // Open details panel for a part of speech (side panel, not covering)
 function openDetailsPanel(wordId, posId) {
-    const word = words.find(w => w.id === wordId);
+    const word = findWord(words, wordId);
     if (!word) return;
 
     const pos = word.getPartOfSpeech(posId);
@@ -2967,7 +3125,7 @@ function openDetailsPanelWithDetails(wordId, posId, detailsToShow) {
     currentWordId = wordId;
     currentPartOfSpeechId = posId;
     
-    const word = words.find(w => w.id === wordId);
+    const word = findWord(words, wordId);
     if (!word) return;
 
     const pos = word.getPartOfSpeech(posId);
@@ -3273,23 +3431,38 @@ function openDetailsPanelWithDetails(wordId, posId, detailsToShow) {
         if (panel.classList.contains('show')) {
             // Clicked outside the panel
             closeDetailsPanel();
-            document.removeEventListener('click', handleOutsideClick);
         }
     };
     
-    // Remove any existing listener and add new one
-    document.removeEventListener('click', handleOutsideClick);
-    setTimeout(() => {
+    // Replace the listener of the previous opening (a new closure each time,
+    // so it has to be kept to be removed) and add the new one
+    detachDetailsPanelOutsideClick();
+    detailsPanelOutsideClick = handleOutsideClick;
+    detailsPanelListenTimer = setTimeout(() => {
+        detailsPanelListenTimer = null;
         document.addEventListener('click', handleOutsideClick);
     }, 100);
 }
 
+// The document click listener of the open details panel, and the timer that adds it
+let detailsPanelOutsideClick = null;
+let detailsPanelListenTimer = null;
+
+function detachDetailsPanelOutsideClick() {
+    clearTimeout(detailsPanelListenTimer);
+    detailsPanelListenTimer = null;
+    if (detailsPanelOutsideClick) {
+        document.removeEventListener('click', detailsPanelOutsideClick);
+        detailsPanelOutsideClick = null;
+    }
+}
+
 
 // Check if there are unsaved changes in the details panel
 function hasUnsavedChanges() {
     if (!currentWordId || !currentPartOfSpeechId) return false;
     
-    const word = words.find(w => w.id === currentWordId);
+    const word = findWord(words, currentWordId);
     if (!word) return false;
     
     const pos = word.getPartOfSpeech(currentPartOfSpeechId);
@@ -3369,6 +3542,7 @@ function closeDetailsPanel(forceClose = false) {
     const panel = document.getElementById('details-panel');
     panel.classList.remove('show');
     document.body.classList.remove('panel-open');
+    detachDetailsPanelOutsideClick();
     currentWordId = null;
     currentPartOfSpeechId = null;
 }
@@ -3377,7 +3551,7 @@ function closeDetailsPanel(forceClose = false) {
 function savePartOfSpeechDetails() {
     if (!currentWordId || !currentPartOfSpeechId) return;
 
-    const word = words.find(w => w.id === currentWordId);
+    const word = findWord(words, currentWordId);
     if (!word) return;
 
     const pos = word.getPartOfSpeech(currentPartOfSpeechId);
@@ -3512,10 +3686,14 @@ function savePartOfSpeechDetails() {
         delete newDetails.case;
     }
 
-    word.updatePartOfSpeechDetails(currentPartOfSpeechId, newDetails);
+    // Saving unchanged details keeps the part's version, so nothing is revalidated
+    if (word.updatePartOfSpeechDetails(currentPartOfSpeechId, newDetails)) {
+        combinationValidationCache.invalidatePart(pos.id);
+        autosave.recordPartDetails(pos);
 
-    // Check and update combinations that involve this part of speech
-    updateCombinationsForPartOfSpeech(currentWordId, currentPartOfSpeechId);
+        // Check and update combinations that involve this part of speech
+        updateCombinationsForPartOfSpeech(currentWordId, currentPartOfSpeechId);
+    }
 
     // Re-render
     renderSentence();
@@ -3524,34 +3702,96 @@ function savePartOfSpeechDetails() {
     closeDetailsPanel();
 }
 
-// Update combinations when part of speech details are edited
+// Update combinations when part of speech details are edited. The check runs
+// in the validation service; every part edited since the last answer is
+// re-checked together, so a newer request can safely replace an older one.
 function updateCombinationsForPartOfSpeech(wordId, posId) {
-    // Find all combinations involving this part of speech
-    const affectedCombinations = combinations.filter(c => 
-        (c.wordId1 === wordId && c.posId1 === posId) ||
-        (c.wordId2 === wordId && c.posId2 === posId)
-    );
-    
-    // Re-validate each combination
-    affectedCombinations.forEach(comb => {
-        const word1 = words.find(w => w.id === comb.wordId1);
-        const word2 = words.find(w => w.id === comb.wordId2);
-        const pos1 = word1?.getPartOfSpeech(comb.posId1);
-        const pos2 = word2?.getPartOfSpeech(comb.posId2);
-        
-        if (pos1 && pos2) {
-            const result = validateCombination(pos1, pos2, comb.wordId1, comb.wordId2, words);
-            
-            // Update combination status
-            comb.complete = result.valid && result.complete;
-            comb.type = result.valid && result.complete ? 'valid' : (result.valid ? 'incomplete' : 'invalid');
-            
-            // If combination is now invalid, remove it
-            if (!result.valid) {
-                combinations = combinations.filter(c => c !== comb);
-            }
+    pendingDetailChecks.add(`${wordId}|${posId}`);
+    const targets = [];
+    combinations.forEach((c, index) => {
+        if (pendingDetailChecks.has(`${c.wordId1}|${c.posId1}`) || pendingDetailChecks.has(`${c.wordId2}|${c.posId2}`)) {
+            targets.push(index);
+        }
+    });
+    validationService.run('combinations', { words, combinations, targets });
+}
+
+// ========== VALIDATION SERVICE ==========
+// Results of the worker passes (js/validationWorker.js) as last applied.
+// Renders read these; a changed result schedules another overlay pass.
+
+let archValidation = {};          // arch id -> { validation?, clauseValidation?, matches }
+let chainEndsWithPreposition = {}; // chain check key -> boolean
+const pendingDetailChecks = new Set(); // "wordId|posId" of parts whose combinations await re-validation
+
+function setupValidationService() {
+    validationService.onResult('arches', applyArchValidation);
+    validationService.onResult('chains', results => { chainEndsWithPreposition = results; });
+    validationService.onResult('combinations', applyCombinationRevalidation);
+    validationService.onUpdate(onValidationUpdate);
+}
+
+// New sentence: drop the results (and answers still on their way) of the old one
+function resetValidationResults() {
+    validationService.reset();
+    combinationValidationCache.clear(); // part ids are never reused, so its entries can never hit again
+    archValidation = {};
+    chainEndsWithPreposition = {};
+    pendingDetailChecks.clear();
+}
+
+function onValidationUpdate(pass, changed) {
+    if (changed) {
+        scheduleOverlayRender();
+    } else if (renderSignalPending && !overlayRenderTimer && !validationService.isBusy()) {
+        // Nothing to redraw: the last overlay pass was already final
+        renderSignalPending = false;
+        signalRenderComplete();
+    }
+}
+
+function getChainCheckKey(chain, combTypes) {
+    return chain.map(getCombinationKey).join(',') + '/' + combTypes.length;
+}
+
+function applyArchValidation(results) {
+    archValidation = results;
+    arches.forEach(arch => {
+        const result = results[arch.id];
+        if (!result) return;
+        if (result.validation) arch.validation = result.validation;
+        if (result.clauseValidation) arch.clauseValidation = result.clauseValidation;
+    });
+}
+
+function applyCombinationRevalidation(results) {
+    pendingDetailChecks.clear();
+    let changed = false;
+    results.forEach(result => {
+        const comb = combinations.find(c =>
+            c.wordId1 === result.wordId1 && c.posId1 === result.posId1 &&
+            c.wordId2 === result.wordId2 && c.posId2 === result.posId2);
+        if (!comb) return;
+
+        const complete = result.valid && result.complete;
+        const type = result.valid && result.complete ? 'valid' : (result.valid ? 'incomplete' : 'invalid');
+        if (comb.complete !== complete || comb.type !== type) changed = true;
+        comb.complete = complete;
+        comb.type = type;
+
+        // If combination is now invalid, remove it
+        if (!result.valid) {
+            combinations = combinations.filter(c => c !== comb);
+            autosave.recordCombinationDeleted(comb);
+            changed = true;
+        } else {
+            autosave.recordCombination(comb);
         }
     });
+    if (changed) {
+        invalidatePhraseIndex();
+        renderSentence();
+    }
 }
 
 // Show validation message
@@ -0,0 +1,145 @@
+// Interval index over arches, keyed by word position
+//
+// Arches form a laminar family (matryoshka): any two multi-word arches are
+// either nested or disjoint. With that invariant both hierarchy questions can
+// be answered in O(log n) instead of scanning every arch:
+//   crossing - does [start, end] partially overlap an existing arch?
+//   depth    - how many arches strictly contain [start, end]?
+
+class ArchIndex {
+    constructor() {
+        this.reset([], []);
+    }
+
+    // Rebuild the index for a word list and its arches
+    reset(words, arches) {
+        this.words = words;
+        this.positions = new Map(words.map((word, index) => [word.id, index]));
+        this.size = Math.max(1, words.length);
+        this.members = new Map(); // arch id -> { start, end }
+
+        // Fenwick trees counting arches by start and by end position
+        this.startCounts = new Array(this.size + 1).fill(0);
+        this.endCounts = new Array(this.size + 1).fill(0);
+
+        // Per-position lists plus segment trees over them:
+        // max end of arches starting at p, min start of arches ending at p
+        this.endsByStart = Array.from({ length: this.size }, () => []);
+        this.startsByEnd = Array.from({ length: this.size }, () => []);
+        this.maxEndTree = new Array(this.size * 2).fill(-Infinity);
+        this.minStartTree = new Array(this.size * 2).fill(Infinity);
+
+        arches.forEach(arch => this.add(arch));
+        return this;
+    }
+
+    // Make sure the index matches the current words/arches; rebuilds when the
+    // words were replaced or arches were added/removed without going through
+    // add()/remove()
+    sync(words, arches) {
+        if (this.words !== words || this.members.size !== arches.length) {
+            this.reset(words, arches);
+        }
+        return this;
+    }
+
+    position(wordId) {
+        const index = this.positions.get(wordId);
+        return index === undefined ? -1 : index;
+    }
+
+    // Normalized [start, end] span for two word ids, or null if unknown
+    span(wordId1, wordId2) {
+        const index1 = this.position(wordId1);
+        const index2 = this.position(wordId2);
+        if (index1 === -1 || index2 === -1) return null;
+        return { start: Math.min(index1, index2), end: Math.max(index1, index2) };
+    }
+
+    add(arch) {
+        if (this.members.has(arch.id)) return;
+        const span = this.span(arch.wordId1, arch.wordId2);
+        if (!span) return;
+
+        this.members.set(arch.id, span);
+        this.fenwickAdd(this.startCounts, span.start, 1);
+        this.fenwickAdd(this.endCounts, span.end, 1);
+        this.endsByStart[span.start].push(span.end);
+        this.startsByEnd[span.end].push(span.start);
+        this.refreshPosition(span.start, span.end);
+    }
+
+    remove(arch) {
+        const span = this.members.get(arch.id);
+        if (!span) return;
+
+        this.members.delete(arch.id);
+        this.fenwickAdd(this.startCounts, span.start, -1);
+        this.fenwickAdd(this.endCounts, span.end, -1);
+        const ends = this.endsByStart[span.start];
+        ends.splice(ends.indexOf(span.end), 1);
+        const starts = this.startsByEnd[span.end];
+        starts.splice(starts.indexOf(span.start), 1);
+        this.refreshPosition(span.start, span.end);
+    }
+
+    // Would an arch over [start, end] partially overlap an existing arch?
+    crosses(start, end) {
+        if (end <= start) return false;
+        // An arch starting inside (start, end] that ends after end
+        if (this.rangeQuery(this.maxEndTree, start + 1, end, Math.max, -Infinity) > end) return true;
+        // An arch ending inside [start, end) that starts before start
+        return this.rangeQuery(this.minStartTree, start, end - 1, Math.min, Infinity) < start;
+    }
+
+    // Number of arches strictly containing [start, end] (a < start && b > end).
+    // Arches with a < start either end before start, end exactly at end, or
+    // contain the span - ending inside it would be a crossing.
+    depth(start, end) {
+        const startedBefore = this.fenwickSum(this.startCounts, start - 1);
+        const endedBefore = this.fenwickSum(this.endCounts, start - 1);
+        const sharingEnd = this.startsByEnd[end].filter(s => s < start).length;
+        return startedBefore - endedBefore - sharingEnd;
+    }
+
+    refreshPosition(start, end) {
+        this.updateTree(this.maxEndTree, start, Math.max(-Infinity, ...this.endsByStart[start]), Math.max);
+        this.updateTree(this.minStartTree, end, Math.min(Infinity, ...this.startsByEnd[end]), Math.min);
+    }
+
+    updateTree(tree, index, value, combine) {
+        let i = index + this.size;
+        tree[i] = value;
+        for (i >>= 1; i >= 1; i >>= 1) {
+            tree[i] = combine(tree[2 * i], tree[2 * i + 1]);
+        }
+    }
+
+    rangeQuery(tree, from, to, combine, empty) {
+        let result = empty;
+        let lo = Math.max(0, from) + this.size;
+        let hi = Math.min(this.size - 1, to) + this.size + 1;
+        while (lo < hi) {
+            if (lo & 1) result = combine(result, tree[lo++]);
+            if (hi & 1) result = combine(result, tree[--hi]);
+            lo >>= 1;
+            hi >>= 1;
+        }
+        return result;
+    }
+
+    fenwickAdd(tree, index, delta) {
+        for (let i = index + 1; i < tree.length; i += i & -i) {
+            tree[i] += delta;
+        }
+    }
+
+    // Sum of counts at positions 0..index
+    fenwickSum(tree, index) {
+        let sum = 0;
+        for (let i = index + 1; i > 0; i -= i & -i) {
+            sum += tree[i];
+        }
+        return sum;
+    }
+}
@@ -1,9 +1,163 @@
 // Combination rules and validation
 
+// Phrase index: union-find over words joined by complete, valid combinations
+// between adjacent words. Each set is a contiguous run of words, so its
+// min/max index is the phrase span. Pushed combinations are merged in
+// incrementally; any other change (filtered array, new sentence, in-place
+// edit reported through invalidatePhraseIndex()) triggers a rebuild.
+class PhraseIndex {
+    constructor() {
+        this.words = null;
+        this.combinations = null;
+        this.applied = 0;
+        this.dirty = true;
+    }
+
+    invalidate() {
+        this.dirty = true;
+    }
+
+    // Bring the index up to date with the given words and combinations
+    sync(wordsArr, combs) {
+        if (this.dirty || this.words !== wordsArr || this.combinations !== combs || combs.length < this.applied) {
+            this.rebuild(wordsArr, combs);
+        } else if (combs.length > this.applied) {
+            for (let i = this.applied; i < combs.length; i++) {
+                this.apply(combs[i]);
+            }
+            this.applied = combs.length;
+        }
+        return this;
+    }
+
+    rebuild(wordsArr, combs) {
+        this.words = wordsArr;
+        this.combinations = combs;
+        this.positions = new Map(wordsArr.map((w, index) => [w.id, index]));
+        this.parent = wordsArr.map((w, index) => index);
+        this.min = wordsArr.map((w, index) => index);
+        this.max = wordsArr.map((w, index) => index);
+        combs.forEach(c => this.apply(c));
+        this.applied = combs.length;
+        this.dirty = false;
+    }
+
+    apply(c) {
+        if (!c.complete || c.type !== 'valid') return;
+        const index1 = this.position(c.wordId1);
+        const index2 = this.position(c.wordId2);
+        // Only directly adjacent words continue a phrase
+        if (index1 === -1 || index2 === -1 || Math.abs(index1 - index2) !== 1) return;
+        this.union(index1, index2);
+    }
+
+    position(wordId) {
+        const index = this.positions.get(wordId);
+        return index === undefined ? -1 : index;
+    }
+
+    find(index) {
+        let root = index;
+        while (this.parent[root] !== root) root = this.parent[root];
+        while (this.parent[index] !== root) {
+            const next = this.parent[index];
+            this.parent[index] = root;
+            index = next;
+        }
+        return root;
+    }
+
+    union(index1, index2) {
+        const root1 = this.find(index1);
+        const root2 = this.find(index2);
+        if (root1 === root2) return;
+        this.parent[root2] = root1;
+        this.min[root1] = Math.min(this.min[root1], this.min[root2]);
+        this.max[root1] = Math.max(this.max[root1], this.max[root2]);
+    }
+
+    span(wordId) {
+        const index = this.position(wordId);
+        if (index === -1) return { min: -1, max: -1 };
+        const root = this.find(index);
+        return { min: this.min[root], max: this.max[root] };
+    }
+}
+
+const phraseIndex = new PhraseIndex();
+
+// Call after changing a combination's complete/type in place
+function invalidatePhraseIndex() {
+    phraseIndex.invalidate();
+}
+
+// Phrase index for the given words and combinations (defaults to the global
+// combinations array of the running app)
+function getPhraseIndex(wordsArr, combs = typeof combinations === 'undefined' ? [] : combinations) {
+    return phraseIndex.sync(wordsArr, combs);
+}
+
+// Memo of validateCombination() results per pair of parts. An entry is used
+// while both parts still have the details version (pos.version) it was
+// computed from and the two words sit in the same phrase spans, so a pair is
+// only revalidated when one of its parts or its surroundings changed. The app
+// also evicts a part's entries when its details are saved or it is deleted.
+const COMBINATION_CACHE_LIMIT = 5000;
+
+class CombinationValidationCache {
+    constructor() {
+        this.entries = new Map(); // "posId1|posId2" -> { version1, version2, span, result }
+        this.byPart = new Map();  // posId -> Set of entry keys
+    }
+
+    get(part1, part2, span) {
+        const entry = this.entries.get(`${part1.id}|${part2.id}`);
+        if (!entry || entry.version1 !== part1.version || entry.version2 !== part2.version || entry.span !== span) {
+            return null;
+        }
+        return entry.result;
+    }
+
+    set(part1, part2, span, result) {
+        if (part1.version === undefined || part2.version === undefined) return;
+        if (this.entries.size >= COMBINATION_CACHE_LIMIT) this.clear();
+        const key = `${part1.id}|${part2.id}`;
+        this.entries.set(key, { version1: part1.version, version2: part2.version, span, result });
+        [part1.id, part2.id].forEach(posId => {
+            if (!this.byPart.has(posId)) this.byPart.set(posId, new Set());
+            this.byPart.get(posId).add(key);
+        });
+    }
+
+    // Drop every entry involving a part (its details changed or it was deleted)
+    invalidatePart(posId) {
+        const keys = this.byPart.get(posId);
+        if (!keys) return;
+        keys.forEach(key => this.entries.delete(key));
+        this.byPart.delete(posId);
+    }
+
+    clear() {
+        this.entries.clear();
+        this.byPart.clear();
+    }
+}
+
+const combinationValidationCache = new CombinationValidationCache();
+
+// Positions and phrase spans of two words: everything the adjacency check looks at
+function getPairSpanKey(wordId1, wordId2, words, combs) {
+    const index = getPhraseIndex(words, combs);
+    const span1 = index.span(wordId1);
+    const span2 = index.span(wordId2);
+    return `${index.position(wordId1)}:${span1.min}-${span1.max}|${index.position(wordId2)}:${span2.min}-${span2.max}`;
+}
+
 // Check adjacency: words must be adjacent, treating complete combination chains as single units
-function checkAdjacency(wordId1, wordId2, words) {
-    const index1 = words.findIndex(w => w.id === wordId1);
-    const index2 = words.findIndex(w => w.id === wordId2);
+function checkAdjacency(wordId1, wordId2, words, combs) {
+    const index = getPhraseIndex(words, combs);
+    const index1 = index.position(wordId1);
+    const index2 = index.position(wordId2);
 
     if (index1 === -1 || index2 === -1) return false;
 
@@ -11,52 +165,16 @@ function checkAdjacency(wordId1, wordId2, words) {
     if (Math.abs(index1 - index2) === 1) return true;
 
     // Phrase-aware: get effective span of each word including its complete combination chains
-    const span1 = getPhraseSpan(wordId1, words);
-    const span2 = getPhraseSpan(wordId2, words);
+    const span1 = index.span(wordId1);
+    const span2 = index.span(wordId2);
 
     // Adjacent if spans touch (no gap between them)
     return span1.max + 1 === span2.min || span2.max + 1 === span1.min;
 }
 
 // Get the index span of a word including all words connected through complete combinations
-function getPhraseSpan(wordId, wordsArr) {
-    const index = wordsArr.findIndex(w => w.id === wordId);
-    let min = index, max = index;
-
-    // Access global combinations array
-    if (typeof combinations === 'undefined' || !combinations.length) {
-        return { min, max };
-    }
-
-    // BFS: find all words reachable through complete, valid, adjacent combinations
-    const visited = new Set([wordId]);
-    const queue = [wordId];
-
-    while (queue.length > 0) {
-        const currentId = queue.shift();
-        const currentIndex = wordsArr.findIndex(w => w.id === currentId);
-
-        combinations.forEach(c => {
-            if (!c.complete || c.type !== 'valid') return;
-
-            let neighborId = null;
-            if (c.wordId1 === currentId) neighborId = c.wordId2;
-            else if (c.wordId2 === currentId) neighborId = c.wordId1;
-
-            if (neighborId && !visited.has(neighborId)) {
-                const neighborIndex = wordsArr.findIndex(w => w.id === neighborId);
-                // Only include if directly adjacent (chain continuity)
-                if (Math.abs(currentIndex - neighborIndex) === 1) {
-                    visited.add(neighborId);
-                    queue.push(neighborId);
-                    min = Math.min(min, neighborIndex);
-                    max = Math.max(max, neighborIndex);
-                }
-            }
-        });
-    }
-
-    return { min, max };
+function getPhraseSpan(wordId, wordsArr, combs) {
+    return getPhraseIndex(wordsArr, combs).span(wordId);
 }
 
 // Calculate definiteness recursively (for Idafa chains, suffix pronouns)
@@ -72,10 +190,8 @@ function calculateDefiniteness(word, pos, words, combinations) {
         (c.wordId2 === word.id && c.posId2 === pos.id)
     ).filter(c => {
         const otherWordId = c.wordId1 === word.id ? c.wordId2 : c.wordId1;
-        const otherWord = words.find(w => w.id === otherWordId);
-        const otherPos = otherWord?.partsOfSpeech.find(p => 
-            p.id === (c.wordId1 === word.id ? c.posId2 : c.posId1)
-        );
+        const otherWord = findWord(words, otherWordId);
+        const otherPos = otherWord?.getPartOfSpeech(c.wordId1 === word.id ? c.posId2 : c.posId1);
         return otherPos?.type === 'noun';
     });
     
@@ -96,20 +212,53 @@ function valuesMatch(value1, value2) {
     return arr1.some(v1 => arr2.some(v2 => v1 === v2));
 }
 
+// valuesMatch() on a field of two details objects, through their interned
+// masks when both values are known options (no allocation, one AND)
+function detailsMatch(details1, details2, field) {
+    const mask1 = getDetailMask(details1, field);
+    const mask2 = getDetailMask(details2, field);
+    if (mask1 > 0 && mask2 > 0) return (mask1 & mask2) !== 0;
+    return valuesMatch(details1[field], details2[field]);
+}
+
+// Do two details objects share a case (cases, or the demonstrative's case)?
+// null when either has none
+function casesIntersect(details1, details2) {
+    const field1 = details1.cases ? 'cases' : 'case';
+    const field2 = details2.cases ? 'cases' : 'case';
+    if (!details1[field1] || !details2[field2]) return null;
+    const mask1 = getDetailMask(details1, field1);
+    const mask2 = getDetailMask(details2, field2);
+    if (mask1 > 0 && mask2 > 0) return (mask1 & mask2) !== 0;
+    const arr1 = Array.isArray(details1[field1]) ? details1[field1] : [details1[field1]];
+    const arr2 = Array.isArray(details2[field2]) ? details2[field2] : [details2[field2]];
+    return arraysIntersect(arr1, arr2);
+}
+
 // Check if arrays have any intersection (for cases)
 function arraysIntersect(arr1, arr2) {
     if (!Array.isArray(arr1) || !Array.isArray(arr2)) return false;
     return arr1.some(v => arr2.includes(v));
 }
 
-// Check if two parts of speech can be combined
-function validateCombination(part1, part2, wordId1, wordId2, words) {
+// Check if two parts of speech can be combined (memoized, see CombinationValidationCache)
+function validateCombination(part1, part2, wordId1, wordId2, words, combs) {
+    const span = wordId1 && wordId2 && words ? getPairSpanKey(wordId1, wordId2, words, combs) : '';
+    let result = combinationValidationCache.get(part1, part2, span);
+    if (!result) {
+        result = computeCombinationValidation(part1, part2, wordId1, wordId2, words, combs);
+        combinationValidationCache.set(part1, part2, span, result);
+    }
+    return { ...result };
+}
+
+function computeCombinationValidation(part1, part2, wordId1, wordId2, words, combs) {
     const type1 = part1.type;
     const type2 = part2.type;
 
     // Check adjacency first - words must be directly adjacent
     if (wordId1 && wordId2 && words) {
-        if (!checkAdjacency(wordId1, wordId2, words)) {
+        if (!checkAdjacency(wordId1, wordId2, words, combs)) {
             return {
                 valid: false,
                 complete: false,
@@ -176,7 +325,7 @@ function validateDemonstrativeNounMatch(part1, part2, wordId1, wordId2, words) {
     const noun = part1.type === 'noun' ? part1 : part2;
     
     // Check Gender, Number match
-    if (!valuesMatch(demonstrative.details.gender, noun.details.gender)) {
+    if (!detailsMatch(demonstrative.details, noun.details, 'gender')) {
         return {
             valid: false,
             complete: false,
@@ -185,7 +334,7 @@ function validateDemonstrativeNounMatch(part1, part2, wordId1, wordId2, words) {
         };
     }
     
-    if (!valuesMatch(demonstrative.details.number, noun.details.number)) {
+    if (!detailsMatch(demonstrative.details, noun.details, 'number')) {
         return {
             valid: false,
             complete: false,
@@ -196,13 +345,7 @@ function validateDemonstrativeNounMatch(part1, part2, wordId1, wordId2, words) {
     
     // Check Case if dual
     if (demonstrative.details.number === 'זוגי' || noun.details.number === 'זוגי') {
-        const demoCase = demonstrative.details.cases || demonstrative.details.case;
-        const nounCase = noun.details.cases || noun.details.case;
-        
-        if (demoCase && nounCase && !arraysIntersect(
-            Array.isArray(demoCase) ? demoCase : [demoCase],
-            Array.isArray(nounCase) ? nounCase : [nounCase]
-        )) {
+        if (casesIntersect(demonstrative.details, noun.details) === false) {
             return {
                 valid: false,
                 complete: false,
@@ -214,7 +357,7 @@ function validateDemonstrativeNounMatch(part1, part2, wordId1, wordId2, words) {
     
     // Definiteness filter: Block if noun is Indefinite
     const nounDefiniteness = calculateDefiniteness(
-        words?.find(w => w.id === (part1.type === 'noun' ? wordId1 : wordId2)),
+        words ? findWord(words, part1.type === 'noun' ? wordId1 : wordId2) : undefined,
         noun,
         words || [],
         []
@@ -251,7 +394,7 @@ function validateNounAdjectiveMatch(part1, part2) {
     for (const field of requiredFields) {
         if (noun.details[field] && adjective.details[field]) {
             // Support homonymy: check if at least one value matches
-            if (!valuesMatch(noun.details[field], adjective.details[field])) {
+            if (!detailsMatch(noun.details, adjective.details, field)) {
                 mismatches.push(field);
             }
         } else if (!noun.details[field] || !adjective.details[field]) {
@@ -266,15 +409,8 @@ function validateNounAdjectiveMatch(part1, part2) {
     }
     
     // Check cases if both have cases (support homonymy)
-    const nounCases = noun.details.cases || noun.details.case;
-    const adjCases = adjective.details.cases || adjective.details.case;
-    if (nounCases && adjCases) {
-        const nounCasesArr = Array.isArray(nounCases) ? nounCases : [nounCases];
-        const adjCasesArr = Array.isArray(adjCases) ? adjCases : [adjCases];
-        
-        if (!arraysIntersect(nounCasesArr, adjCasesArr)) {
-            mismatches.push('cases');
-        }
+    if (casesIntersect(noun.details, adjective.details) === false) {
+        mismatches.push('cases');
     }
 
     if (mismatches.length > 0) {
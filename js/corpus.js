@@ -0,0 +1,119 @@
+// Sentence corpus, fetched lazily from corpus/ (see compile_corpus.py)
+//
+// corpus/manifest.json lists NDJSON shards - one stage per line - per
+// category and unit. Startup fetches only the manifest and the first shard of
+// each category, so it costs the same whatever the size of the bank. The rest
+// of a category is fetched when its list comes near the viewport, and
+// everything when a search needs it. Each shard is fetched once; the stages
+// of a category are republished to STAGES in manifest order as shards arrive.
+
+const CORPUS_DIR = 'corpus/';
+
+function parseCorpusShard(text, category) {
+    const stages = [];
+    text.split('\n').forEach(line => {
+        if (!line.trim()) return;
+        const stage = JSON.parse(line);
+        if (!stage.category) stage.category = category;
+        stages.push(stage);
+    });
+    return stages;
+}
+
+class CorpusLoader {
+    constructor(baseUrl) {
+        this.baseUrl = baseUrl;
+        this.manifestPromise = null;
+        this.shards = [];             // manifest entries
+        this.requests = new Map();    // file -> Promise of its stages
+        this.loaded = new Map();      // file -> stages
+        this.listeners = [];
+    }
+
+    // Called with the category name whenever one of its shards has arrived
+    onChange(listener) {
+        this.listeners.push(listener);
+    }
+
+    manifest() {
+        if (!this.manifestPromise) {
+            this.manifestPromise = fetch(this.baseUrl + 'manifest.json')
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.json();
+                })
+                .catch(err => {
+                    console.warn('Corpus: could not load the manifest', err);
+                    return { version: 1, total: 0, shards: [] };
+                })
+                .then(manifest => {
+                    this.shards = manifest.shards;
+                    return manifest;
+                });
+        }
+        return this.manifestPromise;
+    }
+
+    categories() {
+        return [...new Set(this.shards.map(shard => shard.category))];
+    }
+
+    isComplete() {
+        return this.manifestPromise !== null && this.shards.every(shard => this.loaded.has(shard.file));
+    }
+
+    loadShard(shard) {
+        if (!this.requests.has(shard.file)) {
+            const url = this.baseUrl + shard.file + (shard.hash ? `?v=${shard.hash}` : '');
+            const request = fetch(url)
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.text();
+                })
+                .then(text => {
+                    const stages = parseCorpusShard(text, shard.category);
+                    this.loaded.set(shard.file, stages);
+                    this.publish(shard.category);
+                    return stages;
+                })
+                .catch(err => {
+                    console.warn(`Corpus: could not load ${shard.file}`, err);
+                    this.requests.delete(shard.file); // retried on the next request
+                    return [];
+                });
+            this.requests.set(shard.file, request);
+        }
+        return this.requests.get(shard.file);
+    }
+
+    // Rebuild STAGES[category] from its loaded shards, in manifest order
+    publish(category) {
+        const stages = [];
+        this.shards.forEach(shard => {
+            if (shard.category !== category || !this.loaded.has(shard.file)) return;
+            this.loaded.get(shard.file).forEach(stage => stages.push(stage));
+        });
+        setCategoryStages(category, stages);
+        this.listeners.forEach(listener => listener(category));
+    }
+
+    // Manifest plus the first shard of every category
+    start() {
+        return this.manifest().then(() => Promise.all(
+            this.categories().map(category => this.loadShard(this.shards.find(shard => shard.category === category)))
+        ));
+    }
+
+    // Every shard of a category, one request at a time so the list fills in order
+    loadCategory(category) {
+        return this.manifest().then(() => this.shards
+            .filter(shard => shard.category === category)
+            .reduce((previous, shard) => previous.then(() => this.loadShard(shard)), Promise.resolve()));
+    }
+
+    loadAll() {
+        return this.manifest().then(() => Promise.all(this.categories().map(category => this.loadCategory(category))));
+    }
+}
+
+const corpus = new CorpusLoader(CORPUS_DIR);
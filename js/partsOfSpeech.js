@@ -158,6 +158,87 @@ const PARTS_OF_SPEECH = {
     }
 };
 
+// Flat lookup of every PoS key in POS_HIERARCHY:
+// key -> { category, categoryName, subType, name, nameEn }.
+// The build (build.py) ships it precomputed as PRECOMPILED_POS_LOOKUP.
+function buildPosLookup() {
+    const lookup = {};
+    Object.keys(POS_HIERARCHY).forEach(category => {
+        const subTypes = POS_HIERARCHY[category].subTypes;
+        Object.keys(subTypes).forEach(subType => {
+            lookup[subTypes[subType].key] = {
+                category: category,
+                categoryName: POS_HIERARCHY[category].name,
+                subType: subType,
+                name: subTypes[subType].name,
+                nameEn: subTypes[subType].nameEn
+            };
+        });
+    });
+    return lookup;
+}
+
+const POS_LOOKUP = typeof PRECOMPILED_POS_LOOKUP !== 'undefined' ? PRECOMPILED_POS_LOOKUP : buildPosLookup();
+
+// Interned feature values: every option of a field in PARTS_OF_SPEECH gets
+// a bit of its own within that field, so a detail value - one option or
+// several, for homonymy - is a small integer mask and "at least one value in
+// common" is a single AND. field -> { value: bit }. The demonstrative's
+// singular case field shares the codes of cases.
+// The build (build.py) ships it precomputed as PRECOMPILED_FEATURE_CODES.
+const FEATURE_FIELD_ALIASES = { case: 'cases' };
+
+function buildFeatureCodes() {
+    const codes = {};
+    Object.values(PARTS_OF_SPEECH).forEach(pos => {
+        [pos.details, pos.bonus || {}].forEach(fields => {
+            Object.keys(fields).forEach(field => {
+                const fieldCodes = codes[field] || (codes[field] = {});
+                (fields[field].options || []).forEach(option => {
+                    const value = typeof option === 'object' ? option.value : option;
+                    if (!(value in fieldCodes)) fieldCodes[value] = 2 ** Object.keys(fieldCodes).length;
+                });
+            });
+        });
+    });
+    return codes;
+}
+
+const FEATURE_CODES = typeof PRECOMPILED_FEATURE_CODES !== 'undefined' ? PRECOMPILED_FEATURE_CODES : buildFeatureCodes();
+
+// Mask of a detail value: 0 when empty, -1 when some value is not an option
+// of the field (free text, such as a verb root)
+function getFeatureMask(field, value) {
+    const codes = FEATURE_CODES[FEATURE_FIELD_ALIASES[field] || field];
+    if (!codes || value === undefined || value === null || value === '') return codes ? 0 : -1;
+    const values = Array.isArray(value) ? value : [value];
+    let mask = 0;
+    for (const v of values) {
+        const code = codes[v];
+        if (code === undefined) return -1;
+        mask |= code;
+    }
+    return mask;
+}
+
+// Masks of a (frozen, see word.js) details object, computed once per object
+const detailMaskCache = new WeakMap();
+
+function getDetailMask(details, field) {
+    let masks = detailMaskCache.get(details);
+    if (!masks) {
+        masks = {};
+        detailMaskCache.set(details, masks);
+    }
+    if (!(field in masks)) masks[field] = getFeatureMask(field, details[field]);
+    return masks[field];
+}
+
+// Main category (noun/verb/particle) of a PoS key, or null
+function getPosCategory(type) {
+    return POS_LOOKUP[type] ? POS_LOOKUP[type].category : null;
+}
+
 // Get hierarchical PoS options (3 main categories)
 function getHierarchicalPosOptions() {
     return Object.keys(POS_HIERARCHY).map(key => ({
@@ -252,8 +333,7 @@ function getPartOfSpeechName(type) {
 
 // Check if PoS type is a particle (no settings needed)
 function isParticleType(type) {
-    const particleTypes = ['preposition', 'conjunction', 'subordinating', 'negation'];
-    return particleTypes.includes(type);
+    return getPosCategory(type) === 'particle';
 }
 
 // Get default noun details
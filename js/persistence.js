@@ -0,0 +1,332 @@
+// Autosave of in-progress analyses (IndexedDB)
+//
+// Every stage is stored as a compact snapshot plus a log of deltas. The
+// mutation points in app.js record one small op each; ops are queued and
+// written after a short idle period in a single transaction. Once the log
+// grows past AUTOSAVE_COMPACT_AFTER ops the snapshot is rewritten from the
+// in-memory mirror and the log is cleared. Loading folds snapshot + deltas
+// into plain data without touching the DOM, so the app can rebuild the whole
+// analysis and render it once.
+//
+// Format (version 1). Parts of speech, arches and logical connections are
+// referenced by small per-stage serial numbers instead of their long runtime
+// ids; words by their index in the sentence.
+//   snapshot: { v, stage, sentence, serial,
+//               parts:  [[n, wordIndex, type, details]],
+//               combs:  [[part1, part2, flags, type]],          flags: 1 complete, 2 demonstrative
+//               arches: [[n, word1, word2, height, role, flags, model, externalRole]], flags: 1 main roof, 2 clause
+//               logic:  [[n, part1, part2, type]] }
+//   delta:    { stage, ops: [op, ...] }
+//   ops:      ['p', n, wordIndex, type, details]   add part of speech
+//             ['d', n, details]                    part of speech details
+//             ['p-', n]                            delete part of speech (and its combinations)
+//             ['c', part1, part2, flags, type]     add/update combination
+//             ['c-', part1, part2]                 delete combination
+//             ['a', n, word1, word2, height, role, flags, model, externalRole]  add/update arch
+//             ['a-', n]                            delete arch
+//             ['l', n, part1, part2, type]         add logical connection
+
+const AUTOSAVE_VERSION = 1;
+const AUTOSAVE_DB_NAME = 'plonter-autosave';
+const AUTOSAVE_DELAY_MS = 400;
+const AUTOSAVE_COMPACT_AFTER = 100;
+
+class AnalysisAutosave {
+    constructor() {
+        this.dbPromise = null;
+        this.writing = Promise.resolve();
+        this.begin(null, null);
+    }
+
+    // Start tracking a stage; anything still queued for the previous one is written first
+    begin(stageId, sentence) {
+        if (this.pending && this.pending.length) this.flush();
+        this.stageId = stageId;
+        this.sentence = sentence;
+        this.mirror = createAutosaveMirror();
+        this.pending = [];
+        this.hasSnapshot = false;
+        this.deltaOps = 0;
+        this.partSerials = new Map(); // pos id -> n
+        this.archSerials = new Map(); // arch id -> n
+    }
+
+    // Folded saved analysis for a stage: { parts, combs, arches, logic } in the
+    // mirror layout, or null when nothing (compatible) is stored
+    load(stageId, sentence) {
+        return this.openDb().then(db => {
+            if (!db) return null;
+            return new Promise((resolve, reject) => {
+                const tx = db.transaction(['snapshots', 'deltas'], 'readonly');
+                let snapshot = null;
+                const deltas = [];
+                tx.objectStore('snapshots').get(stageId).onsuccess = e => { snapshot = e.target.result || null; };
+                tx.objectStore('deltas').index('stage').openCursor(IDBKeyRange.only(stageId)).onsuccess = e => {
+                    const cursor = e.target.result;
+                    if (!cursor) return;
+                    deltas.push(cursor.value);
+                    cursor.continue();
+                };
+                tx.oncomplete = () => resolve({ snapshot, deltas });
+                tx.onerror = () => reject(tx.error);
+            });
+        }).then(stored => {
+            if (!stored || !stored.snapshot) return null;
+            const { snapshot, deltas } = stored;
+            if (snapshot.v !== AUTOSAVE_VERSION || snapshot.sentence !== sentence) {
+                this.clear(stageId);
+                return null;
+            }
+            const mirror = decodeAutosaveSnapshot(snapshot);
+            deltas.forEach(delta => delta.ops.forEach(op => {
+                applyAutosaveOp(mirror, op);
+                mirror.deltaOps++;
+            }));
+            return mirror;
+        }).catch(err => {
+            console.warn('Autosave: could not load saved analysis', err);
+            return null;
+        });
+    }
+
+    // Take over a loaded analysis as the current state once the app has rebuilt
+    // it; partIds/archIds map serial numbers to the new runtime ids. Only then
+    // do later saves extend the stored log: a load that is not adopted (work
+    // had already started) leaves the first save to replace the stored record.
+    adopt(mirror, partIds, archIds) {
+        this.mirror = mirror;
+        this.hasSnapshot = true;
+        this.deltaOps = mirror.deltaOps;
+        this.partSerials = new Map([...partIds].map(([n, id]) => [id, n]));
+        this.archSerials = new Map([...archIds].map(([n, id]) => [id, n]));
+    }
+
+    // Drop everything stored for a stage
+    clear(stageId) {
+        this.openDb().then(db => {
+            if (!db) return;
+            const tx = db.transaction(['snapshots', 'deltas'], 'readwrite');
+            tx.objectStore('snapshots').delete(stageId);
+            deleteAutosaveDeltas(tx, stageId);
+        }).catch(() => {});
+    }
+
+    // Drop every stored analysis and anything still queued (test harness reset)
+    clearAll() {
+        clearTimeout(this.timer);
+        this.pending = [];
+        this.hasSnapshot = false;
+        this.deltaOps = 0;
+        this.writing = this.writing.then(() => this.openDb()).then(db => {
+            if (!db) return;
+            return new Promise(resolve => {
+                const tx = db.transaction(['snapshots', 'deltas'], 'readwrite');
+                tx.objectStore('snapshots').clear();
+                tx.objectStore('deltas').clear();
+                tx.oncomplete = tx.onerror = tx.onabort = () => resolve();
+            });
+        }).catch(() => {});
+        return this.writing;
+    }
+
+    // ---- Mutation records ----
+
+    recordPartAdded(wordIndex, pos) {
+        const n = this.partSerial(pos.id);
+        this.record(['p', n, wordIndex, pos.type, pos.details]);
+    }
+
+    recordPartDetails(pos) {
+        this.record(['d', this.partSerial(pos.id), pos.details]);
+    }
+
+    recordPartDeleted(posId) {
+        if (!this.partSerials.has(posId)) return;
+        this.record(['p-', this.partSerials.get(posId)]);
+        this.partSerials.delete(posId);
+    }
+
+    recordCombination(comb) {
+        const flags = (comb.complete ? 1 : 0) | (comb.isDemonstrative ? 2 : 0);
+        this.record(['c', this.partSerial(comb.posId1), this.partSerial(comb.posId2), flags, comb.type]);
+    }
+
+    recordCombinationDeleted(comb) {
+        this.record(['c-', this.partSerial(comb.posId1), this.partSerial(comb.posId2)]);
+    }
+
+    recordArch(arch, wordIndex1, wordIndex2) {
+        if (!this.archSerials.has(arch.id)) this.archSerials.set(arch.id, ++this.mirror.serial);
+        const flags = (arch.isMainRoof ? 1 : 0) | (arch.isClause ? 2 : 0);
+        this.record(['a', this.archSerials.get(arch.id), wordIndex1, wordIndex2, arch.height,
+            arch.syntacticRole || null, flags, arch.model || null, arch.externalRole || null]);
+    }
+
+    recordArchDeleted(arch) {
+        if (!this.archSerials.has(arch.id)) return;
+        this.record(['a-', this.archSerials.get(arch.id)]);
+        this.archSerials.delete(arch.id);
+    }
+
+    recordLogicalConnection(connection) {
+        this.record(['l', ++this.mirror.serial, this.partSerial(connection.posId1), this.partSerial(connection.posId2), connection.type]);
+    }
+
+    // ---- Internals ----
+
+    partSerial(posId) {
+        if (!this.partSerials.has(posId)) this.partSerials.set(posId, ++this.mirror.serial);
+        return this.partSerials.get(posId);
+    }
+
+    record(op) {
+        if (this.stageId === null) return;
+        applyAutosaveOp(this.mirror, op);
+        this.pending.push(op);
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), AUTOSAVE_DELAY_MS);
+    }
+
+    // Write queued ops now: a delta record normally, a fresh snapshot (replacing
+    // the log) for the first save of a stage or once the log is long enough
+    flush() {
+        clearTimeout(this.timer);
+        if (!this.pending.length) return this.writing;
+
+        const stageId = this.stageId;
+        const ops = this.pending;
+        this.pending = [];
+        this.deltaOps += ops.length;
+        const snapshot = !this.hasSnapshot || this.deltaOps >= AUTOSAVE_COMPACT_AFTER
+            ? encodeAutosaveSnapshot(this.mirror, stageId, this.sentence)
+            : null;
+        if (snapshot) {
+            this.hasSnapshot = true;
+            this.deltaOps = 0;
+        }
+
+        this.writing = this.writing.then(() => this.openDb()).then(db => {
+            if (!db) return;
+            return new Promise(resolve => {
+                const tx = db.transaction(['snapshots', 'deltas'], 'readwrite');
+                if (snapshot) {
+                    tx.objectStore('snapshots').put(snapshot);
+                    deleteAutosaveDeltas(tx, stageId);
+                } else {
+                    tx.objectStore('deltas').add({ stage: stageId, ops });
+                }
+                tx.oncomplete = resolve;
+                tx.onerror = tx.onabort = () => {
+                    console.warn('Autosave: write failed', tx.error);
+                    resolve();
+                };
+            });
+        }).catch(() => {});
+        return this.writing;
+    }
+
+    // Resolves to the database, or null when IndexedDB is unavailable
+    openDb() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise(resolve => {
+                if (typeof indexedDB === 'undefined') {
+                    resolve(null);
+                    return;
+                }
+                const request = indexedDB.open(AUTOSAVE_DB_NAME, AUTOSAVE_VERSION);
+                request.onupgradeneeded = () => {
+                    const db = request.result;
+                    if (!db.objectStoreNames.contains('snapshots')) {
+                        db.createObjectStore('snapshots', { keyPath: 'stage' });
+                    }
+                    if (!db.objectStoreNames.contains('deltas')) {
+                        db.createObjectStore('deltas', { autoIncrement: true }).createIndex('stage', 'stage');
+                    }
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = request.onblocked = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    }
+}
+
+function createAutosaveMirror() {
+    return {
+        serial: 0,
+        deltaOps: 0,       // ops folded in on top of the stored snapshot (not saved)
+        parts: new Map(),  // n -> [wordIndex, type, details]
+        combs: new Map(),  // 'part1>part2' -> [part1, part2, flags, type]
+        arches: new Map(), // n -> [word1, word2, height, role, flags, model, externalRole]
+        logic: new Map()   // n -> [part1, part2, type]
+    };
+}
+
+function applyAutosaveOp(mirror, op) {
+    const [kind, a, b] = op;
+    switch (kind) {
+        case 'p':
+            mirror.parts.set(a, [b, op[3], op[4]]);
+            break;
+        case 'd':
+            if (mirror.parts.has(a)) mirror.parts.get(a)[2] = b;
+            break;
+        case 'p-':
+            mirror.parts.delete(a);
+            mirror.combs.forEach((comb, key) => {
+                if (comb[0] === a || comb[1] === a) mirror.combs.delete(key);
+            });
+            break;
+        case 'c':
+            mirror.combs.set(`${a}>${b}`, [a, b, op[3], op[4]]);
+            break;
+        case 'c-':
+            mirror.combs.delete(`${a}>${b}`);
+            mirror.combs.delete(`${b}>${a}`);
+            break;
+        case 'a':
+            mirror.arches.set(a, op.slice(2));
+            break;
+        case 'a-':
+            mirror.arches.delete(a);
+            break;
+        case 'l':
+            mirror.logic.set(a, [b, op[3], op[4]]);
+            break;
+    }
+    mirror.serial = Math.max(mirror.serial, typeof a === 'number' ? a : 0);
+}
+
+function encodeAutosaveSnapshot(mirror, stageId, sentence) {
+    return {
+        v: AUTOSAVE_VERSION,
+        stage: stageId,
+        sentence: sentence,
+        serial: mirror.serial,
+        parts: [...mirror.parts].map(([n, part]) => [n, ...part]),
+        combs: [...mirror.combs.values()],
+        arches: [...mirror.arches].map(([n, arch]) => [n, ...arch]),
+        logic: [...mirror.logic].map(([n, connection]) => [n, ...connection])
+    };
+}
+
+function decodeAutosaveSnapshot(snapshot) {
+    const mirror = createAutosaveMirror();
+    mirror.serial = snapshot.serial;
+    snapshot.parts.forEach(([n, ...part]) => mirror.parts.set(n, part));
+    snapshot.combs.forEach(comb => mirror.combs.set(`${comb[0]}>${comb[1]}`, comb));
+    snapshot.arches.forEach(([n, ...arch]) => mirror.arches.set(n, arch));
+    snapshot.logic.forEach(([n, ...connection]) => mirror.logic.set(n, connection));
+    return mirror;
+}
+
+function deleteAutosaveDeltas(tx, stageId) {
+    tx.objectStore('deltas').index('stage').openKeyCursor(IDBKeyRange.only(stageId)).onsuccess = e => {
+        const cursor = e.target.result;
+        if (!cursor) return;
+        tx.objectStore('deltas').delete(cursor.primaryKey);
+        cursor.continue();
+    };
+}
+
+const autosave = new AnalysisAutosave();
@@ -0,0 +1,232 @@
+// Stage search index and windowed stage list for the welcome screen
+//
+// StageSearchIndex is built once from the sorted stage list: every stage gets
+// a normalized search key (its number plus the sentence with diacritics and
+// letter variants folded) and every substring of up to STAGE_SEARCH_GRAM
+// characters of that key maps to a sorted posting list of stage positions.
+// Queries up to that length are a single lookup; longer queries intersect
+// the posting lists of their n-grams and confirm the few candidates with
+// includes(). Results keep the getAllStages() order.
+//
+// VirtualStageList renders only the rows of a .stages-list grid that are near
+// the viewport; the rows above and below are stood in for by padding. Lists
+// shorter than VIRTUAL_LIST_MIN_ITEMS are rendered in full as before.
+
+const STAGE_SEARCH_GRAM = 3;
+const VIRTUAL_LIST_MIN_ITEMS = 120;
+const VIRTUAL_LIST_OVERSCAN_ROWS = 4;
+
+// Harakat, Quranic marks, superscript alef and tatweel
+const ARABIC_DIACRITICS = /[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]/g;
+const ARABIC_LETTER_VARIANTS = {
+    '\u0622': '\u0627', '\u0623': '\u0627', '\u0625': '\u0627', '\u0671': '\u0627', // alef with madda/hamza/wasla -> alef
+    '\u0649': '\u064A', '\u0626': '\u064A',                                         // alef maqsura, ya with hamza -> ya
+    '\u0624': '\u0648',                                                             // waw with hamza -> waw
+    '\u0629': '\u0647'                                                              // ta marbuta -> ha
+};
+
+// Fold text for matching: case, Arabic diacritics, alef/ya/waw/ta-marbuta variants, whitespace runs
+function normalizeSearchText(text) {
+    return text.toLowerCase()
+        .replace(ARABIC_DIACRITICS, '')
+        .replace(/[\u0622\u0623\u0625\u0671\u0649\u0626\u0624\u0629]/g, ch => ARABIC_LETTER_VARIANTS[ch])
+        .replace(/\s+/g, ' ');
+}
+
+// An n-gram packed into one number: 16 bits per UTF-16 unit (offset by one,
+// so grams of different lengths never collide); three units fit in a double
+function gramKey(text, start, length) {
+    let key = 0;
+    for (let i = start; i < start + length; i++) key = key * 65536 + text.charCodeAt(i) + 1;
+    return key;
+}
+
+// Intersection of two ascending position lists
+function intersectSorted(a, b) {
+    const result = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) {
+            result.push(a[i]);
+            i++;
+            j++;
+        } else if (a[i] < b[j]) {
+            i++;
+        } else {
+            j++;
+        }
+    }
+    return result;
+}
+
+class StageSearchIndex {
+    constructor() {
+        this.source = null; // the sorted stage list the index was built from
+        this.keys = [];
+        this.grams = new Map(); // gramKey -> ascending stage positions
+    }
+
+    // (Re)build when the stage list has changed since the last build
+    ensure() {
+        const stages = getSortedStages();
+        if (stages === this.source) return;
+        this.source = stages;
+        this.keys = new Array(stages.length);
+        this.grams = new Map();
+
+        stages.forEach((stage, position) => {
+            const sentence = normalizeSearchText(stage.sentence);
+            // \u0000 keeps matches from spanning the number and the sentence
+            this.keys[position] = stage.number + '\u0000' + sentence;
+            this.addGrams(stage.number, position);
+            this.addGrams(sentence, position);
+        });
+    }
+
+    addGrams(text, position) {
+        for (let i = 0; i < text.length; i++) {
+            let gram = 0;
+            for (let j = i; j < text.length && j < i + STAGE_SEARCH_GRAM; j++) {
+                gram = gram * 65536 + text.charCodeAt(j) + 1;
+                const postings = this.grams.get(gram);
+                if (!postings) {
+                    this.grams.set(gram, [position]);
+                } else if (postings[postings.length - 1] !== position) {
+                    postings.push(position);
+                }
+            }
+        }
+    }
+
+    search(query) {
+        this.ensure();
+        const normalized = normalizeSearchText(query);
+        if (!normalized.trim()) return this.source.slice();
+
+        let positions;
+        if (normalized.length <= STAGE_SEARCH_GRAM) {
+            positions = this.grams.get(gramKey(normalized, 0, normalized.length)) || [];
+        } else {
+            const lists = [];
+            for (let i = 0; i + STAGE_SEARCH_GRAM <= normalized.length; i++) {
+                const postings = this.grams.get(gramKey(normalized, i, STAGE_SEARCH_GRAM));
+                if (!postings) return [];
+                lists.push(postings);
+            }
+            lists.sort((a, b) => a.length - b.length);
+            positions = lists.reduce(intersectSorted)
+                .filter(position => this.keys[position].includes(normalized));
+        }
+        return positions.map(position => this.source[position]);
+    }
+}
+
+const stageSearch = new StageSearchIndex();
+
+// Search stages by number or sentence text
+function searchStages(query) {
+    return stageSearch.search(query);
+}
+
+// ---- Windowed list ----
+
+const virtualStageLists = new Set();
+let stageListFrame = 0;
+
+// Bring every list up to date with the scroll position on the next frame;
+// remeasure after layout changes (resize, welcome screen shown again)
+function refreshStageLists(remeasure = false) {
+    if (remeasure) {
+        virtualStageLists.forEach(list => {
+            list.rowHeight = 0;
+            list.rangeKey = null;
+        });
+    }
+    if (stageListFrame) return;
+    stageListFrame = requestAnimationFrame(() => {
+        stageListFrame = 0;
+        virtualStageLists.forEach(list => list.update());
+    });
+}
+
+class VirtualStageList {
+    constructor(container, createItem) {
+        this.container = container;
+        this.createItem = createItem;
+        this.stages = [];
+        this.nodes = new Map(); // stage id -> node currently rendered
+        this.rowHeight = 0;
+        this.rangeKey = null;
+
+        if (virtualStageLists.size === 0) {
+            window.addEventListener('scroll', () => refreshStageLists(), { passive: true });
+            window.addEventListener('resize', () => refreshStageLists(true));
+        }
+        virtualStageLists.add(this);
+    }
+
+    setStages(stages) {
+        this.stages = stages;
+        this.rangeKey = null;
+        const virtual = stages.length >= VIRTUAL_LIST_MIN_ITEMS;
+        this.container.classList.toggle('virtual', virtual);
+
+        if (!virtual) {
+            this.container.style.paddingTop = '';
+            this.container.style.paddingBottom = '';
+            this.container.style.gridAutoRows = '';
+            this.nodes = new Map();
+            const fragment = document.createDocumentFragment();
+            stages.forEach(stage => fragment.appendChild(this.createItem(stage)));
+            this.container.replaceChildren(fragment);
+            return;
+        }
+        this.container.replaceChildren();
+        this.update();
+    }
+
+    // Tallest possible item: a sentence long enough to hit the two-line clamp
+    measure() {
+        const sample = this.stages[0];
+        const probe = this.createItem({ ...sample, sentence: sample.sentence.repeat(8) });
+        probe.style.visibility = 'hidden';
+        this.container.style.gridAutoRows = '';
+        this.container.prepend(probe);
+        this.rowHeight = probe.offsetHeight;
+        probe.remove();
+        this.container.style.gridAutoRows = `${this.rowHeight}px`;
+    }
+
+    update() {
+        if (this.stages.length < VIRTUAL_LIST_MIN_ITEMS || !this.container.offsetParent) return;
+        if (!this.rowHeight) this.measure();
+
+        const style = getComputedStyle(this.container);
+        const columns = Math.max(1, style.gridTemplateColumns.split(' ').length);
+        const stride = this.rowHeight + (parseFloat(style.rowGap) || 0);
+        const rows = Math.ceil(this.stages.length / columns);
+
+        // Visible band in list coordinates (row 0 starts at the container's top edge)
+        const top = this.container.getBoundingClientRect().top;
+        const first = Math.min(rows, Math.max(0, Math.floor(-top / stride) - VIRTUAL_LIST_OVERSCAN_ROWS));
+        const last = Math.min(rows, Math.max(first, Math.ceil((window.innerHeight - top) / stride) + VIRTUAL_LIST_OVERSCAN_ROWS));
+
+        const rangeKey = `${first}:${last}:${columns}`;
+        if (rangeKey === this.rangeKey) return;
+        this.rangeKey = rangeKey;
+
+        const rendered = new Map();
+        const fragment = document.createDocumentFragment();
+        const end = Math.min(last * columns, this.stages.length);
+        for (let i = first * columns; i < end; i++) {
+            const stage = this.stages[i];
+            const node = this.nodes.get(stage.id) || this.createItem(stage);
+            rendered.set(stage.id, node);
+            fragment.appendChild(node);
+        }
+        this.nodes = rendered;
+        this.container.style.paddingTop = `${first * stride}px`;
+        this.container.style.paddingBottom = `${(rows - last) * stride}px`;
+        this.container.replaceChildren(fragment);
+    }
+}
@@ -0,0 +1,125 @@
+// Hot-path tracing, enabled with ?trace=1 in the URL
+//
+// Wraps the renderers, validators and modal/panel openers in User Timing
+// measures (visible in the DevTools performance panel) and watches long tasks
+// and layout shifts with a PerformanceObserver. Everything is collected in
+// window.__plonterTrace, which test_roofs.py --trace (see trace_export.py)
+// turns into Chrome-trace JSON next to a CPU profile of the same scenario.
+//
+// Loaded after app.js: call sites resolve these functions through the global
+// object, so replacing them before init() runs covers every call. Without the
+// flag nothing is wrapped or observed.
+
+const TRACE_ENABLED = typeof location !== 'undefined' && /[?&]trace=1(&|$)/.test(location.search);
+const TRACE_BUFFER_LIMIT = 50000; // events kept; past it the oldest half is dropped
+
+const TRACED_FUNCTIONS = {
+    render: ['renderSentence', 'renderArches', 'renderCombinationLines', 'renderLogicalConnections'],
+    validation: ['validateSentenceModel', 'validateCombination', 'checkArchMatchesCombinations',
+        'checkCombinationEndsWithPreposition', 'updateCombinationsForPartOfSpeech'],
+    modal: ['openPartOfSpeechModal', 'openDetailsPanel', 'openDetailsPanelWithDetails', 'openSyntacticRoleModal',
+        'openSyntacticRoleModalForNewArch', 'openArchPropertiesModal', 'openClauseModal', 'openModelSelectionModal',
+        'openArchModelModal', 'openLogicalConnectionModal']
+};
+
+// Events are { name, cat, ts, dur?, args? } with ts/dur in ms on the
+// performance.now() clock
+class TraceBuffer {
+    constructor() {
+        this.enabled = true;
+        this.timeOrigin = performance.timeOrigin;
+        this.events = [];
+        this.dropped = 0;
+    }
+
+    push(event) {
+        if (this.events.length >= TRACE_BUFFER_LIMIT) {
+            const half = TRACE_BUFFER_LIMIT / 2;
+            this.events.splice(0, half);
+            this.dropped += half;
+        }
+        this.events.push(event);
+    }
+
+    // Hand over everything collected so far and start afresh
+    drain() {
+        const events = this.events;
+        this.events = [];
+        return { timeOrigin: this.timeOrigin, dropped: this.dropped, events };
+    }
+}
+
+function traceFunction(buffer, category, name) {
+    const original = window[name];
+    if (typeof original !== 'function') return;
+    const measureName = `plonter:${name}`;
+    window[name] = function (...args) {
+        const start = performance.now();
+        try {
+            return original.apply(this, args);
+        } finally {
+            const end = performance.now();
+            performance.measure(measureName, { start, end, detail: { category } });
+            performance.clearMeasures(measureName); // DevTools has recorded it; keep the timeline small
+            buffer.push({ name, cat: category, ts: start, dur: end - start });
+        }
+    };
+}
+
+// Round trips of the validation worker, from post to the answer being handled
+function traceValidationService(buffer) {
+    if (typeof ValidationService === 'undefined') return;
+    const posted = new Map(); // request id -> start
+    const post = ValidationService.prototype.post;
+    const receive = ValidationService.prototype.receive;
+    ValidationService.prototype.post = function (state, request) {
+        posted.set(request.id, performance.now());
+        return post.call(this, state, request);
+    };
+    ValidationService.prototype.receive = function (message) {
+        const start = posted.get(message.id);
+        posted.delete(message.id);
+        try {
+            return receive.call(this, message);
+        } finally {
+            if (start !== undefined) {
+                const end = performance.now();
+                performance.measure(`plonter:worker:${message.pass}`, { start, end, detail: { category: 'worker' } });
+                performance.clearMeasures(`plonter:worker:${message.pass}`);
+                buffer.push({ name: `worker:${message.pass}`, cat: 'worker', ts: start, dur: end - start });
+            }
+        }
+    };
+}
+
+function observePerformance(buffer) {
+    if (typeof PerformanceObserver === 'undefined') return;
+    const supported = PerformanceObserver.supportedEntryTypes || [];
+    if (supported.includes('longtask')) {
+        new PerformanceObserver(list => list.getEntries().forEach(entry => {
+            buffer.push({ name: 'longtask', cat: 'longtask', ts: entry.startTime, dur: entry.duration });
+        })).observe({ type: 'longtask', buffered: true });
+    }
+    if (supported.includes('layout-shift')) {
+        new PerformanceObserver(list => list.getEntries().forEach(entry => {
+            buffer.push({
+                name: 'layout-shift',
+                cat: 'layout-shift',
+                ts: entry.startTime,
+                args: { value: entry.value, hadRecentInput: entry.hadRecentInput }
+            });
+        })).observe({ type: 'layout-shift', buffered: true });
+    }
+}
+
+function startTracing() {
+    const buffer = new TraceBuffer();
+    window.__plonterTrace = buffer;
+    Object.keys(TRACED_FUNCTIONS).forEach(category => {
+        TRACED_FUNCTIONS[category].forEach(name => traceFunction(buffer, category, name));
+    });
+    traceValidationService(buffer);
+    observePerformance(buffer);
+}
+
+if (TRACE_ENABLED) startTracing();
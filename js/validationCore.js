@@ -0,0 +1,478 @@
+// Validation core: sentence-model, agreement and arch checks that work on
+// plain data (words, combinations, arches) and never touch the DOM.
+// Used by the app and, together with combinations.js, word.js and
+// archIndex.js, by validate_batch.py to grade analyses in bulk.
+
+// Validate sentence model (A, B, or C) with strict index-based validation
+function validateSentenceModel(arch, words) {
+    const isClause = arch.isClause;
+    const isMainRoof = arch.isMainRoof;
+    
+    if (!isMainRoof && !isClause) {
+        return { valid: false, color: '#667eea', message: 'לא הוגדר גג ראשי או פסוקית' };
+    }
+    
+    if (!arch.model) {
+        return { valid: false, color: '#3b82f6', message: 'חסר מודל משפט - יש לבחור דגם A, B או C' };
+    }
+    
+    const word1 = findWord(words, arch.wordId1);
+    const word2 = findWord(words, arch.wordId2);
+    
+    if (!word1 || !word2) {
+        return { valid: false, color: '#667eea', message: 'חסרות מילים' };
+    }
+    
+    // Get word indices (linear position in sentence)
+    const index1 = findWordPosition(words, arch.wordId1);
+    const index2 = findWordPosition(words, arch.wordId2);
+    
+    // Find all parts of speech for both words
+    const pos1List = word1.partsOfSpeech;
+    const pos2List = word2.partsOfSpeech;
+    
+    if (pos1List.length === 0 || pos2List.length === 0) {
+        return { valid: false, color: '#3b82f6', message: 'חסרים חלקי דיבר - יש להוסיף תגי PoS למילים' };
+    }
+    
+    // Model A (Verbal Sentence / جملة فعلية): Predicate (Verb) before Subject (Noun/Pronoun)
+    if (arch.model === 'A') {
+        // Required: 1 Predicate (Must be a Verb) and 1 Subject (Noun/Pronoun)
+        const predicate = pos1List.find(p => p.type === 'verb') || pos2List.find(p => p.type === 'verb');
+        const subject = pos1List.find(p => p.type === 'noun' || p.type === 'personalPronoun') || 
+                       pos2List.find(p => p.type === 'noun' || p.type === 'personalPronoun');
+        
+        // Component Type Check: Predicate must be Verb
+        if (!predicate) {
+            return { valid: false, color: '#3b82f6', message: 'מודל A דורש פועל (נשוא) - חסר תג פועל' };
+        }
+        
+        if (predicate.type !== 'verb') {
+            return { valid: false, color: '#ef4444', message: 'במודל A, הנשוא חייב להיות פועל - לא ניתן לסמן שם עצם כנשוא' };
+        }
+        
+        if (!subject) {
+            return { valid: false, color: '#3b82f6', message: 'מודל A דורש נושא (שם עצם או כינוי גוף) - חסר תג נושא' };
+        }
+        
+        // Get indices of predicate and subject
+        const predWord = predicate === pos1List.find(p => p.type === 'verb') ? word1 : word2;
+        const subjWord = subject === pos1List.find(p => p.type === 'noun' || p.type === 'personalPronoun') ? word1 : word2;
+        const predIndex = findWordPosition(words, predWord.id);
+        const subjIndex = findWordPosition(words, subjWord.id);
+        
+        // Order Rule: Index of Predicate MUST BE LESS than Index of Subject
+        if (predIndex >= subjIndex) {
+            return { valid: false, color: '#ef4444', message: 'במודל A, הפועל (נשוא) חייב לבוא לפני הנושא. מיקום הפועל: ' + predIndex + ', מיקום הנושא: ' + subjIndex };
+        }
+        
+        // Check agreement (gender, number) between subject and predicate
+        const agreementIssues = checkSubjectPredicateAgreement(subject, predicate);
+        if (agreementIssues.length > 0) {
+            return { valid: false, color: '#ef4444', message: `חוסר התאמה: ${agreementIssues.join(', ')}` };
+    }
+    
+        return { valid: true, color: '#10b981', message: 'מודל A תקין - נשוא פועלי לפני נושא' };
+    }
+    
+    // Model B (Nominal Sentence / جملة اسمية): Subject (Mubtada) before Predicate (Khabar)
+    if (arch.model === 'B') {
+        // Required: 1 Subject (Mubtada - Noun) and 1 Predicate (Khabar - non-verb)
+        const subject = pos1List.find(p => p.type === 'noun') || pos2List.find(p => p.type === 'noun');
+        // Predicate can be noun, adjective, or other non-verb
+        const predicate = pos1List.find(p => p.type !== 'verb' && p !== subject) || 
+                         pos2List.find(p => p.type !== 'verb' && p !== subject);
+        
+        if (!subject) {
+            return { valid: false, color: '#3b82f6', message: 'מודל B דורש נושא (מתחיל) - חסר תג שם עצם' };
+        }
+        
+        if (!predicate) {
+            return { valid: false, color: '#3b82f6', message: 'מודל B דורש נשוא (חבר) - חסר נשוא' };
+        }
+        
+        // Get indices
+        const subjWord = subject === pos1List.find(p => p.type === 'noun') ? word1 : word2;
+        const predWord = predicate === pos1List.find(p => p !== subject && p.type !== 'verb') ? word1 : word2;
+        const subjIndex = findWordPosition(words, subjWord.id);
+        const predIndex = findWordPosition(words, predWord.id);
+        
+        // Order Rule: Index of Subject MUST BE LESS than Index of Predicate
+        if (subjIndex >= predIndex) {
+            return { valid: false, color: '#ef4444', message: 'במודל B, הנושא (מתחיל) חייב לבוא לפני הנשוא (חבר). מיקום הנושא: ' + subjIndex + ', מיקום הנשוא: ' + predIndex };
+        }
+        
+        // Check agreement if predicate is adjective
+        if (predicate.type === 'adjective') {
+            const agreementIssues = checkNounAdjectiveAgreement(subject, predicate);
+            if (agreementIssues.length > 0) {
+                return { valid: false, color: '#ef4444', message: `חוסר התאמה: ${agreementIssues.join(', ')}` };
+            }
+        }
+        
+        return { valid: true, color: '#10b981', message: 'מודל B תקין - נושא לפני נשוא שמני' };
+    }
+    
+    // Model C (Inverted Nominal / شبه جملة): Predicate (Prepositional Phrase/Adverb) before Subject (Noun)
+    if (arch.model === 'C') {
+        // Required: 1 Predicate (Must be Preposition or Adverb) and 1 Subject (Noun)
+        const predicate = pos1List.find(p => p.type === 'preposition' || p.type === 'adverb') || 
+                         pos2List.find(p => p.type === 'preposition' || p.type === 'adverb');
+        const subject = pos1List.find(p => p.type === 'noun') || pos2List.find(p => p.type === 'noun');
+        
+        if (!predicate) {
+            return { valid: false, color: '#3b82f6', message: 'מודל C דורש נשוא (מילית יחס או תואר פועל) - חסר תג נשוא' };
+        }
+        
+        // Component Type Check: Predicate must be Preposition or Adverb
+        if (predicate.type !== 'preposition' && predicate.type !== 'adverb') {
+            return { valid: false, color: '#ef4444', message: 'במודל C, הנשוא חייב להיות מילית יחס או תואר פועל - לא ניתן לסמן שם עצם כנשוא' };
+        }
+        
+        if (!subject) {
+            return { valid: false, color: '#3b82f6', message: 'מודל C דורש נושא (שם עצם) - חסר תג שם עצם' };
+        }
+        
+        // Get indices
+        const predWord = predicate === pos1List.find(p => p.type === 'preposition' || p.type === 'adverb') ? word1 : word2;
+        const subjWord = subject === pos1List.find(p => p.type === 'noun') ? word1 : word2;
+        const predIndex = findWordPosition(words, predWord.id);
+        const subjIndex = findWordPosition(words, subjWord.id);
+        
+        // Order Rule: Index of Predicate MUST BE LESS than Index of Subject
+        if (predIndex >= subjIndex) {
+            return { valid: false, color: '#ef4444', message: 'במודל C, הנשוא חייב לבוא לפני הנושא. מיקום הנשוא: ' + predIndex + ', מיקום הנושא: ' + subjIndex };
+        }
+        
+        return { valid: true, color: '#10b981', message: 'מודל C תקין - נשוא מילית יחס/תואר פועל לפני נושא' };
+    }
+    
+    return { valid: false, color: '#667eea', message: 'מודל לא מוכר' };
+}
+
+// Check agreement between subject and predicate (for Model A)
+function checkSubjectPredicateAgreement(subject, predicate) {
+    const issues = [];
+    
+    // Check number agreement (if predicate has number info)
+    if (predicate.details.personGender) {
+        // Extract number from personGender (e.g., "נסתר" = singular, "נסתרים" = plural)
+        const predNumber = Array.isArray(predicate.details.personGender) 
+            ? predicate.details.personGender[0] 
+            : predicate.details.personGender;
+        
+        const subjNumber = subject.details.number;
+        
+        if (subjNumber && predNumber) {
+            const isPredPlural = predNumber.includes('ים') || predNumber.includes('ות');
+            const isSubjPlural = subjNumber === 'רבים' || subjNumber === 'רבות';
+            
+            if (isPredPlural !== isSubjPlural && !predNumber.includes('נסתר') && !predNumber.includes('נסתרת')) {
+                // Allow some flexibility, but check if clearly mismatched
+            }
+        }
+    }
+    
+    // Check gender agreement
+    if (predicate.details.personGender && subject.details.gender) {
+        const predGender = Array.isArray(predicate.details.personGender) 
+            ? predicate.details.personGender[0] 
+            : predicate.details.personGender;
+        const subjGender = Array.isArray(subject.details.gender) 
+            ? subject.details.gender[0] 
+            : subject.details.gender;
+        
+        const isPredFem = predGender && (predGender.includes('ת') || predGender === 'נסתרת' || predGender === 'נוכחת');
+        const isSubjFem = subjGender === 'נקבה';
+        
+        if (isPredFem !== isSubjFem && !predGender.includes('נסתר')) {
+            issues.push('מין');
+        }
+    }
+    
+    return issues;
+}
+
+// Check agreement between noun and adjective (for Model B with adjective predicate)
+function checkNounAdjectiveAgreement(noun, adjective) {
+    const issues = [];
+    
+    // Use existing validation from combinations.js
+    const requiredFields = ['gender', 'number', 'definiteness'];
+    
+    for (const field of requiredFields) {
+        if (noun.details[field] && adjective.details[field]) {
+            const nounVal = Array.isArray(noun.details[field]) ? noun.details[field] : [noun.details[field]];
+            const adjVal = Array.isArray(adjective.details[field]) ? adjective.details[field] : [adjective.details[field]];
+            
+            if (!nounVal.some(v => adjVal.includes(v))) {
+                const fieldNames = {
+                    gender: 'מין',
+                    number: 'מספר',
+                    definiteness: 'יידוע'
+                };
+                issues.push(fieldNames[field] || field);
+            }
+        }
+    }
+    
+    return issues;
+}
+
+// Check if combination chain ends with preposition (incomplete prepositional phrase)
+function checkCombinationEndsWithPreposition(chain, combTypes, words) {
+    if (chain.length === 0) return false;
+
+    // Get the last combination in the chain
+    const lastComb = chain[chain.length - 1];
+    const word2 = findWord(words, lastComb.wordId2);
+    const pos2 = word2?.getPartOfSpeech(lastComb.posId2);
+    
+    // Check if last part is preposition (incomplete - waiting for noun)
+    if (pos2?.type === 'preposition') {
+        return true;
+    }
+    
+    // Also check if any combination in the chain is incomplete and involves a preposition
+    // This handles cases like nominal phrase + preposition (ولد كبير في)
+    for (const comb of combTypes) {
+        if (!comb.complete || comb.type === 'incomplete') {
+            const word1 = findWord(words, comb.wordId1);
+            const word2 = findWord(words, comb.wordId2);
+            const pos1 = word1?.getPartOfSpeech(comb.posId1);
+            const pos2 = word2?.getPartOfSpeech(comb.posId2);
+            
+            // If this combination involves a preposition and is incomplete
+            if ((pos1?.type === 'preposition' || pos2?.type === 'preposition') && 
+                (comb.type === 'incomplete' || !comb.complete)) {
+                return true;
+            }
+        }
+    }
+    
+    return false;
+}
+
+// Check if arch matches combinations below it
+function checkArchMatchesCombinations(arch, words, combinations) {
+    const word1 = findWord(words, arch.wordId1);
+    const word2 = findWord(words, arch.wordId2);
+    
+    if (!word1 || !word2) return true; // If words don't exist, don't show error
+    
+    // Check if there are combinations between the words covered by this arch
+    const index1 = findWordPosition(words, arch.wordId1);
+    const index2 = findWordPosition(words, arch.wordId2);
+    const start = Math.min(index1, index2);
+    const end = Math.max(index1, index2);
+    
+    // Find all combinations between words in this arch range
+    const archCombinations = combinations.filter(c => {
+        const cIndex1 = findWordPosition(words, c.wordId1);
+        const cIndex2 = findWordPosition(words, c.wordId2);
+        return (cIndex1 >= start && cIndex1 <= end) && (cIndex2 >= start && cIndex2 <= end);
+    });
+    
+    // If there are no combinations, arch is valid (no mismatch)
+    if (archCombinations.length === 0) return true;
+    
+    // Check if combinations are complete (green) - if all are complete, arch matches
+    const allComplete = archCombinations.every(c => c.complete && c.type === 'valid');
+    
+    return allComplete;
+}
+
+// ========== BATCH VALIDATION ==========
+// An analysis is plain JSON, positions are word/part indices:
+// {
+//   id, stageId | sentence,
+//   words: [{ partsOfSpeech: [{ type, details }] }],          // one entry per word
+//   combinations: [{ word1, pos1, word2, pos2 }],
+//   arches: [{ start, end, role, isMainRoof, isClause, model, externalRole }]
+// }
+
+// Rebuild words, combinations and arches from an analysis, replaying them the
+// way the app does when a student clicks them in order
+function buildAnalysisModel(analysis) {
+    const errors = [];
+    const stage = analysis.stageId && typeof getStageById === 'function' ? getStageById(analysis.stageId) : null;
+    const sentence = analysis.sentence || (stage ? stage.sentence : '');
+    if (!sentence) {
+        errors.push('missing sentence or unknown stageId');
+    }
+
+    const words = sentence.split(/\s+/).filter(word => word.trim()).map((text, index) => createWord(`word_${index}`, text));
+    (analysis.words || []).forEach((entry, index) => {
+        if (!words[index]) {
+            errors.push(`word ${index} is outside the sentence`);
+            return;
+        }
+        (entry.partsOfSpeech || []).forEach(pos => {
+            words[index].addPartOfSpeech(pos.type, pos.details || getDefaultDetails(pos.type));
+        });
+    });
+
+    const partAt = (wordIndex, posIndex = 0) => words[wordIndex]?.partsOfSpeech[posIndex];
+
+    const combinations = [];
+    const combinationResults = (analysis.combinations || []).map(entry => {
+        // Rightmost word (lower index) first, as in handlePartClick()
+        let [word1, pos1, word2, pos2] = [entry.word1, entry.pos1 || 0, entry.word2, entry.pos2 || 0];
+        if (word1 > word2) {
+            [word1, pos1, word2, pos2] = [word2, pos2, word1, pos1];
+        }
+        const part1 = partAt(word1, pos1);
+        const part2 = partAt(word2, pos2);
+        if (!part1 || !part2) {
+            return { word1, word2, valid: false, complete: false, type: 'invalid', message: 'unknown word or part of speech' };
+        }
+
+        const wordId1 = words[word1].id;
+        const wordId2 = words[word2].id;
+        const result = validateCombination(part1, part2, wordId1, wordId2, words, combinations);
+        const exists = combinations.some(c => c.posId1 === part1.id && c.posId2 === part2.id);
+        if (result.valid && !exists) {
+            combinations.push({
+                wordId1: wordId1,
+                posId1: part1.id,
+                wordId2: wordId2,
+                posId2: part2.id,
+                complete: result.complete,
+                type: result.complete ? (result.type || 'valid') : 'incomplete',
+                isDemonstrative: !!result.isDemonstrative
+            });
+        }
+        return { word1, word2, valid: result.valid, complete: result.complete, type: result.type, message: result.message };
+    });
+
+    const arches = [];
+    const index = new ArchIndex().reset(words, arches);
+    const archResults = (analysis.arches || []).map((entry, archNumber) => {
+        const start = Math.min(entry.start, entry.end);
+        const end = Math.max(entry.start, entry.end);
+        const base = { start, end, accepted: false };
+        if (!words[start] || !words[end]) {
+            return { ...base, error: 'arch is outside the sentence' };
+        }
+        if (arches.some(a => a.wordId1 === words[start].id && a.wordId2 === words[end].id)) {
+            return { ...base, error: 'duplicate arch' };
+        }
+        if (index.crosses(start, end)) {
+            return { ...base, error: 'partial overlap with another arch' };
+        }
+
+        const arch = {
+            id: `arch_${archNumber}`,
+            wordId1: words[start].id,
+            wordId2: words[end].id,
+            height: 120 - index.depth(start, end) * 40,
+            syntacticRole: entry.isClause ? null : (entry.role || null),
+            isMainRoof: !!entry.isMainRoof,
+            model: entry.model || null,
+            isClause: !!entry.isClause,
+            externalRole: entry.isClause ? (entry.externalRole || entry.role || null) : null,
+            validation: null,
+            clauseValidation: null
+        };
+        arches.push(arch);
+        index.add(arch);
+        return { ...base, accepted: true, arch };
+    });
+
+    return { sentence, words, combinations, arches, combinationResults, archResults, errors };
+}
+
+// Validate one analysis; optionally grade it against an answer key analysis
+function validateAnalysis(analysis, key = null) {
+    const model = buildAnalysisModel(analysis);
+
+    const arches = model.archResults.map(result => {
+        if (!result.accepted) return result;
+        const { arch, ...rest } = result;
+        const validation = (arch.isMainRoof || arch.isClause) && arch.model
+            ? validateSentenceModel(arch, model.words)
+            : null;
+        return {
+            ...rest,
+            matchesCombinations: checkArchMatchesCombinations(arch, model.words, model.combinations),
+            validation: validation ? { valid: validation.valid, message: validation.message } : null
+        };
+    });
+
+    const ok = model.errors.length === 0 &&
+        model.combinationResults.every(c => c.valid && c.complete) &&
+        arches.every(a => a.accepted && a.matchesCombinations && (!a.validation || a.validation.valid));
+
+    const result = {
+        id: analysis.id ?? null,
+        ok: ok,
+        wordCount: model.words.length,
+        combinations: model.combinationResults,
+        arches: arches,
+        errors: model.errors
+    };
+    if (key) {
+        result.comparison = compareWithKey(analysis, key);
+    }
+    return result;
+}
+
+// Normalized comparable items of an analysis: part-of-speech tags,
+// combinations and arches, each as a string
+function getAnalysisItems(analysis) {
+    const typeAt = (wordIndex, posIndex = 0) =>
+        analysis.words?.[wordIndex]?.partsOfSpeech?.[posIndex]?.type ?? '?';
+
+    const pos = [];
+    (analysis.words || []).forEach((entry, wordIndex) => {
+        (entry.partsOfSpeech || []).forEach(p => pos.push(`${wordIndex}:${p.type}`));
+    });
+    const combs = (analysis.combinations || []).map(c => {
+        const a = `${c.word1}:${typeAt(c.word1, c.pos1)}`;
+        const b = `${c.word2}:${typeAt(c.word2, c.pos2)}`;
+        return c.word1 <= c.word2 ? `${a}-${b}` : `${b}-${a}`;
+    });
+    const arches = (analysis.arches || []).map(a => {
+        const role = a.isClause ? `clause:${a.externalRole || a.role || ''}` : (a.role || '');
+        return `${Math.min(a.start, a.end)}-${Math.max(a.start, a.end)}:${role}:${a.model || ''}:${a.isMainRoof ? 'main' : ''}`;
+    });
+    return { pos, combinations: combs, arches };
+}
+
+// Compare a submission with an answer key, item by item
+function compareWithKey(analysis, key) {
+    const submitted = getAnalysisItems(analysis);
+    const expected = getAnalysisItems(key);
+    const comparison = {};
+    let matchedTotal = 0;
+    let expectedTotal = 0;
+
+    ['pos', 'combinations', 'arches'].forEach(section => {
+        const have = new Set(submitted[section]);
+        const want = new Set(expected[section]);
+        const matched = [...want].filter(item => have.has(item));
+        comparison[section] = {
+            matched: matched.length,
+            missing: [...want].filter(item => !have.has(item)),
+            extra: [...have].filter(item => !want.has(item))
+        };
+        matchedTotal += matched.length;
+        expectedTotal += want.size;
+    });
+
+    comparison.score = expectedTotal ? Math.round(matchedTotal / expectedTotal * 1000) / 1000 : 1;
+    return comparison;
+}
+
+// Validate many analyses; a broken one yields an error result instead of
+// aborting the batch. keys maps stageId (or sentence) to an answer key.
+function validateAnalyses(analyses, keys = {}) {
+    return analyses.map(analysis => {
+        try {
+            const key = analysis.key || keys[analysis.stageId] || keys[analysis.sentence] || null;
+            return validateAnalysis(analysis, key);
+        } catch (error) {
+            return { id: analysis?.id ?? null, ok: false, errors: [String(error && error.message || error)] };
+        }
+    });
+}
@@ -0,0 +1,239 @@
+// Validation service: the render-time checks (sentence models of main roofs
+// and clauses, arch/combination matching, chains ending in a preposition, and
+// re-validating combinations after part-of-speech edits) run in a Web Worker
+// so the UI thread never waits for them.
+//
+// This file is loaded twice: as a page script, where it defines the
+// ValidationService client, and as the worker itself, where it pulls in the
+// validation core and answers requests.
+//
+// Protocol: the page posts { pass, id, payload } with payload a JSON snapshot
+// of the words, combinations and arches involved; the worker answers
+// { pass, id, result } or { pass, id, error }. Each pass has at most one
+// request in flight. A newer snapshot waits behind it and replaces any older
+// waiting one; the answer to a request that has been superseded is dropped.
+// Results are applied through the callback registered for the pass, and
+// listeners hear about them so the next render can pick them up.
+//
+// Without worker support (file://, no Worker, script failed to load) the same
+// passes run synchronously on the page.
+
+// Words arrive from the worker protocol as plain objects
+function restoreWords(words) {
+    return words.map(word => word instanceof Word ? word : Word.fromData(word));
+}
+
+function getPartOfSpeechOf(wordsById, wordId, posId) {
+    const word = wordsById.get(wordId);
+    return word ? word.getPartOfSpeech(posId) : undefined;
+}
+
+const VALIDATION_PASSES = {
+    // { words, combinations, arches } -> { archId: { validation?, clauseValidation?, matches } }
+    arches({ words, combinations, arches }) {
+        words = restoreWords(words);
+        const results = {};
+        arches.forEach(arch => {
+            const result = { matches: checkArchMatchesCombinations(arch, words, combinations) };
+            if (arch.isMainRoof && arch.model) result.validation = validateSentenceModel(arch, words);
+            if (arch.isClause && arch.model) result.clauseValidation = validateSentenceModel(arch, words);
+            results[arch.id] = result;
+        });
+        return results;
+    },
+
+    // { words, chains: [{ key, chain, combTypes }] } -> { key: endsWithPreposition }
+    chains({ words, chains }) {
+        words = restoreWords(words);
+        const results = {};
+        chains.forEach(({ key, chain, combTypes }) => {
+            results[key] = checkCombinationEndsWithPreposition(chain, combTypes, words);
+        });
+        return results;
+    },
+
+    // { words, combinations, targets: [combination index] } -> [{ wordId1, posId1, wordId2, posId2, valid, complete }]
+    // Targets are validated in order against a working copy that already
+    // reflects the earlier ones, as the app used to do in place
+    combinations({ words, combinations, targets }) {
+        words = restoreWords(words);
+        const wordsById = new Map(words.map(word => [word.id, word]));
+        let combs = combinations.map(comb => ({ ...comb }));
+        const results = [];
+        targets.map(index => combs[index]).forEach(comb => {
+            const pos1 = getPartOfSpeechOf(wordsById, comb.wordId1, comb.posId1);
+            const pos2 = getPartOfSpeechOf(wordsById, comb.wordId2, comb.posId2);
+            if (!pos1 || !pos2) return;
+
+            const result = validateCombination(pos1, pos2, comb.wordId1, comb.wordId2, words, combs);
+            comb.complete = result.valid && result.complete;
+            comb.type = result.valid && result.complete ? 'valid' : (result.valid ? 'incomplete' : 'invalid');
+            invalidatePhraseIndex();
+            if (!result.valid) combs = combs.filter(c => c !== comb);
+            results.push({
+                wordId1: comb.wordId1,
+                posId1: comb.posId1,
+                wordId2: comb.wordId2,
+                posId2: comb.posId2,
+                valid: result.valid,
+                complete: result.complete
+            });
+        });
+        return results;
+    }
+};
+
+const IS_VALIDATION_WORKER = typeof importScripts === 'function' && typeof document === 'undefined';
+
+if (IS_VALIDATION_WORKER) {
+    // The production bundle already contains the core; in development load it next to this file
+    if (typeof validateSentenceModel === 'undefined') {
+        importScripts('partsOfSpeech.js', 'word.js', 'combinations.js', 'archIndex.js', 'validationCore.js');
+    }
+
+    self.onmessage = event => {
+        const { pass, id, payload } = event.data;
+        try {
+            self.postMessage({ pass, id, result: VALIDATION_PASSES[pass](JSON.parse(payload)) });
+        } catch (err) {
+            self.postMessage({ pass, id, error: String(err && err.message || err) });
+        }
+    };
+}
+
+class ValidationService {
+    constructor(workerUrl) {
+        this.workerUrl = workerUrl;
+        this.worker = undefined;   // created on first use; null = run synchronously
+        this.nextId = 1;
+        this.passes = new Map();   // pass -> { inFlight, queued, signature, result, resultSignature }
+        this.appliers = new Map(); // pass -> callback(result)
+        this.listeners = [];
+    }
+
+    // Apply the results of a pass to the model (called for every result that is used)
+    onResult(pass, apply) {
+        this.appliers.set(pass, apply);
+    }
+
+    // Called with (pass, changed) whenever a worker answer has been handled
+    onUpdate(listener) {
+        this.listeners.push(listener);
+    }
+
+    getWorker() {
+        if (this.worker === undefined) {
+            this.worker = null;
+            if (typeof Worker !== 'undefined' && location.protocol !== 'file:') {
+                try {
+                    this.worker = new Worker(this.workerUrl);
+                    this.worker.onmessage = event => this.receive(event.data);
+                    this.worker.onerror = event => this.fallBack(event);
+                } catch (err) {
+                    console.warn('Validation: worker unavailable, validating on the page', err);
+                    this.worker = null;
+                }
+            }
+        }
+        return this.worker;
+    }
+
+    state(pass) {
+        if (!this.passes.has(pass)) {
+            this.passes.set(pass, { inFlight: 0, queued: null, signature: null, result: null, resultSignature: null });
+        }
+        return this.passes.get(pass);
+    }
+
+    // Requests still waiting for the worker
+    isBusy() {
+        for (const state of this.passes.values()) {
+            if (state.inFlight || state.queued) return true;
+        }
+        return false;
+    }
+
+    // Validate a snapshot. Synchronous mode returns the fresh result; worker
+    // mode returns the latest applied result (null before the first one) and
+    // delivers the fresh one later through onResult/onUpdate.
+    run(pass, payload) {
+        if (!this.getWorker()) {
+            return this.applySync(pass, VALIDATION_PASSES[pass](payload));
+        }
+        const state = this.state(pass);
+        const signature = JSON.stringify(payload); // the snapshot; later model edits cannot leak into it
+        if (signature !== state.signature) {
+            state.signature = signature;
+            const request = { pass, id: this.nextId++, payload: signature };
+            if (state.inFlight) {
+                state.queued = request;
+            } else {
+                this.post(state, request);
+            }
+        }
+        return state.result;
+    }
+
+    post(state, request) {
+        state.inFlight = request.id;
+        this.worker.postMessage(request);
+    }
+
+    receive({ pass, id, result, error }) {
+        const state = this.passes.get(pass);
+        if (!state || state.inFlight !== id) return; // answer to a request from before reset()
+        state.inFlight = 0;
+        if (state.queued) {
+            // Superseded while it ran: drop it and validate the newest snapshot
+            const queued = state.queued;
+            state.queued = null;
+            this.post(state, queued);
+            return;
+        }
+
+        let changed = false;
+        if (error) {
+            console.warn(`Validation: ${pass} pass failed in the worker`, error);
+        } else {
+            const resultSignature = JSON.stringify(result);
+            changed = resultSignature !== state.resultSignature;
+            state.result = result;
+            state.resultSignature = resultSignature;
+            const apply = this.appliers.get(pass);
+            if (apply) apply(result);
+        }
+        this.listeners.forEach(listener => listener(pass, changed));
+    }
+
+    applySync(pass, result) {
+        const apply = this.appliers.get(pass);
+        if (apply) apply(result);
+        return result;
+    }
+
+    // The worker could not start or crashed: validate the outstanding
+    // snapshots on the page and stay synchronous from now on
+    fallBack(event) {
+        console.warn('Validation: worker failed, validating on the page', event && event.message);
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        this.passes.forEach((state, pass) => {
+            const waiting = state.inFlight || state.queued;
+            state.inFlight = 0;
+            state.queued = null;
+            if (!waiting || state.signature === null) return;
+            state.result = this.applySync(pass, VALIDATION_PASSES[pass](JSON.parse(state.signature)));
+            this.listeners.forEach(listener => listener(pass, true));
+        });
+    }
+
+    // Forget every result and drop the answers still on their way (new sentence)
+    reset() {
+        this.passes.clear();
+    }
+}
+
+// The production build sets VALIDATION_WORKER_URL to its hashed worker bundle
+const validationService = IS_VALIDATION_WORKER ? null : new ValidationService(
+    typeof VALIDATION_WORKER_URL !== 'undefined' ? VALIDATION_WORKER_URL : 'js/validationWorker.js'
+);
@@ -1,71 +1,101 @@
 // Word data structure and methods
+//
+// Parts of speech get small integer ids (unique for the page's lifetime) and
+// copy-on-write details: a details object is frozen once normalized, edits
+// replace it with a new one and bump pos.version, so anything derived from a
+// details object (interned feature masks, memoized validation) stays valid
+// for as long as it is current.
+
+let nextPartOfSpeechId = 1;
 
 class Word {
     constructor(id, text) {
         this.id = id;
         this.text = text;
         this.partsOfSpeech = []; // Array of PartOfSpeech objects
+        this.partIndex = new Map(); // pos id -> PartOfSpeech
+    }
+
+    // A Word from its plain-data form (JSON snapshot, worker message)
+    static fromData(data) {
+        const word = new Word(data.id, data.text);
+        data.partsOfSpeech.forEach(pos => {
+            word.partsOfSpeech.push(pos);
+            word.partIndex.set(pos.id, pos);
+        });
+        return word;
     }
 
     addPartOfSpeech(type, details = {}) {
         // Normalize array fields for homonymy support
         const normalizedDetails = this.normalizeDetails(type, details);
-        
+
         const partOfSpeech = {
-            id: `${this.id}_pos_${Date.now()}_${Math.random()}`,
+            id: nextPartOfSpeechId++,
             type: type,
-            details: normalizedDetails
+            details: normalizedDetails,
+            version: 1 // bumped when the details change; combination validation is memoized on it
         };
         this.partsOfSpeech.push(partOfSpeech);
+        this.partIndex.set(partOfSpeech.id, partOfSpeech);
         return partOfSpeech;
     }
 
-    // Normalize details to support arrays for homonymy
+    // Normalize details to support arrays for homonymy. Returns a frozen
+    // object; details that are already normalized and frozen are shared as is.
     normalizeDetails(type, details) {
+        const arrayFields = type === 'verb' ? VERB_ARRAY_FIELDS : [];
+        const hasCases = type === 'noun' || type === 'adjective';
+        const needsCopy = !Object.isFrozen(details) ||
+            arrayFields.some(field => details[field] && !Array.isArray(details[field])) ||
+            (hasCases && !Array.isArray(details.cases));
+        if (!needsCopy) return details;
+
         const normalized = { ...details };
-        
+
         // Convert single values to arrays for multi-select fields
-        if (type === 'verb') {
-            if (normalized.root && !Array.isArray(normalized.root)) {
-                normalized.root = [normalized.root];
-            }
-            if (normalized.time && !Array.isArray(normalized.time)) {
-                normalized.time = [normalized.time];
+        arrayFields.forEach(field => {
+            if (normalized[field] && !Array.isArray(normalized[field])) {
+                normalized[field] = [normalized[field]];
             }
-            if (normalized.personGender && !Array.isArray(normalized.personGender)) {
-                normalized.personGender = [normalized.personGender];
-            }
-            if (normalized.binyan && !Array.isArray(normalized.binyan)) {
-                normalized.binyan = [normalized.binyan];
-            }
-        }
-        
+        });
+
         // Cases are always arrays (multi-checkbox) for nouns and adjectives
-        if ((type === 'noun' || type === 'adjective') && normalized.cases) {
+        if (hasCases && normalized.cases) {
             if (!Array.isArray(normalized.cases)) {
                 normalized.cases = [normalized.cases];
             }
-        } else if ((type === 'noun' || type === 'adjective') && !normalized.cases) {
+        } else if (hasCases && !normalized.cases) {
             // Default: all cases checked
             normalized.cases = ['יחסה ראשונה', 'יחסה שנייה', 'יחסה שלישית'];
         }
-        
-        return normalized;
+
+        return freezeDetails(normalized);
     }
 
     removePartOfSpeech(posId) {
         this.partsOfSpeech = this.partsOfSpeech.filter(pos => pos.id !== posId);
+        this.partIndex.delete(posId);
     }
 
+    // Returns whether the details actually changed
     updatePartOfSpeechDetails(posId, details) {
-        const pos = this.partsOfSpeech.find(p => p.id === posId);
-        if (pos) {
-            pos.details = { ...pos.details, ...details };
-        }
+        const pos = this.partIndex.get(posId);
+        if (!pos) return false;
+        const merged = { ...pos.details, ...details };
+        if (JSON.stringify(merged) === JSON.stringify(pos.details)) return false;
+        pos.details = freezeDetails(merged);
+        pos.version = (pos.version || 0) + 1;
+        return true;
+    }
+
+    // Plain-data form for snapshots and worker messages (without the index)
+    toJSON() {
+        return { id: this.id, text: this.text, partsOfSpeech: this.partsOfSpeech };
     }
 
     getPartOfSpeech(posId) {
-        return this.partsOfSpeech.find(p => p.id === posId);
+        return this.partIndex.get(posId);
     }
 
     hasPartOfSpeech() {
@@ -73,8 +103,56 @@ class Word {
     }
 }
 
+const VERB_ARRAY_FIELDS = ['root', 'time', 'personGender', 'binyan'];
+
+// Details are shared between parts, snapshots and caches, never edited in place
+function freezeDetails(details) {
+    Object.values(details).forEach(value => {
+        if (Array.isArray(value)) Object.freeze(value);
+    });
+    return Object.freeze(details);
+}
+
 // Helper function to create a Word instance
 function createWord(id, text) {
     return new Word(id, text);
 }
 
+// id -> Word and id -> position for one words array. Every lookup by word id
+// goes through here; the index is rebuilt whenever a different array (or one
+// of a different length) is passed, so callers never have to invalidate it.
+class WordIndex {
+    constructor() {
+        this.words = null;
+        this.length = 0;
+        this.byId = new Map();      // word id -> Word
+        this.positions = new Map(); // word id -> index in the array
+    }
+
+    sync(words) {
+        if (this.words !== words || this.length !== words.length) {
+            this.words = words;
+            this.length = words.length;
+            this.byId = new Map();
+            this.positions = new Map();
+            words.forEach((word, index) => {
+                this.byId.set(word.id, word);
+                this.positions.set(word.id, index);
+            });
+        }
+        return this;
+    }
+}
+
+const wordIndex = new WordIndex();
+
+// The word with this id, or undefined
+function findWord(words, wordId) {
+    return wordIndex.sync(words).byId.get(wordId);
+}
+
+// Position of the word with this id, or -1
+function findWordPosition(words, wordId) {
+    const position = wordIndex.sync(words).positions.get(wordId);
+    return position === undefined ? -1 : position;
+}
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Load test for the Plonter static server.
+Simulates a classroom of clients loading the app at the same time: each client
+keeps one connection open and repeatedly fetches the page and every script and
+stylesheet it references, the way a browser does on a cold load. Reports
+throughput and latency percentiles.
+
+Usage:
+    python3 load_test.py                                  # start serve.py in-process, 30 clients for 10s
+    python3 load_test.py --clients 60 --duration 20 --dist
+    python3 load_test.py --url http://192.168.1.10:8080/  # hit a server that is already running
+    python3 load_test.py --compare                        # also run against http.server.SimpleHTTPRequestHandler
+    python3 load_test.py --revalidate                     # send If-None-Match like a warm browser cache
+"""
+
+import argparse
+import functools
+import http.client
+import http.server
+import math
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import serve
+
+LOAD_PORT = 8795
+COMPARE_PORT = 8796
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def discover_assets(base_url):
+    """The page plus every local script and stylesheet it references."""
+    with urllib.request.urlopen(base_url, timeout=5) as resp:
+        html = resp.read().decode('utf-8', 'replace')
+    base_path = urllib.parse.urlsplit(base_url).path or '/'
+    paths = [base_path]
+    for ref in re.findall(r'(?:src|href)="([^"]+\.(?:js|css))"', html):
+        if '://' not in ref and ref not in paths:
+            paths.append(urllib.parse.urljoin(base_path, ref))
+    return paths
+
+def run_client(host, port, paths, deadline, headers, revalidate, stats):
+    latencies = []
+    statuses = {}
+    transferred = 0
+    errors = 0
+    etags = {}
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    while time.perf_counter() < deadline:
+        for path in paths:
+            request_headers = dict(headers)
+            if revalidate and path in etags:
+                request_headers['If-None-Match'] = etags[path]
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=request_headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            transferred += len(body)
+            if resp.getheader('ETag'):
+                etags[path] = resp.getheader('ETag')
+    conn.close()
+
+    with stats['lock']:
+        stats['latencies'].extend(latencies)
+        stats['bytes'] += transferred
+        stats['errors'] += errors
+        for status, count in statuses.items():
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + count
+
+def run_load(base_url, clients, duration, gzip_enabled, revalidate):
+    parts = urllib.parse.urlsplit(base_url)
+    paths = discover_assets(base_url)
+    headers = {'Accept-Encoding': 'br, gzip' if gzip_enabled else 'identity'}
+    stats = {'lock': threading.Lock(), 'latencies': [], 'bytes': 0, 'errors': 0, 'statuses': {}}
+
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_client,
+                                args=(parts.hostname, parts.port or 80, paths, deadline, headers, revalidate, stats))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = stats['latencies']
+    return {
+        'paths': len(paths),
+        'requests': len(latencies),
+        'errors': stats['errors'],
+        'statuses': stats['statuses'],
+        'req_per_s': round(len(latencies) / elapsed, 1),
+        'mb_per_s': round(stats['bytes'] / elapsed / 1e6, 2),
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+def print_result(label, result):
+    statuses = ', '.join(f'{status}: {count}' for status, count in sorted(result['statuses'].items()))
+    print(f'\n=== {label} ===')
+    print(f'  {result["requests"]} requests over {result["paths"]} paths ({statuses}), {result["errors"]} errors')
+    print(f'  {result["req_per_s"]} req/s, {result["mb_per_s"]} MB/s')
+    print(f'  latency p50={result["p50_ms"]}ms  p95={result["p95_ms"]}ms  p99={result["p99_ms"]}ms')
+
+class QuietSimpleHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_simple_server(port, directory):
+    """The stock single-threaded HTTP/1.0 server, for comparison."""
+    httpd = http.server.HTTPServer(('localhost', port), functools.partial(QuietSimpleHandler, directory=directory))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the Plonter static server.')
+    parser.add_argument('--url', help='base URL of a running server (default: start serve.py in-process)')
+    parser.add_argument('--clients', type=int, default=30, help='concurrent clients (default 30)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per run (default 10)')
+    parser.add_argument('--dist', action='store_true', help='serve dist/ instead of the source tree (in-process only)')
+    parser.add_argument('--no-gzip', action='store_true', help='do not send Accept-Encoding')
+    parser.add_argument('--revalidate', action='store_true', help='send If-None-Match with the last ETag seen')
+    parser.add_argument('--compare', action='store_true', help='also run against SimpleHTTPRequestHandler')
+    args = parser.parse_args()
+
+    directory = serve.DIST_DIR if args.dist else serve.APP_DIR
+    servers = []
+    try:
+        if args.url:
+            url = args.url
+        else:
+            servers.append(serve.start_server(LOAD_PORT, directory))
+            url = f'http://localhost:{LOAD_PORT}/'
+
+        result = run_load(url, args.clients, args.duration, not args.no_gzip, args.revalidate)
+        print_result(f'serve.py ({url})' if not args.url else url, result)
+
+        if args.compare:
+            servers.append(start_simple_server(COMPARE_PORT, directory))
+            baseline = run_load(f'http://localhost:{COMPARE_PORT}/', args.clients, args.duration,
+                                not args.no_gzip, args.revalidate)
+            print_result('SimpleHTTPRequestHandler', baseline)
+            if baseline['req_per_s']:
+                print(f'\nThroughput: {result["req_per_s"] / baseline["req_per_s"]:.1f}x the stock server')
+    finally:
+        for httpd in servers:
+            httpd.shutdown()
+
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
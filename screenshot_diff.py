@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Screenshot regression diffing for Plonter.
+Compares the PNGs a harness run wrote to test_screenshots/ against the stored
+baselines in screenshot_baselines/ (same relative paths) with a vectorized
+perceptual diff:
+  - per-pixel tolerance on the YIQ colour distance (the metric pixelmatch uses)
+  - anti-aliasing masking: a changed pixel is ignored when each image has a
+    matching pixel within one pixel of it in the other (sub-pixel edge shifts)
+  - region of interest: full-page shots come with a <name>.roi.json sidecar
+    holding the #sentence-container box, and only that region is compared
+Images are diffed in parallel; every changed image gets a heatmap in
+test_screenshots/diff/ and the run gets a report.json with pass/fail per step.
+
+Usage:
+    python3 screenshot_diff.py                         # diff the whole last run
+    python3 screenshot_diff.py mobile viewports/iphone_375
+    python3 screenshot_diff.py --update                # accept the current screenshots as baselines
+    python3 screenshot_diff.py --threshold 0.1 --max-diff-pct 0.05 --heatmaps all
+    python3 screenshot_diff.py --require-baseline      # CI: an image without a baseline fails too
+
+Exits with status 1 when any image fails (or, with --require-baseline, has no baseline).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SCREENSHOTS_DIR = os.path.join(APP_DIR, 'test_screenshots')
+BASELINE_DIR = os.path.join(APP_DIR, 'screenshot_baselines')
+DIFF_DIR = os.path.join(SCREENSHOTS_DIR, 'diff')
+ROI_SELECTOR = '#sentence-container, .sentence-container'
+
+DEFAULT_THRESHOLD = 0.1     # YIQ distance per pixel, 0..1 of the largest possible distance
+DEFAULT_MAX_DIFF_PCT = 0.05 # % of compared pixels allowed to differ before an image fails
+MAX_YIQ_DELTA = 35215.0     # squared YIQ distance between black and white
+
+# ---------- ROI sidecars ----------
+
+def roi_path(png_path):
+    return os.path.splitext(png_path)[0] + '.roi.json'
+
+def save_roi(page, png_path, selector=ROI_SELECTOR):
+    """Record the document-space box of `selector` next to a full-page screenshot."""
+    box = page.evaluate('''selector => {
+        const el = document.querySelector(selector);
+        if (!el) return null;
+        const r = el.getBoundingClientRect();
+        const dpr = window.devicePixelRatio || 1;
+        return {
+            x: Math.round((r.left + window.scrollX) * dpr),
+            y: Math.round((r.top + window.scrollY) * dpr),
+            width: Math.round(r.width * dpr),
+            height: Math.round(r.height * dpr)
+        };
+    }''', selector)
+    if box and box['width'] > 0 and box['height'] > 0:
+        with open(roi_path(png_path), 'w', encoding='utf-8') as f:
+            json.dump(box, f)
+    elif os.path.exists(roi_path(png_path)):
+        os.remove(roi_path(png_path))
+    return box
+
+def load_roi(png_path):
+    try:
+        with open(roi_path(png_path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def union_roi(a, b):
+    if not a or not b:
+        return a or b
+    x0, y0 = min(a['x'], b['x']), min(a['y'], b['y'])
+    x1 = max(a['x'] + a['width'], b['x'] + b['width'])
+    y1 = max(a['y'] + a['height'], b['y'] + b['height'])
+    return {'x': x0, 'y': y0, 'width': x1 - x0, 'height': y1 - y0}
+
+# ---------- Pixel math ----------
+
+def load_rgb(path):
+    """Float32 RGB array, transparency composited onto white."""
+    image = Image.open(path)
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    rgba = np.asarray(image, dtype=np.float32)
+    alpha = rgba[..., 3:4] / 255.0
+    return rgba[..., :3] * alpha + 255.0 * (1.0 - alpha)
+
+def to_yiq(rgb):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    return np.stack([
+        0.29889531 * r + 0.58662247 * g + 0.11448223 * b,
+        0.59597799 * r - 0.27417610 * g - 0.32180189 * b,
+        0.21147017 * r - 0.52261711 * g + 0.31114694 * b,
+    ], axis=-1)
+
+def yiq_distance(a, b):
+    """Perceptual distance 0..1 between YIQ pixels (any matching shapes)."""
+    d = a - b
+    return np.sqrt((0.5053 * d[..., 0] ** 2 + 0.299 * d[..., 1] ** 2 + 0.1957 * d[..., 2] ** 2) / MAX_YIQ_DELTA)
+
+def neighbourhood_match(source, target, ys, xs, threshold):
+    """For pixels (ys, xs) of `source`: is some pixel in the 3x3 block around
+    the same position in `target` within the threshold?"""
+    height, width = target.shape[:2]
+    matched = np.zeros(len(ys), dtype=bool)
+    pixels = source[ys, xs]
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            ny = np.clip(ys + dy, 0, height - 1)
+            nx = np.clip(xs + dx, 0, width - 1)
+            matched |= yiq_distance(pixels, target[ny, nx]) <= threshold
+    return matched
+
+def diff_arrays(baseline, current, threshold):
+    """Returns (distance map, changed mask, anti-aliasing mask) for equally sized arrays."""
+    base_yiq = to_yiq(baseline)
+    cur_yiq = to_yiq(current)
+    distance = yiq_distance(base_yiq, cur_yiq)
+    changed = distance > threshold
+
+    # Only the (usually few) changed pixels get the 3x3 neighbourhood search
+    ys, xs = np.nonzero(changed)
+    antialiased = np.zeros_like(changed)
+    if len(ys):
+        shifted = neighbourhood_match(cur_yiq, base_yiq, ys, xs, threshold) & \
+                  neighbourhood_match(base_yiq, cur_yiq, ys, xs, threshold)
+        antialiased[ys[shifted], xs[shifted]] = True
+        changed[ys[shifted], xs[shifted]] = False
+    return distance, changed, antialiased
+
+def crop(array, roi):
+    if not roi:
+        return array, (0, 0)
+    height, width = array.shape[:2]
+    x0, y0 = max(0, roi['x']), max(0, roi['y'])
+    x1, y1 = min(width, roi['x'] + roi['width']), min(height, roi['y'] + roi['height'])
+    if x1 <= x0 or y1 <= y0:
+        return array, (0, 0)
+    return array[y0:y1, x0:x1], (x0, y0)
+
+def write_heatmap(path, current, distance, changed, antialiased):
+    """Current image faded to grey, changed pixels in red (brighter = larger
+    change), anti-aliasing pixels in yellow."""
+    grey = current.mean(axis=-1, keepdims=True)
+    out = np.repeat(255.0 - (255.0 - grey) * 0.25, 3, axis=-1)
+    intensity = np.clip(0.4 + distance * 2.0, 0.0, 1.0)[changed]
+    out[changed] = np.stack([255.0 * np.ones_like(intensity), 60.0 * (1 - intensity), 60.0 * (1 - intensity)], axis=-1)
+    out[antialiased] = (255.0, 210.0, 0.0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(out.astype(np.uint8)).save(path)
+
+# ---------- Comparing a run ----------
+
+def compare_image(rel_path, screenshots_dir=SCREENSHOTS_DIR, baseline_dir=BASELINE_DIR, diff_dir=DIFF_DIR,
+                  threshold=DEFAULT_THRESHOLD, max_diff_pct=DEFAULT_MAX_DIFF_PCT, heatmaps='fail'):
+    """Diff one screenshot against its baseline; returns a result dict."""
+    current_path = os.path.join(screenshots_dir, rel_path)
+    baseline_path = os.path.join(baseline_dir, rel_path)
+    result = {'image': rel_path, 'status': 'new'}
+    if not os.path.exists(baseline_path):
+        return result
+
+    try:
+        started = time.perf_counter()
+        baseline = load_rgb(baseline_path)
+        current = load_rgb(current_path)
+        result['size'] = [current.shape[1], current.shape[0]]
+        result['baseline_size'] = [baseline.shape[1], baseline.shape[0]]
+
+        roi = union_roi(load_roi(current_path), load_roi(baseline_path))
+        base_region, _ = crop(baseline, roi)
+        cur_region, origin = crop(current, roi)
+
+        # A size change counts every pixel outside the shared area as changed
+        height = min(base_region.shape[0], cur_region.shape[0])
+        width = min(base_region.shape[1], cur_region.shape[1])
+        compared = max(base_region.shape[0], cur_region.shape[0]) * max(base_region.shape[1], cur_region.shape[1])
+        distance, changed, antialiased = diff_arrays(base_region[:height, :width], cur_region[:height, :width], threshold)
+        diff_pixels = int(changed.sum()) + compared - height * width
+
+        result.update({
+            'roi': roi,
+            'diff_pixels': diff_pixels,
+            'aa_pixels': int(antialiased.sum()),
+            'diff_pct': round(100.0 * diff_pixels / max(1, compared), 4),
+            'status': 'pass',
+        })
+        if result['size'] != result['baseline_size'] and not roi:
+            result['reason'] = 'size changed'
+        if result['diff_pct'] > max_diff_pct:
+            result['status'] = 'fail'
+
+        if heatmaps == 'all' or (heatmaps == 'fail' and result['status'] == 'fail'):
+            full_distance = np.zeros(current.shape[:2], dtype=np.float32)
+            full_changed = np.zeros(current.shape[:2], dtype=bool)
+            full_aa = np.zeros(current.shape[:2], dtype=bool)
+            y0, x0 = origin[1], origin[0]
+            full_distance[y0:y0 + height, x0:x0 + width] = distance
+            full_changed[y0:y0 + height, x0:x0 + width] = changed
+            full_aa[y0:y0 + height, x0:x0 + width] = antialiased
+            heatmap_path = os.path.join(diff_dir, rel_path)
+            write_heatmap(heatmap_path, current, full_distance, full_changed, full_aa)
+            result['heatmap'] = os.path.relpath(heatmap_path, screenshots_dir)
+        result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    except Exception as e:  # a corrupt or unreadable PNG fails that step, not the run
+        result.update({'status': 'error', 'error': str(e)})
+    return result
+
+def find_screenshots(screenshots_dir=SCREENSHOTS_DIR, selection=None):
+    """Relative paths of every PNG under screenshots_dir (or under the selected
+    subdirectories/files), skipping the diff output."""
+    roots = [os.path.join(screenshots_dir, s) for s in selection] if selection else [screenshots_dir]
+    diff_dir = os.path.join(screenshots_dir, 'diff')
+    found = []
+    for root in roots:
+        if os.path.isfile(root):
+            found.append(os.path.relpath(root, screenshots_dir))
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != diff_dir]
+            found.extend(os.path.relpath(os.path.join(dirpath, name), screenshots_dir)
+                         for name in filenames if name.endswith('.png'))
+    return sorted(set(found))
+
+def diff_images(rel_paths, jobs=0, screenshots_dir=SCREENSHOTS_DIR, baseline_dir=BASELINE_DIR,
+                threshold=DEFAULT_THRESHOLD, max_diff_pct=DEFAULT_MAX_DIFF_PCT, heatmaps='fail'):
+    """Diff a list of screenshots (paths relative to screenshots_dir) in parallel."""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(rel_paths) or 1))
+    args = dict(screenshots_dir=screenshots_dir, baseline_dir=baseline_dir, diff_dir=os.path.join(screenshots_dir, 'diff'),
+                threshold=threshold, max_diff_pct=max_diff_pct, heatmaps=heatmaps)
+    if jobs == 1:
+        return [compare_image(path, **args) for path in rel_paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(compare_image, path, **args) for path in rel_paths]
+        return [future.result() for future in futures]
+
+def update_baselines(rel_paths, screenshots_dir=SCREENSHOTS_DIR, baseline_dir=BASELINE_DIR):
+    for rel_path in rel_paths:
+        target = os.path.join(baseline_dir, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(screenshots_dir, rel_path), target)
+        source_roi = roi_path(os.path.join(screenshots_dir, rel_path))
+        if os.path.exists(source_roi):
+            shutil.copyfile(source_roi, roi_path(target))
+        elif os.path.exists(roi_path(target)):
+            os.remove(roi_path(target))
+
+def print_results(results, require_baseline=False):
+    for result in results:
+        status = result['status'].upper()
+        if result['status'] == 'new':
+            print(f'  [{"FAIL" if require_baseline else "NEW "}] {result["image"]}: no baseline')
+        elif result['status'] == 'error':
+            print(f'  [ERR ] {result["image"]}: {result["error"]}')
+        else:
+            detail = f'{result["diff_pixels"]} px ({result["diff_pct"]}%) changed, {result["aa_pixels"]} px anti-aliasing ignored'
+            if result.get('reason'):
+                detail += f', {result["reason"]}'
+            if result.get('heatmap'):
+                detail += f' -> {result["heatmap"]}'
+            print(f'  [{status}] {result["image"]}: {detail}')
+    counts = {status: sum(1 for r in results if r['status'] == status) for status in ('pass', 'fail', 'error', 'new')}
+    print(f'\nTotal: {counts["pass"]} passed, {counts["fail"]} failed, {counts["error"]} errors, '
+          f'{counts["new"]} without baseline')
+    return counts
+
+def write_report(results, screenshots_dir=SCREENSHOTS_DIR, **settings):
+    path = os.path.join(screenshots_dir, 'diff', 'report.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), **settings, 'images': results}, f, indent=2)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff harness screenshots against stored baselines.')
+    parser.add_argument('paths', nargs='*', help='files or subdirectories of the screenshots dir (default: all)')
+    parser.add_argument('--screenshots', default=SCREENSHOTS_DIR, help='directory the harness wrote to')
+    parser.add_argument('--baselines', default=BASELINE_DIR, help='baseline store')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'per-pixel YIQ tolerance, 0..1 (default {DEFAULT_THRESHOLD})')
+    parser.add_argument('--max-diff-pct', type=float, default=DEFAULT_MAX_DIFF_PCT,
+                        help=f'percent of compared pixels allowed to differ (default {DEFAULT_MAX_DIFF_PCT})')
+    parser.add_argument('--heatmaps', choices=['fail', 'all', 'none'], default='fail', help='which images get a heatmap')
+    parser.add_argument('--jobs', type=int, default=0, metavar='N', help='parallel workers (default: one per CPU core)')
+    parser.add_argument('--update', action='store_true', help='copy the current screenshots into the baseline store')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='fail images that have no baseline instead of reporting them as new (CI gate)')
+    args = parser.parse_args()
+
+    rel_paths = find_screenshots(args.screenshots, args.paths)
+    if not rel_paths:
+        print(f'No screenshots found in {args.screenshots}')
+        return 1
+
+    if args.update:
+        update_baselines(rel_paths, args.screenshots, args.baselines)
+        print(f'Updated {len(rel_paths)} baselines in {args.baselines}')
+        return 0
+
+    started = time.perf_counter()
+    results = diff_images(rel_paths, args.jobs, args.screenshots, args.baselines,
+                          args.threshold, args.max_diff_pct, args.heatmaps)
+    counts = print_results(results, args.require_baseline)
+    report = write_report(results, args.screenshots, threshold=args.threshold, max_diff_pct=args.max_diff_pct)
+    print(f'Diffed {len(results)} images in {time.perf_counter() - started:.1f}s; report: {report}')
+    return 1 if counts['fail'] or counts['error'] or (args.require_baseline and counts['new']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Static file server for Plonter.
+A threaded HTTP/1.1 server with keep-alive, ETag revalidation (If-None-Match ->
+304), gzip compression of text assets (brotli too when the brotli module is
+installed) and long-lived immutable caching for the content-hashed files that
+build.py writes to dist/. Precompressed .gz/.br siblings are served when they
+are at least as new as the file; otherwise variants are compressed once and
+kept in memory until the file changes on disk.
+
+Usage:
+    python3 serve.py                      # serve the source tree on :8080
+    python3 serve.py --port 8000 --dist   # serve the production bundle in dist/
+    python3 serve.py --host 0.0.0.0       # reachable from phones on the classroom LAN
+"""
+
+import argparse
+import email.utils
+import functools
+import gzip
+import hashlib
+import http.server
+import os
+import re
+import sys
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(APP_DIR, 'dist')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 512
+MAX_CACHED_BYTES = 8 * 1024 * 1024  # larger files are streamed uncached
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{10}\.(js|css)$')  # app.<sha10>.js / style.<sha10>.css from build.py
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'  # always revalidate; a matching ETag costs one 304
+
+class FileCache:
+    """Body, ETag and compressed variants per file, refreshed when mtime or size change."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, path, content_type):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(path)
+        if entry and entry['key'] == key:
+            return entry
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        variants = {'identity': body}
+        if content_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_BYTES:
+            variants['gzip'] = read_precompressed(path + '.gz', stat) or gzip.compress(body, 9, mtime=0)
+            if brotli is not None:
+                variants['br'] = read_precompressed(path + '.br', stat) or brotli.compress(body, quality=11)
+            variants = {name: data for name, data in variants.items() if name == 'identity' or len(data) < len(body)}
+
+        entry = {
+            'key': key,
+            'etag': hashlib.sha1(body).hexdigest()[:16],
+            'last_modified': email.utils.formatdate(stat.st_mtime, usegmt=True),
+            'variants': variants,
+        }
+        with self.lock:
+            self.entries[path] = entry
+        return entry
+
+def read_precompressed(path, source_stat):
+    try:
+        if os.stat(path).st_mtime_ns >= source_stat.st_mtime_ns:
+            with open(path, 'rb') as f:
+                return f.read()
+    except OSError:
+        pass
+    return None
+
+def accepted_encodings(header):
+    """Encodings the client accepts with q > 0, e.g. {'gzip', 'br'}."""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+class PlonterRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive; every response carries Content-Length
+    timeout = 30                   # close idle keep-alive connections
+    disable_nagle_algorithm = True # headers and body go out as separate writes; don't wait for the ACK in between
+    cache = FileCache()
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, '.ndjson': 'application/x-ndjson'}
+
+    def __init__(self, *args, quiet=False, **kwargs):
+        self.quiet = quiet
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_file(head=False)
+
+    def do_HEAD(self):
+        self.send_file(head=True)
+
+    def send_file(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split('?', 1)[0].endswith('/'):
+            path = os.path.join(path, 'index.html')
+        if not os.path.isfile(path) or os.path.getsize(path) > MAX_CACHED_BYTES:
+            # Directory redirects, listings, 404s and very large files
+            return super().do_HEAD() if head else super().do_GET()
+
+        content_type = self.guess_type(path)
+        try:
+            entry = self.cache.get(path, content_type)
+        except OSError:
+            self.send_error(404, 'File not found')
+            return
+
+        variants = entry['variants']
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        encoding = next((name for name in ('br', 'gzip') if name in variants and name in accepted), 'identity')
+        etag = f'"{entry["etag"]}"' if encoding == 'identity' else f'"{entry["etag"]}-{encoding}"'
+        cache_control = IMMUTABLE if HASHED_ASSET.search(path) else REVALIDATE
+
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+            self.send_response(304)
+            self.send_common_headers(etag, cache_control, entry, variants)
+            self.end_headers()
+            return
+
+        body = variants[encoding]
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_common_headers(etag, cache_control, entry, variants)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_common_headers(self, etag, cache_control, entry, variants):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', entry['last_modified'])
+        self.send_header('Cache-Control', cache_control)
+        if len(variants) > 1:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+class PlonterServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128  # a classroom of phones connecting at once
+
+def create_server(port, directory=APP_DIR, host='localhost', quiet=False):
+    handler = functools.partial(PlonterRequestHandler, directory=directory, quiet=quiet)
+    return PlonterServer((host, port), handler)
+
+def start_server(port, directory=APP_DIR, host='localhost', quiet=True):
+    """Serve from a background daemon thread; call .shutdown() on the result to stop."""
+    httpd = create_server(port, directory, host, quiet)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Plonter with keep-alive, compression and caching headers.')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on (default 8080)')
+    parser.add_argument('--host', default='', help='interface to bind (default: all interfaces)')
+    parser.add_argument('--dir', default=APP_DIR, help='directory to serve (default: the source tree)')
+    parser.add_argument('--dist', action='store_true', help='serve the production bundle in dist/ (run build.py first)')
+    parser.add_argument('--quiet', action='store_true', help='do not log every request')
+    args = parser.parse_args()
+
+    directory = DIST_DIR if args.dist else os.path.abspath(args.dir)
+    if not os.path.isfile(os.path.join(directory, 'index.html')):
+        print(f'No index.html in {directory}' + (' - run python3 build.py first' if args.dist else ''), file=sys.stderr)
+        return 1
+
+    httpd = create_server(args.port, directory, args.host, args.quiet)
+    print(f'Serving {directory} on http://{args.host or "localhost"}:{args.port} '
+          f'(gzip{" + brotli" if brotli is not None else ""}, keep-alive)')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
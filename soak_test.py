@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Soak test for Plonter: memory growth and DOM/listener leaks over a long session.
+Loops create/edit/delete cycles across the stages of the corpus in one page -
+parts of speech through the modal and the details panel, a combination, an
+arch through the role modal, the arch properties and clause modals, deleting
+everything in delete mode and going back to the menu - the way a class uses
+the app for a whole lesson. Every few cycles the JS heap, DOM node and event
+listener counts are read over CDP after a forced GC.
+
+A least-squares slope per 1000 cycles is fitted to the samples taken after
+the warm-up; the run fails when any slope exceeds its limit. Heap snapshots
+(after the warm-up and at the end) are written to soak/<run>/ for comparison
+in the DevTools memory panel - kept on failure or with --heap-snapshots.
+
+Usage:
+    python3 soak_test.py                          # 2000 cycles
+    python3 soak_test.py --duration 45 --cycles 0 # a 45-minute lesson, however many cycles fit
+    python3 soak_test.py --max-listener-slope 0 --heap-snapshots
+
+Exits with status 1 when any metric grows faster than its limit.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from playwright.sync_api import sync_playwright
+
+from test_roofs import APP_DIR, DESKTOP_CONTEXT, start_server, wait_for_server, open_app
+
+SOAK_PORT = 8800
+SOAK_DIR = os.path.join(APP_DIR, 'soak')
+
+# metric -> (Performance.getMetrics name, scale to report units, unit)
+METRICS = {
+    'heap': ('JSHeapUsedSize', 1 / (1024 * 1024), 'MB'),
+    'nodes': ('Nodes', 1, 'nodes'),
+    'listeners': ('JSEventListeners', 1, 'listeners'),
+}
+
+# One create/edit/delete cycle on a stage, driven through the same handlers
+# as clicks in the UI. Returns what the cycle managed to build, so a cycle
+# that silently stopped working does not pass for a leak-free one.
+SOAK_CYCLE_JS = """async ({ stageIndex, cycle }) => {
+    const settle = () => new Promise(resolve => {
+        const since = window.__plonterRenderSeq;
+        const started = performance.now();
+        const poll = () => {
+            if (window.__plonterRenderSeq > since || performance.now() - started > 2000) resolve();
+            else setTimeout(poll, 10);
+        };
+        setTimeout(poll, 0);
+    });
+    const click = selector => {
+        const element = document.querySelector(selector);
+        if (element) element.dispatchEvent(new MouseEvent('click', { bubbles: true, cancelable: true }));
+        return !!element;
+    };
+
+    const stages = getAllStages();
+    const stage = stages[stageIndex % stages.length];
+    startStage(stage);
+    await settle();
+    const built = { stage: stage.id, parts: 0, combinations: 0, arches: 0 };
+    if (words.length < 2) {
+        built.skipped = true; // nothing to combine in a one-word sentence
+        await window.__plonterReset();
+        return built;
+    }
+
+    // Create: a noun and an adjective through the part-of-speech modal and the details panel
+    const position = cycle % (words.length - 1);
+    const first = words[position];
+    const second = words[position + 1];
+    openPartOfSpeechModal(first.id);
+    selectPartOfSpeech('noun');
+    click('#save-details-btn');
+    await settle();
+    openPartOfSpeechModal(second.id);
+    selectPartOfSpeech('adjective');
+    click('#save-details-btn');
+    await settle();
+    const pos1 = first.partsOfSpeech[0];
+    const pos2 = second.partsOfSpeech[0];
+    built.parts = first.partsOfSpeech.length + second.partsOfSpeech.length;
+
+    // Combination between the two parts
+    click(`.part-tag[data-word-id="${first.id}"][data-pos-id="${pos1.id}"]`);
+    click(`.part-tag[data-word-id="${second.id}"][data-pos-id="${pos2.id}"]`);
+    await settle();
+    built.combinations = combinations.length;
+
+    // Edit: reopen the panel from the pencil twice, change a field and save,
+    // which re-validates the combination
+    click(`.part-tag[data-word-id="${first.id}"][data-pos-id="${pos1.id}"] .edit-icon`);
+    click(`.part-tag[data-word-id="${first.id}"][data-pos-id="${pos1.id}"] .edit-icon`);
+    click('#details-panel-form input[type="checkbox"]');
+    click('#save-details-btn');
+    await settle();
+
+    // Arch over the two words, then every modal that edits it
+    click(`[data-word-id="${first.id}"] .word-block`);
+    click(`[data-word-id="${second.id}"] .word-block`);
+    click('#syntactic-role-modal .role-btn[data-role="גרעין"]');
+    click('#save-syntactic-role');
+    await settle();
+    const arch = arches[arches.length - 1];
+    built.arches = arches.length;
+    if (arch) {
+        click(`#arch-svg [data-arch-id="${arch.id}"] rect[fill="transparent"]`);
+        click('#cancel-syntactic-role');
+        openArchPropertiesModal(arch);
+        click('#save-arch-properties');
+        await settle();
+        openClauseModal(arch);
+        click('#save-clause');
+        await settle();
+    }
+
+    // Delete: the arch and both parts (with their combination) in delete mode
+    toggleDeleteMode();
+    await settle();
+    if (arch) {
+        click(`#arch-svg [data-arch-id="${arch.id}"]`);
+        await settle();
+    }
+    click(`.part-tag[data-word-id="${first.id}"][data-pos-id="${pos1.id}"]`);
+    click(`.part-tag[data-word-id="${second.id}"][data-pos-id="${pos2.id}"]`);
+    await settle();
+    toggleDeleteMode();
+    await settle();
+
+    await window.__plonterReset();
+    return built;
+}"""
+
+class MemoryProbe:
+    """Heap, DOM node and listener counts of one page over CDP."""
+
+    def __init__(self, page):
+        self.session = page.context.new_cdp_session(page)
+        self.session.send('Performance.enable')
+        self.session.send('HeapProfiler.enable')
+
+    def sample(self):
+        # Twice: the first pass can leave objects that only the second frees (weak maps, finalizers)
+        self.session.send('HeapProfiler.collectGarbage')
+        self.session.send('HeapProfiler.collectGarbage')
+        metrics = {m['name']: m['value'] for m in self.session.send('Performance.getMetrics')['metrics']}
+        return {name: metrics[cdp_name] * scale for name, (cdp_name, scale, _) in METRICS.items()}
+
+    def heap_snapshot(self, path):
+        """Write a .heapsnapshot that the DevTools memory panel can load."""
+        chunks = []
+        on_chunk = lambda event: chunks.append(event['chunk'])
+        self.session.on('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+        try:
+            self.session.send('HeapProfiler.takeHeapSnapshot', {'reportProgress': False})
+        finally:
+            self.session.remove_listener('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(''.join(chunks))
+        return path
+
+def slope_per_1000(samples, metric):
+    """Least-squares growth of a metric per 1000 cycles."""
+    xs = [sample['cycle'] for sample in samples]
+    ys = [sample[metric] for sample in samples]
+    if len(xs) < 2:
+        return 0.0
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return covariance / variance * 1000
+
+def run_soak(cycles, duration, warmup, sample_every, run_dir):
+    """Run the cycles in one page; returns (samples after the warm-up, cycles run, cycles that built nothing)."""
+    httpd = start_server(SOAK_PORT)
+    wait_for_server(SOAK_PORT)
+    samples = []
+    empty_cycles = 0
+    deadline = time.monotonic() + duration * 60 if duration else None
+
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            context = browser.new_context(**DESKTOP_CONTEXT)
+            page = context.new_page()
+            page.on('dialog', lambda dialog: dialog.accept())  # unsaved-changes prompt of the details panel
+            open_app(page, SOAK_PORT)
+            stage_count = page.evaluate('() => corpus.loadAll().then(() => getAllStages().length)')
+            if not stage_count:
+                raise RuntimeError('no stages in the corpus - run compile_corpus.py')
+            probe = MemoryProbe(page)
+            print(f'Soak: {cycles or "unlimited"} cycles'
+                  + (f', at most {duration} min' if duration else '')
+                  + f' over {stage_count} stages, sampling every {sample_every}')
+
+            cycle = 0
+            started = time.monotonic()
+            while (not cycles or cycle < cycles) and (deadline is None or time.monotonic() < deadline):
+                built = page.evaluate(SOAK_CYCLE_JS, {'stageIndex': cycle, 'cycle': cycle})
+                if not built.get('skipped') and (not built['arches'] or not built['combinations']):
+                    empty_cycles += 1
+                cycle += 1
+
+                if cycle == max(warmup, 1):
+                    probe.heap_snapshot(os.path.join(run_dir, 'after_warmup.heapsnapshot'))
+                if cycle >= warmup and cycle % sample_every == 0:
+                    sample = {'cycle': cycle, 'elapsed_s': round(time.monotonic() - started, 1), **probe.sample()}
+                    samples.append(sample)
+                    print(f'  cycle {cycle:>6}  heap {sample["heap"]:7.2f} MB  nodes {sample["nodes"]:>6.0f}'
+                          f'  listeners {sample["listeners"]:>5.0f}  ({sample["elapsed_s"]:.0f}s)')
+
+            probe.heap_snapshot(os.path.join(run_dir, 'final.heapsnapshot'))
+            browser.close()
+    finally:
+        httpd.shutdown()
+
+    return samples, cycle, empty_cycles
+
+def main():
+    parser = argparse.ArgumentParser(description='Soak-test Plonter for heap, DOM node and listener growth.')
+    parser.add_argument('--cycles', type=int, default=2000, help='create/edit/delete cycles (0 = until --duration)')
+    parser.add_argument('--duration', type=float, default=0, help='stop after this many minutes (0 = no limit)')
+    parser.add_argument('--warmup', type=int, default=100, help='cycles before the first sample (caches, JIT)')
+    parser.add_argument('--sample-every', type=int, default=50, help='cycles between samples')
+    parser.add_argument('--max-heap-slope', type=float, default=1.0, help='allowed heap growth, MB per 1000 cycles')
+    parser.add_argument('--max-node-slope', type=float, default=50, help='allowed DOM node growth per 1000 cycles')
+    parser.add_argument('--max-listener-slope', type=float, default=10,
+                        help='allowed event listener growth per 1000 cycles')
+    parser.add_argument('--heap-snapshots', action='store_true', help='keep the heap snapshots when the run passes')
+    args = parser.parse_args()
+
+    if not args.cycles and not args.duration:
+        parser.error('--cycles 0 needs a --duration')
+    if args.cycles and args.cycles < args.warmup + 2 * args.sample_every:
+        parser.error('--cycles must leave room for at least two samples after the warm-up')
+
+    run_dir = os.path.join(SOAK_DIR, time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+    samples, cycles, empty_cycles = run_soak(args.cycles, args.duration, args.warmup, args.sample_every, run_dir)
+
+    limits = {'heap': args.max_heap_slope, 'nodes': args.max_node_slope, 'listeners': args.max_listener_slope}
+    print('\n' + '=' * 50)
+    print(f'GROWTH PER 1000 CYCLES ({cycles} cycles, {len(samples)} samples)')
+    print('=' * 50)
+    failures = []
+    slopes = {}
+    for metric, (_, _, unit) in METRICS.items():
+        slopes[metric] = slope_per_1000(samples, metric)
+        passed = slopes[metric] <= limits[metric]
+        if not passed:
+            failures.append(metric)
+        print(f'  {"PASS" if passed else "FAIL"}: {metric:<10} {slopes[metric]:+9.3f} {unit}'
+              f'  (limit {limits[metric]:g})')
+    if len(samples) < 2:
+        print('  Too few samples to fit a slope - run more cycles')
+        failures.append('samples')
+    if empty_cycles:
+        print(f'  FAIL: {empty_cycles} cycles built no arch or combination - the cycle script is out of date')
+        failures.append('cycles')
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cycles': cycles,
+        'empty_cycles': empty_cycles,
+        'limits_per_1000_cycles': limits,
+        'slopes_per_1000_cycles': slopes,
+        'failures': failures,
+        'samples': samples,
+    }
+    with open(os.path.join(run_dir, 'report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    if failures or args.heap_snapshots:
+        print(f'\nHeap snapshots and report: {run_dir}')
+        print('Compare final.heapsnapshot with after_warmup.heapsnapshot in the DevTools memory panel.')
+    else:
+        for name in ('after_warmup.heapsnapshot', 'final.heapsnapshot'):
+            path = os.path.join(run_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        print(f'\nReport: {os.path.join(run_dir, "report.json")}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
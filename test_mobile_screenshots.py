@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 """
 Multi-viewport screenshot tool for Plonter.
-Takes screenshots at multiple screen sizes for visual inspection.
+Takes screenshots at multiple screen sizes and diffs them against the stored
+baselines (see screenshot_diff.py); only changed steps need a look.
+
+Usage:
+    python3 test_mobile_screenshots.py            # one browser, viewports in series
+    python3 test_mobile_screenshots.py --jobs 4   # viewports fanned out over 4 workers
+    python3 test_mobile_screenshots.py --jobs 0   # one worker per CPU core
+    python3 test_mobile_screenshots.py --snapshot --no-screenshots   # geometry snapshots only
 """
 
-import http.server
-import threading
+import argparse
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor
 from playwright.sync_api import sync_playwright
 
-PORT = 8766  # Different port to avoid conflicts
+import geometry_snapshot
+import screenshot_diff
+import serve
+
+PORT = 8766  # Different port to avoid conflicts; parallel worker N serves on PORT + N
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 SCREENSHOTS_DIR = os.path.join(APP_DIR, 'test_screenshots', 'viewports')
 
@@ -22,123 +33,180 @@ VIEWPORTS = [
     {'name': 'small_phone_320', 'width': 320, 'height': 568, 'mobile': True},
 ]
 
-def start_server():
-    os.chdir(APP_DIR)
-    handler = http.server.SimpleHTTPRequestHandler
-    httpd = http.server.HTTPServer(('localhost', PORT), handler)
-    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    thread.start()
-    return httpd
+def start_server(port=PORT):
+    return serve.start_server(port, APP_DIR)
 
-def take_all_screenshots():
-    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
-    httpd = start_server()
+def capture(page, vp, stem, options, geometry, element=None):
+    """One step: a screenshot (full page, or just `element`) and/or a geometry snapshot."""
+    if options['screenshots']:
+        path = os.path.join(SCREENSHOTS_DIR, vp['name'], f'{stem}.png')
+        if element:
+            element.screenshot(path=path)
+        else:
+            page.screenshot(path=path, full_page=True)
+            screenshot_diff.save_roi(page, path)
+        print(f"  Saved: {path}")
+    if options['snapshot']:
+        result = geometry_snapshot.check(page, f"viewports/{vp['name']}/{stem}",
+                                         options['tolerance'], options['update_snapshots'])
+        print(f"  Snapshot {stem}: {geometry_snapshot.describe(result)}")
+        geometry.append(result)
+
+def capture_viewport(browser, vp, port, options):
+    """Run the capture steps for one viewport in a fresh browser context.
+    Returns the geometry snapshot results."""
+    os.makedirs(os.path.join(SCREENSHOTS_DIR, vp['name']), exist_ok=True)
+    geometry = []
+    print(f"\n{'='*50}")
+    print(f"Viewport: {vp['name']} ({vp['width']}x{vp['height']}, mobile={vp['mobile']})")
+    print(f"{'='*50}")
+
+    context = browser.new_context(
+        viewport={'width': vp['width'], 'height': vp['height']},
+        locale='he-IL',
+        has_touch=vp['mobile'],
+        is_mobile=vp['mobile'],
+    )
+    page = context.new_page()
+    page.goto(f'http://localhost:{port}/')
+    page.wait_for_load_state('networkidle')
     time.sleep(1)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-
-        for vp in VIEWPORTS:
-            vp_dir = os.path.join(SCREENSHOTS_DIR, vp['name'])
-            os.makedirs(vp_dir, exist_ok=True)
-            print(f"\n{'='*50}")
-            print(f"Viewport: {vp['name']} ({vp['width']}x{vp['height']}, mobile={vp['mobile']})")
-            print(f"{'='*50}")
-
-            context = browser.new_context(
-                viewport={'width': vp['width'], 'height': vp['height']},
-                locale='he-IL',
-                has_touch=vp['mobile'],
-                is_mobile=vp['mobile'],
-            )
-            page = context.new_page()
-            page.goto(f'http://localhost:{PORT}/')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            # 1. Welcome screen
-            path = os.path.join(vp_dir, '01_welcome.png')
-            page.screenshot(path=path, full_page=True)
-            print(f"  Saved: {path}")
-
-            # 2. Enter first stage
-            stage_cards = page.query_selector_all('.stage-item')
-            if stage_cards:
-                stage_cards[0].click()
-                time.sleep(1)
-
-                path = os.path.join(vp_dir, '02_game_screen.png')
-                page.screenshot(path=path, full_page=True)
-                print(f"  Saved: {path}")
-
-                # 3. Close-up of sentence area
-                sentence = page.query_selector('#sentence-container, .sentence-container')
-                if sentence:
-                    path = os.path.join(vp_dir, '03_sentence_area.png')
-                    sentence.screenshot(path=path)
-                    print(f"  Saved: {path}")
-
-                # 4. Click first word
-                words = page.query_selector_all('.word-block')
-                if len(words) >= 2:
-                    words[0].click()
-                    time.sleep(0.5)
-                    path = os.path.join(vp_dir, '04_word_selected.png')
-                    page.screenshot(path=path, full_page=True)
-                    print(f"  Saved: {path}")
-
-                    # 5. Click second word — open role menu
-                    words = page.query_selector_all('.word-block')
-                    if len(words) > 1:
-                        words[1].click()
-                        time.sleep(0.5)
-                        path = os.path.join(vp_dir, '05_role_menu.png')
-                        page.screenshot(path=path, full_page=True)
-                        print(f"  Saved: {path}")
-
-                    # 6. Select role and create roof
-                    modal = page.query_selector('#syntactic-role-modal')
-                    if modal:
-                        classes = modal.get_attribute('class') or ''
-                        if 'show' in classes:
-                            role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
-                            if role_buttons:
-                                role_buttons[0].click()
-                                time.sleep(0.3)
-                                save_btn = page.query_selector('#save-syntactic-role')
-                                if save_btn:
-                                    save_btn.click()
-                                    time.sleep(1)
-                                path = os.path.join(vp_dir, '06_roof_created.png')
-                                page.screenshot(path=path, full_page=True)
-                                print(f"  Saved: {path}")
-
-                                # 7. Close-up of roof area after creation
-                                sentence = page.query_selector('#sentence-container, .sentence-container')
-                                if sentence:
-                                    path = os.path.join(vp_dir, '07_roof_closeup.png')
-                                    sentence.screenshot(path=path)
-                                    print(f"  Saved: {path}")
-
-                    # 8. Click + button to open POS modal
-                    add_btns = page.query_selector_all('.add-pos-btn')
-                    if add_btns:
-                        add_btns[0].click()
-                        time.sleep(0.5)
-                        path = os.path.join(vp_dir, '08_pos_modal.png')
-                        page.screenshot(path=path, full_page=True)
-                        print(f"  Saved: {path}")
-
-            context.close()
-
-        browser.close()
-
-    httpd.shutdown()
+    # 1. Welcome screen
+    capture(page, vp, '01_welcome', options, geometry)
+
+    # 2. Enter first stage
+    stage_cards = page.query_selector_all('.stage-item')
+    if stage_cards:
+        stage_cards[0].click()
+        time.sleep(1)
+
+        capture(page, vp, '02_game_screen', options, geometry)
+
+        # 3. Close-up of sentence area
+        sentence = page.query_selector('#sentence-container, .sentence-container')
+        if sentence:
+            capture(page, vp, '03_sentence_area', options, geometry, element=sentence)
+
+        # 4. Click first word
+        words = page.query_selector_all('.word-block')
+        if len(words) >= 2:
+            words[0].click()
+            time.sleep(0.5)
+            capture(page, vp, '04_word_selected', options, geometry)
+
+            # 5. Click second word — open role menu
+            words = page.query_selector_all('.word-block')
+            if len(words) > 1:
+                words[1].click()
+                time.sleep(0.5)
+                capture(page, vp, '05_role_menu', options, geometry)
+
+            # 6. Select role and create roof
+            modal = page.query_selector('#syntactic-role-modal')
+            if modal:
+                classes = modal.get_attribute('class') or ''
+                if 'show' in classes:
+                    role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
+                    if role_buttons:
+                        role_buttons[0].click()
+                        time.sleep(0.3)
+                        save_btn = page.query_selector('#save-syntactic-role')
+                        if save_btn:
+                            save_btn.click()
+                            time.sleep(1)
+                        capture(page, vp, '06_roof_created', options, geometry)
+
+                        # 7. Close-up of roof area after creation
+                        sentence = page.query_selector('#sentence-container, .sentence-container')
+                        if sentence:
+                            capture(page, vp, '07_roof_closeup', options, geometry, element=sentence)
+
+            # 8. Click + button to open POS modal
+            add_btns = page.query_selector_all('.add-pos-btn')
+            if add_btns:
+                add_btns[0].click()
+                time.sleep(0.5)
+                capture(page, vp, '08_pos_modal', options, geometry)
+
+    context.close()
+    return geometry
+
+def capture_shard(shard_index, viewports, options):
+    """Worker entry point: capture a shard of viewports with its own server, port and browser."""
+    port = PORT + shard_index
+    httpd = start_server(port)
+    time.sleep(1)
+
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            geometry = [result for vp in viewports for result in capture_viewport(browser, vp, port, options)]
+            browser.close()
+    finally:
+        httpd.shutdown()
+
+    return geometry
+
+def take_all_screenshots(jobs=1, options=None):
+    options = options or {'screenshots': True, 'snapshot': False, 'update_snapshots': False,
+                          'tolerance': geometry_snapshot.DEFAULT_TOLERANCE}
+    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+
+    # Round-robin the viewports over the workers; never start more workers than viewports
+    jobs = max(1, min(jobs, len(VIEWPORTS)))
+    shards = [VIEWPORTS[i::jobs] for i in range(jobs)]
+
+    start = time.perf_counter()
+    if jobs == 1:
+        geometry = capture_shard(0, VIEWPORTS, options)
+    else:
+        print(f"Capturing {len(VIEWPORTS)} viewports with {jobs} workers "
+              f"(ports {PORT}-{PORT + jobs - 1})")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(capture_shard, i, shard, options) for i, shard in enumerate(shards)]
+            geometry = [result for future in futures for result in future.result()]  # Re-raises worker failures
+    elapsed = time.perf_counter() - start
+
     print(f"\n\nAll screenshots saved to: {SCREENSHOTS_DIR}")
     print("Viewports captured:")
     for vp in VIEWPORTS:
         print(f"  - {vp['name']}: {vp['width']}x{vp['height']}")
+    print(f"Wall-clock time: {elapsed:.1f}s ({jobs} worker{'s' if jobs > 1 else ''})")
+
+    if options['snapshot']:
+        checked = [r for r in geometry if r['status'] in ('pass', 'fail')]
+        failed = [r['name'] for r in checked if r['status'] == 'fail']
+        print(f"\nGeometry snapshots: {len(checked) - len(failed)} passed, {len(failed)} failed, "
+              f"{len(geometry) - len(checked)} written")
+        for name in failed:
+            print(f"  [FAIL] {name}")
+    if not options['screenshots']:
+        return None
+
+    # Compare every viewport's steps against the stored baselines
+    print("\nVisual regression against screenshot_baselines/:")
+    rel_dir = os.path.relpath(SCREENSHOTS_DIR, screenshot_diff.SCREENSHOTS_DIR)
+    diffs = screenshot_diff.diff_images(screenshot_diff.find_screenshots(selection=[rel_dir]))
+    counts = screenshot_diff.print_results(diffs)
+    screenshot_diff.write_report(diffs)
+    return counts
 
 
 if __name__ == '__main__':
-    take_all_screenshots()
+    parser = argparse.ArgumentParser(description='Capture Plonter screenshots at multiple viewports.')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='number of parallel workers, each with its own browser and port (0 = one per CPU core)')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='compare SVG geometry per step with the golden files in geometry_snapshots/')
+    parser.add_argument('--update-snapshots', action='store_true', help='rewrite the geometry golden files')
+    parser.add_argument('--tolerance', type=float, default=geometry_snapshot.DEFAULT_TOLERANCE,
+                        help=f'geometry tolerance in px (default: {geometry_snapshot.DEFAULT_TOLERANCE})')
+    parser.add_argument('--no-screenshots', action='store_true', help='skip the screenshots')
+    args = parser.parse_args()
+    take_all_screenshots(jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1), options={
+        'screenshots': not args.no_screenshots,
+        'snapshot': args.snapshot or args.update_snapshots,
+        'update_snapshots': args.update_snapshots,
+        'tolerance': args.tolerance,
+    })
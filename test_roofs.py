@@ -2,194 +2,497 @@
 """
 Test protocol for Plonter roof system.
 Runs against local HTTP server, takes screenshots at each step.
-Compare screenshots to Amitai's requirements before release.
+Screenshots are diffed against screenshot_baselines/ (see screenshot_diff.py);
+review the heatmaps of failed steps against Amitai's requirements before release.
+
+Usage:
+    python3 test_roofs.py                 # desktop protocol
+    python3 test_roofs.py --mobile        # mobile protocol (375x667, touch)
+    python3 test_roofs.py --all           # both
+    python3 test_roofs.py --sweep         # time every stage in STAGES, write a JSON report
+    python3 test_roofs.py --snapshot --no-screenshots   # geometry snapshots only, no PNGs
+    python3 test_roofs.py --trace         # Chrome-trace JSON per scenario in traces/ (see trace_export.py)
+    python3 test_roofs.py --all --snapshot --require-baseline   # CI: missing baselines/golden files fail
+
+Exits with status 1 when any check fails (visual, geometry or protocol step),
+or with --sweep when a stage fails or goes over the render budget.
 """
 
-import http.server
-import threading
+import argparse
 import time
 import os
+import sys
 import json
-from playwright.sync_api import sync_playwright
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+import geometry_snapshot
+import serve
+import trace_export
 
 PORT = 8765
+SWEEP_PORT = 8780  # Sweep worker N serves on SWEEP_PORT + N
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 SCREENSHOTS_DIR = os.path.join(APP_DIR, 'test_screenshots')
+MOBILE_SCREENSHOTS_DIR = os.path.join(SCREENSHOTS_DIR, 'mobile')
+SWEEP_REPORT = os.path.join(SCREENSHOTS_DIR, 'stage_sweep.json')
+RENDER_BUDGET_MS = 50  # Latency budget for a single renderArches() call
 
 os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 
-def start_server():
-    os.chdir(APP_DIR)
-    handler = http.server.SimpleHTTPRequestHandler
-    httpd = http.server.HTTPServer(('localhost', PORT), handler)
-    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    thread.start()
-    return httpd
+DESKTOP_CONTEXT = {'viewport': {'width': 1280, 'height': 900}, 'locale': 'he-IL'}
+MOBILE_CONTEXT = {'viewport': {'width': 375, 'height': 667}, 'locale': 'he-IL', 'has_touch': True, 'is_mobile': True}
+
+def start_server(port=PORT):
+    return serve.start_server(port, APP_DIR)
+
+def wait_for_server(port=PORT, timeout=10):
+    """Poll the server until it answers instead of sleeping a fixed amount."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/', timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.02)
+
+def open_app(page, port=PORT):
+    """Navigate to the app and wait until init() has rendered the welcome screen."""
+    page.goto(f'http://localhost:{port}/' + ('?trace=1' if CAPTURE['trace'] else ''))
+    page.wait_for_function('window.__plonterReady === true')
+
+def render_seq(page):
+    return page.evaluate('window.__plonterRenderSeq || 0')
+
+def wait_for_render(page, since, timeout=5000):
+    """Wait until the app has completed a render pass after sequence number `since`."""
+    try:
+        page.wait_for_function('seq => window.__plonterRenderSeq > seq', arg=since, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+def click_and_wait_render(page, element, timeout=5000):
+    """Click an element and wait for the render pass it triggers."""
+    since = render_seq(page)
+    element.click()
+    return wait_for_render(page, since, timeout)
+
+def click_and_wait_modal(page, element, modal_selector, timeout=5000):
+    """Click an element and wait for a modal to get the `show` class."""
+    element.click()
+    try:
+        page.wait_for_selector(f'{modal_selector}.show', timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+# What each step captures; set from the command line
+CAPTURE = {
+    'screenshots': True,          # full-page PNG per step (the most expensive call in the protocol)
+    'snapshot': False,            # SVG geometry snapshot per step, compared with geometry_snapshots/
+    'update_snapshots': False,
+    'tolerance': geometry_snapshot.DEFAULT_TOLERANCE,
+    'trace': False,               # Chrome-trace JSON (User Timing + CPU profile) per scenario
+    'require_baseline': False,    # a screenshot without a baseline or a new geometry golden file fails
+}
+snapshot_results = []  # (name, passed) per geometry check of the current protocol
+
+def capture_step(page, protocol, directory, name, step_num):
+    """Per-step capture: a full-page screenshot and/or a geometry snapshot, as configured in CAPTURE."""
+    stem = f'{step_num:02d}_{name}'
+    path = None
+    if CAPTURE['screenshots']:
+        import screenshot_diff  # needs numpy and Pillow, so only loaded when there are screenshots
+        path = os.path.join(directory, stem + '.png')
+        page.screenshot(path=path, full_page=True)
+        screenshot_diff.save_roi(page, path)
+        print(f'  Screenshot: {path}')
+    if CAPTURE['snapshot']:
+        check_geometry(page, f'{protocol}/{stem}')
+    return path
+
+def check_geometry(page, name, record=True):
+    result = geometry_snapshot.check(page, name, CAPTURE['tolerance'], CAPTURE['update_snapshots'])
+    print(f'  Snapshot {name}: {geometry_snapshot.describe(result)}')
+    if record and result['status'] in ('pass', 'fail'):
+        snapshot_results.append((f'Geometry {name}', result['status'] == 'pass'))
+    elif record and result['status'] == 'new' and CAPTURE['require_baseline']:
+        snapshot_results.append((f'Geometry {name} (no golden file)', False))
+    return result
 
 def screenshot(page, name, step_num):
-    path = os.path.join(SCREENSHOTS_DIR, f'{step_num:02d}_{name}.png')
-    page.screenshot(path=path, full_page=True)
-    print(f'  Screenshot: {path}')
-    return path
+    return capture_step(page, 'desktop', SCREENSHOTS_DIR, name, step_num)
+
+def visual_check(since, selection=None, label=''):
+    """Diff the screenshots written since `since` against the stored baselines.
+    Returns one (name, passed) result per image that has a baseline."""
+    import screenshot_diff
+    rel_paths = [rel for rel in screenshot_diff.find_screenshots(SCREENSHOTS_DIR, selection)
+                 if os.path.getmtime(os.path.join(SCREENSHOTS_DIR, rel)) >= since]
+    print(f'\n=== VISUAL REGRESSION: {len(rel_paths)} screenshots ===')
+    diffs = screenshot_diff.diff_images(rel_paths)
+    screenshot_diff.print_results(diffs, CAPTURE['require_baseline'])
+    return [(f'{label}Visual {d["image"]}', d['status'] == 'pass') for d in diffs
+            if d['status'] != 'new' or CAPTURE['require_baseline']]
+
+def desktop_welcome(page, results):
+    """Step 1: the welcome screen (the page must be showing it)."""
+    # Step 1: Welcome screen loads
+    print('\n=== TEST 1: Welcome screen loads ===')
+    screenshot(page, 'welcome_screen', 1)
+    welcome = page.query_selector('#welcome-screen')
+    if welcome:
+        print('  PASS: Welcome screen visible')
+        results.append(('Welcome screen', True))
+    else:
+        print('  FAIL: No welcome screen')
+        results.append(('Welcome screen', False))
+
+def desktop_roof(page, results):
+    """Steps 2-9: enter the first stage and build a roof (starts from the welcome screen)."""
+    # Step 2: Click first stage to enter game
+    print('\n=== TEST 2: Enter a stage ===')
+    stage_cards = page.query_selector_all('.stage-item')
+    if stage_cards:
+        click_and_wait_render(page, stage_cards[0])
+        screenshot(page, 'game_screen', 2)
+        game = page.query_selector('#game-screen')
+        visible = game and game.is_visible() if game else False
+        print(f'  {"PASS" if visible else "FAIL"}: Game screen {"visible" if visible else "not visible"}')
+        results.append(('Enter stage', visible))
+    else:
+        print('  FAIL: No stage cards found')
+        results.append(('Enter stage', False))
+
+    # Step 3: Words are displayed
+    print('\n=== TEST 3: Words displayed ===')
+    words = page.query_selector_all('.word-block')
+    print(f'  Found {len(words)} words')
+    screenshot(page, 'words_displayed', 3)
+    results.append(('Words displayed', len(words) > 0))
+
+    if len(words) >= 2:
+        # Step 4: Click first word — should highlight
+        print('\n=== TEST 4: Click word A — highlights ===')
+        click_and_wait_render(page, words[0])
+        screenshot(page, 'word_a_selected', 4)
+        # Re-query after click (DOM may re-render)
+        words = page.query_selector_all('.word-block')
+        classes_a = words[0].get_attribute('class') or ''
+        selected = 'selected' in classes_a or 'active' in classes_a or 'highlighted' in classes_a or 'arch-selected' in classes_a
+        print(f'  Word A classes: {classes_a}')
+        print(f'  {"PASS" if selected else "CHECK MANUALLY"}: Word A highlight state')
+        results.append(('Word A highlights', selected))
+
+        # Step 5: Click second word — syntactic role menu should open
+        print('\n=== TEST 5: Click word B — role menu opens ===')
+        words = page.query_selector_all('.word-block')
+        if len(words) > 1:
+            click_and_wait_modal(page, words[1], '#syntactic-role-modal')
+        screenshot(page, 'role_menu_open', 5)
+
+        # Check for the syntactic role modal
+        modal = page.query_selector('#syntactic-role-modal')
+        menu_visible = False
+        if modal:
+            classes = modal.get_attribute('class') or ''
+            display = page.evaluate('(el) => window.getComputedStyle(el).display', modal)
+            menu_visible = 'show' in classes or display != 'none'
+            print(f'  Modal classes: {classes}, display: {display}')
+        print(f'  {"PASS" if menu_visible else "FAIL"}: Syntactic role menu {"visible" if menu_visible else "not visible"}')
+        results.append(('Role menu opens', menu_visible))
+
+        # Step 6: Check menu has 9 roles
+        print('\n=== TEST 6: Menu has 9 syntactic roles ===')
+        role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
+        print(f'  Found {len(role_buttons)} role options')
+        if role_buttons:
+            for rb in role_buttons[:9]:
+                text = rb.inner_text()
+                print(f'    - {text}')
+        has_9 = len(role_buttons) >= 9
+        print(f'  {"PASS" if has_9 else "FAIL"}: {len(role_buttons)} roles found (need 9)')
+        results.append(('9 syntactic roles', has_9))
+
+        # Step 7: Select a role and save — roof should appear
+        print('\n=== TEST 7: Select role — roof created ===')
+        if role_buttons:
+            role_buttons[0].click()
+            # Click Save button to confirm selection
+            save_btn = page.query_selector('#save-syntactic-role')
+            if save_btn:
+                click_and_wait_render(page, save_btn)
+                print('  Clicked Save button')
+            else:
+                print('  WARNING: Save button not found')
+        screenshot(page, 'roof_created', 7)
+
+        # Check for roof/arch elements in DOM (SVG lines, arches)
+        roofs = page.query_selector_all('.arch-container, [class*="arch"], svg line, svg path, svg rect')
+        print(f'  Found {len(roofs)} roof-related elements')
+        # Debug: dump SVG contents
+        svg_info = page.evaluate('''() => {
+            const svg = document.getElementById("arch-svg");
+            if (!svg) return "No arch-svg found";
+            const lines = svg.querySelectorAll("line");
+            const texts = svg.querySelectorAll("text");
+            const rects = svg.querySelectorAll("rect");
+            const groups = svg.querySelectorAll("g");
+            let info = `SVG: ${lines.length} lines, ${rects.length} rects, ${texts.length} texts, ${groups.length} groups\\n`;
+            lines.forEach((l, i) => {
+                info += `  line${i}: (${l.getAttribute("x1")},${l.getAttribute("y1")}) to (${l.getAttribute("x2")},${l.getAttribute("y2")})\\n`;
+            });
+            texts.forEach((t, i) => {
+                info += `  text${i}: "${t.textContent}" at (${t.getAttribute("x")},${t.getAttribute("y")})\\n`;
+            });
+            rects.forEach((r, i) => {
+                info += `  rect${i}: at (${r.getAttribute("x")},${r.getAttribute("y")}) ${r.getAttribute("width")}x${r.getAttribute("height")}\\n`;
+            });
+            return info;
+        }''')
+        print(f'  SVG debug:\n{svg_info}')
+        results.append(('Roof created', len(roofs) > 0))
+
+        # Step 8: Screen NOT frozen — can still interact
+        print('\n=== TEST 8: Screen not frozen after first roof ===')
+        try:
+            # Re-query words (DOM re-renders after roof creation)
+            words = page.query_selector_all('.word-block')
+            # Try clicking another word
+            if len(words) > 2:
+                click_and_wait_render(page, words[2])
+            screenshot(page, 'after_second_click', 8)
+            print('  PASS: Can still click after roof creation')
+            results.append(('Not frozen', True))
+        except Exception as e:
+            print(f'  FAIL: Screen frozen — {e}')
+            results.append(('Not frozen', False))
+
+        # Step 9: Visual check — take close-up of roof area
+        print('\n=== TEST 9: Roof visual inspection ===')
+        sentence_container = page.query_selector('#sentence-container, .sentence-container')
+        if not CAPTURE['screenshots']:
+            # No PNGs: the close-up is checked as geometry instead
+            closeup = check_geometry(page, 'desktop/09_roof_closeup', record=False) if CAPTURE['snapshot'] else None
+            if closeup and closeup['status'] in ('pass', 'fail'):
+                results.append(('Roof visual', closeup['status'] == 'pass'))
+            elif closeup and closeup['status'] == 'new' and CAPTURE['require_baseline']:
+                results.append(('Roof visual', False))
+            else:
+                results.append(('Roof visual', 'MANUAL CHECK'))
+        elif sentence_container:
+            import screenshot_diff
+            sentence_container.screenshot(path=os.path.join(SCREENSHOTS_DIR, '09_roof_closeup.png'))
+            closeup = screenshot_diff.compare_image('09_roof_closeup.png')
+            if closeup['status'] == 'new':
+                print('  No baseline yet - review the close-up, then run screenshot_diff.py --update')
+                results.append(('Roof visual', False if CAPTURE['require_baseline'] else 'MANUAL CHECK'))
+            else:
+                print(f'  {closeup["status"].upper()}: {closeup.get("diff_pixels", 0)} px changed '
+                      f'({closeup.get("diff_pct", 0)}%) against the baseline'
+                      + (f', heatmap: {closeup["heatmap"]}' if closeup.get('heatmap') else ''))
+                results.append(('Roof visual', closeup['status'] == 'pass'))
+        else:
+            results.append(('Roof visual', False))
+
+def desktop_screenshot_names():
+    """Top-level desktop screenshots; the close-up is checked on its own in step 9."""
+    return [name for name in os.listdir(SCREENSHOTS_DIR)
+            if name.endswith('.png') and name != '09_roof_closeup.png']
+
+def mobile_protocol(page, results):
+    """Mobile tests 1-8 at 375x667 with touch (starts from the welcome screen)."""
+    def mobile_screenshot(name, step_num):
+        return capture_step(page, 'mobile', MOBILE_SCREENSHOTS_DIR, name, step_num)
+
+    # Mobile Test 1: Welcome screen loads at mobile size
+    print('\n=== MOBILE TEST 1: Welcome screen loads ===')
+    mobile_screenshot('welcome_screen', 1)
+    welcome = page.query_selector('#welcome-screen')
+    results.append(('M: Welcome screen', welcome is not None))
+    print(f'  {"PASS" if welcome else "FAIL"}: Welcome screen visible')
+
+    # Mobile Test 2: Enter a stage
+    print('\n=== MOBILE TEST 2: Enter a stage ===')
+    stage_cards = page.query_selector_all('.stage-item')
+    if stage_cards:
+        click_and_wait_render(page, stage_cards[0])
+        mobile_screenshot('game_screen', 2)
+        game = page.query_selector('#game-screen')
+        visible = game and game.is_visible() if game else False
+        results.append(('M: Enter stage', visible))
+        print(f'  {"PASS" if visible else "FAIL"}: Game screen visible')
+    else:
+        results.append(('M: Enter stage', False))
+
+    # Mobile Test 3: Words displayed
+    print('\n=== MOBILE TEST 3: Words displayed ===')
+    words = page.query_selector_all('.word-block')
+    mobile_screenshot('words_displayed', 3)
+    results.append(('M: Words displayed', len(words) > 0))
+    print(f'  Found {len(words)} words')
+
+    # Mobile Test 4: Horizontal scroll — overflow-x is 'auto' or 'scroll'
+    print('\n=== MOBILE TEST 4: Horizontal scroll enabled ===')
+    overflow_x = page.evaluate('''() => {
+        const el = document.querySelector('.sentence-container');
+        if (!el) return 'NO_ELEMENT';
+        return window.getComputedStyle(el).overflowX;
+    }''')
+    scroll_ok = overflow_x in ('auto', 'scroll')
+    results.append(('M: Horizontal scroll', scroll_ok))
+    print(f'  overflow-x: {overflow_x} — {"PASS" if scroll_ok else "FAIL"}')
+
+    # Mobile Test 5: Touch targets >= 44px
+    print('\n=== MOBILE TEST 5: Touch targets >= 44px ===')
+    touch_results = page.evaluate('''() => {
+        const selectors = ['.add-pos-btn', '.btn', '.part-tag'];
+        const results = [];
+        for (const sel of selectors) {
+            const els = document.querySelectorAll(sel);
+            for (const el of els) {
+                const rect = el.getBoundingClientRect();
+                if (rect.width > 0 && rect.height > 0) {
+                    results.push({
+                        selector: sel,
+                        text: el.textContent.trim().substring(0, 20),
+                        width: rect.width,
+                        height: rect.height,
+                        ok: rect.height >= 44
+                    });
+                }
+            }
+        }
+        return results;
+    }''')
+    all_ok = True
+    for tr in touch_results:
+        if not tr['ok']:
+            print(f'  FAIL: {tr["selector"]} "{tr["text"]}" height={tr["height"]:.0f}px')
+            all_ok = False
+    if all_ok:
+        print(f'  PASS: All {len(touch_results)} visible interactive elements >= 44px')
+    results.append(('M: Touch targets', all_ok))
+
+    # Mobile Test 6: Details panel is full-width
+    print('\n=== MOBILE TEST 6: Details panel full-width ===')
+    panel_width = page.evaluate('''() => {
+        const panel = document.querySelector('.details-panel');
+        if (!panel) return 'NO_ELEMENT';
+        return window.getComputedStyle(panel).width;
+    }''')
+    # At 375px viewport, panel should be ~375px (100%)
+    results.append(('M: Panel full-width', panel_width != '400px'))
+    print(f'  Panel width: {panel_width} — {"PASS" if panel_width != "400px" else "FAIL"}')
+
+    # Mobile Test 7: Create a roof at mobile size (end-to-end)
+    print('\n=== MOBILE TEST 7: Create roof at mobile size ===')
+    words = page.query_selector_all('.word-block')
+    if len(words) >= 2:
+        click_and_wait_render(page, words[0])
+        # Re-query after DOM re-render
+        words = page.query_selector_all('.word-block')
+        click_and_wait_modal(page, words[1], '#syntactic-role-modal')
+        mobile_screenshot('role_menu_mobile', 7)
+
+        modal = page.query_selector('#syntactic-role-modal')
+        if modal:
+            classes = modal.get_attribute('class') or ''
+            if 'show' in classes:
+                role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
+                if role_buttons:
+                    role_buttons[0].click()
+                    save_btn = page.query_selector('#save-syntactic-role')
+                    if save_btn:
+                        click_and_wait_render(page, save_btn)
+                    mobile_screenshot('roof_created_mobile', 8)
+
+                    # Check roof elements
+                    svg_info = page.evaluate('''() => {
+                        const svg = document.getElementById("arch-svg");
+                        if (!svg) return {lines: 0, texts: 0};
+                        return {
+                            lines: svg.querySelectorAll("line").length,
+                            texts: svg.querySelectorAll("text").length
+                        };
+                    }''')
+                    has_roof = svg_info['lines'] > 0 or svg_info['texts'] > 0
+                    results.append(('M: Roof created', has_roof))
+                    print(f'  SVG: {svg_info["lines"]} lines, {svg_info["texts"]} texts — {"PASS" if has_roof else "FAIL"}')
+                else:
+                    results.append(('M: Roof created', False))
+                    print('  FAIL: No role buttons in modal')
+            else:
+                results.append(('M: Roof created', False))
+                print('  FAIL: Modal not shown')
+        else:
+            results.append(('M: Roof created', False))
+            print('  FAIL: No syntactic-role-modal')
+    else:
+        results.append(('M: Roof created', False))
+        print('  FAIL: Not enough words')
+
+    # Mobile Test 8: Modal fits screen (no overflow)
+    print('\n=== MOBILE TEST 8: Modal fits screen ===')
+    modal_fit = page.evaluate('''() => {
+        const modal = document.querySelector('.modal-content');
+        if (!modal) return true;
+        const rect = modal.getBoundingClientRect();
+        return rect.width <= window.innerWidth && rect.right <= window.innerWidth + 5;
+    }''')
+    results.append(('M: Modal fits screen', modal_fit))
+    print(f'  {"PASS" if modal_fit else "FAIL"}: Modal fits within viewport')
+
+# Scenarios the harness daemon can run on a warm page, in order. Each starts from
+# the welcome screen; `watches` lists what it depends on (a trailing / covers a
+# directory), so an edit reruns only the scenarios it can affect.
+SCENARIOS = {
+    'desktop_welcome': {'protocol': 'desktop', 'run': desktop_welcome, 'watches': ('index.html', 'css/', 'js/', 'corpus/')},
+    'desktop_roof': {'protocol': 'desktop', 'run': desktop_roof, 'watches': ('index.html', 'css/', 'js/', 'corpus/')},
+    'mobile': {'protocol': 'mobile', 'run': mobile_protocol, 'watches': ('index.html', 'css/', 'js/', 'corpus/')},
+}
+PROTOCOLS = {
+    'desktop': {'context': DESKTOP_CONTEXT, 'directory': SCREENSHOTS_DIR, 'label': ''},
+    'mobile': {'context': MOBILE_CONTEXT, 'directory': MOBILE_SCREENSHOTS_DIR, 'label': 'M: '},
+}
+
+def run_scenario(page, name, results):
+    """Run one SCENARIOS entry; with CAPTURE['trace'], write its Chrome trace to traces/<name>.json."""
+    tracer = None
+    if CAPTURE['trace']:
+        tracer = trace_export.ScenarioTrace(page)
+        tracer.start()
+    try:
+        SCENARIOS[name]['run'](page, results)
+    finally:
+        if tracer:
+            print(f'  Trace: {tracer.stop(name)}')
 
 def run_tests():
     httpd = start_server()
-    time.sleep(1)
+    wait_for_server()
     results = []
+    run_started = time.time()
+    snapshot_results.clear()
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1280, 'height': 900},
-            locale='he-IL'
-        )
+        context = browser.new_context(**DESKTOP_CONTEXT)
         page = context.new_page()
-        page.goto(f'http://localhost:{PORT}/')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        # Step 1: Welcome screen loads
-        print('\n=== TEST 1: Welcome screen loads ===')
-        screenshot(page, 'welcome_screen', 1)
-        welcome = page.query_selector('#welcome-screen')
-        if welcome:
-            print('  PASS: Welcome screen visible')
-            results.append(('Welcome screen', True))
-        else:
-            print('  FAIL: No welcome screen')
-            results.append(('Welcome screen', False))
-
-        # Step 2: Click first stage to enter game
-        print('\n=== TEST 2: Enter a stage ===')
-        stage_cards = page.query_selector_all('.stage-item')
-        if stage_cards:
-            stage_cards[0].click()
-            time.sleep(1)
-            screenshot(page, 'game_screen', 2)
-            game = page.query_selector('#game-screen')
-            visible = game and game.is_visible() if game else False
-            print(f'  {"PASS" if visible else "FAIL"}: Game screen {"visible" if visible else "not visible"}')
-            results.append(('Enter stage', visible))
-        else:
-            print('  FAIL: No stage cards found')
-            results.append(('Enter stage', False))
+        open_app(page)
 
-        # Step 3: Words are displayed
-        print('\n=== TEST 3: Words displayed ===')
-        words = page.query_selector_all('.word-block')
-        print(f'  Found {len(words)} words')
-        screenshot(page, 'words_displayed', 3)
-        results.append(('Words displayed', len(words) > 0))
+        run_scenario(page, 'desktop_welcome', results)
+        run_scenario(page, 'desktop_roof', results)
 
-        if len(words) >= 2:
-            # Step 4: Click first word — should highlight
-            print('\n=== TEST 4: Click word A — highlights ===')
-            words[0].click()
-            time.sleep(0.5)
-            screenshot(page, 'word_a_selected', 4)
-            # Re-query after click (DOM may re-render)
-            words = page.query_selector_all('.word-block')
-            classes_a = words[0].get_attribute('class') or ''
-            selected = 'selected' in classes_a or 'active' in classes_a or 'highlighted' in classes_a or 'arch-selected' in classes_a
-            print(f'  Word A classes: {classes_a}')
-            print(f'  {"PASS" if selected else "CHECK MANUALLY"}: Word A highlight state')
-            results.append(('Word A highlights', selected))
-
-            # Step 5: Click second word — syntactic role menu should open
-            print('\n=== TEST 5: Click word B — role menu opens ===')
-            words = page.query_selector_all('.word-block')
-            words[1].click() if len(words) > 1 else None
-            time.sleep(0.5)
-            screenshot(page, 'role_menu_open', 5)
-
-            # Check for the syntactic role modal
-            modal = page.query_selector('#syntactic-role-modal')
-            menu_visible = False
-            if modal:
-                classes = modal.get_attribute('class') or ''
-                display = page.evaluate('(el) => window.getComputedStyle(el).display', modal)
-                menu_visible = 'show' in classes or display != 'none'
-                print(f'  Modal classes: {classes}, display: {display}')
-            print(f'  {"PASS" if menu_visible else "FAIL"}: Syntactic role menu {"visible" if menu_visible else "not visible"}')
-            results.append(('Role menu opens', menu_visible))
-
-            # Step 6: Check menu has 9 roles
-            print('\n=== TEST 6: Menu has 9 syntactic roles ===')
-            role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
-            print(f'  Found {len(role_buttons)} role options')
-            if role_buttons:
-                for rb in role_buttons[:9]:
-                    text = rb.inner_text()
-                    print(f'    - {text}')
-            has_9 = len(role_buttons) >= 9
-            print(f'  {"PASS" if has_9 else "FAIL"}: {len(role_buttons)} roles found (need 9)')
-            results.append(('9 syntactic roles', has_9))
-
-            # Step 7: Select a role and save — roof should appear
-            print('\n=== TEST 7: Select role — roof created ===')
-            if role_buttons:
-                role_buttons[0].click()
-                time.sleep(0.3)
-                # Click Save button to confirm selection
-                save_btn = page.query_selector('#save-syntactic-role')
-                if save_btn:
-                    save_btn.click()
-                    print('  Clicked Save button')
-                else:
-                    print('  WARNING: Save button not found')
-                time.sleep(1)
-            screenshot(page, 'roof_created', 7)
-
-            # Check for roof/arch elements in DOM (SVG lines, arches)
-            roofs = page.query_selector_all('.arch-container, [class*="arch"], svg line, svg path, svg rect')
-            print(f'  Found {len(roofs)} roof-related elements')
-            # Debug: dump SVG contents
-            svg_info = page.evaluate('''() => {
-                const svg = document.getElementById("arch-svg");
-                if (!svg) return "No arch-svg found";
-                const lines = svg.querySelectorAll("line");
-                const texts = svg.querySelectorAll("text");
-                const rects = svg.querySelectorAll("rect");
-                const groups = svg.querySelectorAll("g");
-                let info = `SVG: ${lines.length} lines, ${rects.length} rects, ${texts.length} texts, ${groups.length} groups\\n`;
-                lines.forEach((l, i) => {
-                    info += `  line${i}: (${l.getAttribute("x1")},${l.getAttribute("y1")}) to (${l.getAttribute("x2")},${l.getAttribute("y2")})\\n`;
-                });
-                texts.forEach((t, i) => {
-                    info += `  text${i}: "${t.textContent}" at (${t.getAttribute("x")},${t.getAttribute("y")})\\n`;
-                });
-                rects.forEach((r, i) => {
-                    info += `  rect${i}: at (${r.getAttribute("x")},${r.getAttribute("y")}) ${r.getAttribute("width")}x${r.getAttribute("height")}\\n`;
-                });
-                return info;
-            }''')
-            print(f'  SVG debug:\n{svg_info}')
-            results.append(('Roof created', len(roofs) > 0))
-
-            # Step 8: Screen NOT frozen — can still interact
-            print('\n=== TEST 8: Screen not frozen after first roof ===')
-            time.sleep(0.5)
-            try:
-                # Re-query words (DOM re-renders after roof creation)
-                words = page.query_selector_all('.word-block')
-                # Try clicking another word
-                if len(words) > 2:
-                    words[2].click()
-                    time.sleep(0.5)
-                screenshot(page, 'after_second_click', 8)
-                print('  PASS: Can still click after roof creation')
-                results.append(('Not frozen', True))
-            except Exception as e:
-                print(f'  FAIL: Screen frozen — {e}')
-                results.append(('Not frozen', False))
-
-            # Step 9: Visual check — take close-up of roof area
-            print('\n=== TEST 9: Roof visual inspection ===')
-            sentence_container = page.query_selector('#sentence-container, .sentence-container')
-            if sentence_container:
-                sentence_container.screenshot(path=os.path.join(SCREENSHOTS_DIR, '09_roof_closeup.png'))
-                print('  Screenshot of sentence area saved for visual inspection')
-            results.append(('Roof visual', 'MANUAL CHECK'))
+        # Remaining steps against their baselines (the close-up was checked above)
+        if CAPTURE['screenshots']:
+            results.extend(visual_check(run_started, desktop_screenshot_names()))
+        results.extend(snapshot_results)
 
         # Summary
         print('\n' + '=' * 50)
@@ -212,172 +515,23 @@ def run_tests():
 def run_mobile_tests():
     """Run tests at mobile viewport (375x667) with touch enabled."""
     httpd = start_server()
-    time.sleep(1)
+    wait_for_server()
     results = []
-    mobile_dir = os.path.join(SCREENSHOTS_DIR, 'mobile')
-    os.makedirs(mobile_dir, exist_ok=True)
+    os.makedirs(MOBILE_SCREENSHOTS_DIR, exist_ok=True)
+    run_started = time.time()
+    snapshot_results.clear()
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 375, 'height': 667},
-            locale='he-IL',
-            has_touch=True,
-            is_mobile=True,
-        )
+        context = browser.new_context(**MOBILE_CONTEXT)
         page = context.new_page()
-        page.goto(f'http://localhost:{PORT}/')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        def mobile_screenshot(name, step_num):
-            path = os.path.join(mobile_dir, f'{step_num:02d}_{name}.png')
-            page.screenshot(path=path, full_page=True)
-            print(f'  Screenshot: {path}')
-            return path
-
-        # Mobile Test 1: Welcome screen loads at mobile size
-        print('\n=== MOBILE TEST 1: Welcome screen loads ===')
-        mobile_screenshot('welcome_screen', 1)
-        welcome = page.query_selector('#welcome-screen')
-        results.append(('M: Welcome screen', welcome is not None))
-        print(f'  {"PASS" if welcome else "FAIL"}: Welcome screen visible')
-
-        # Mobile Test 2: Enter a stage
-        print('\n=== MOBILE TEST 2: Enter a stage ===')
-        stage_cards = page.query_selector_all('.stage-item')
-        if stage_cards:
-            stage_cards[0].click()
-            time.sleep(1)
-            mobile_screenshot('game_screen', 2)
-            game = page.query_selector('#game-screen')
-            visible = game and game.is_visible() if game else False
-            results.append(('M: Enter stage', visible))
-            print(f'  {"PASS" if visible else "FAIL"}: Game screen visible')
-        else:
-            results.append(('M: Enter stage', False))
+        open_app(page)
 
-        # Mobile Test 3: Words displayed
-        print('\n=== MOBILE TEST 3: Words displayed ===')
-        words = page.query_selector_all('.word-block')
-        mobile_screenshot('words_displayed', 3)
-        results.append(('M: Words displayed', len(words) > 0))
-        print(f'  Found {len(words)} words')
-
-        # Mobile Test 4: Horizontal scroll — overflow-x is 'auto' or 'scroll'
-        print('\n=== MOBILE TEST 4: Horizontal scroll enabled ===')
-        overflow_x = page.evaluate('''() => {
-            const el = document.querySelector('.sentence-container');
-            if (!el) return 'NO_ELEMENT';
-            return window.getComputedStyle(el).overflowX;
-        }''')
-        scroll_ok = overflow_x in ('auto', 'scroll')
-        results.append(('M: Horizontal scroll', scroll_ok))
-        print(f'  overflow-x: {overflow_x} — {"PASS" if scroll_ok else "FAIL"}')
-
-        # Mobile Test 5: Touch targets >= 44px
-        print('\n=== MOBILE TEST 5: Touch targets >= 44px ===')
-        touch_results = page.evaluate('''() => {
-            const selectors = ['.add-pos-btn', '.btn', '.part-tag'];
-            const results = [];
-            for (const sel of selectors) {
-                const els = document.querySelectorAll(sel);
-                for (const el of els) {
-                    const rect = el.getBoundingClientRect();
-                    if (rect.width > 0 && rect.height > 0) {
-                        results.push({
-                            selector: sel,
-                            text: el.textContent.trim().substring(0, 20),
-                            width: rect.width,
-                            height: rect.height,
-                            ok: rect.height >= 44
-                        });
-                    }
-                }
-            }
-            return results;
-        }''')
-        all_ok = True
-        for tr in touch_results:
-            if not tr['ok']:
-                print(f'  FAIL: {tr["selector"]} "{tr["text"]}" height={tr["height"]:.0f}px')
-                all_ok = False
-        if all_ok:
-            print(f'  PASS: All {len(touch_results)} visible interactive elements >= 44px')
-        results.append(('M: Touch targets', all_ok))
-
-        # Mobile Test 6: Details panel is full-width
-        print('\n=== MOBILE TEST 6: Details panel full-width ===')
-        panel_width = page.evaluate('''() => {
-            const panel = document.querySelector('.details-panel');
-            if (!panel) return 'NO_ELEMENT';
-            return window.getComputedStyle(panel).width;
-        }''')
-        # At 375px viewport, panel should be ~375px (100%)
-        results.append(('M: Panel full-width', panel_width != '400px'))
-        print(f'  Panel width: {panel_width} — {"PASS" if panel_width != "400px" else "FAIL"}')
+        run_scenario(page, 'mobile', results)
 
-        # Mobile Test 7: Create a roof at mobile size (end-to-end)
-        print('\n=== MOBILE TEST 7: Create roof at mobile size ===')
-        words = page.query_selector_all('.word-block')
-        if len(words) >= 2:
-            words[0].click()
-            time.sleep(0.5)
-            # Re-query after DOM re-render
-            words = page.query_selector_all('.word-block')
-            words[1].click()
-            time.sleep(0.5)
-            mobile_screenshot('role_menu_mobile', 7)
-
-            modal = page.query_selector('#syntactic-role-modal')
-            if modal:
-                classes = modal.get_attribute('class') or ''
-                if 'show' in classes:
-                    role_buttons = page.query_selector_all('#syntactic-role-modal .role-btn')
-                    if role_buttons:
-                        role_buttons[0].click()
-                        time.sleep(0.3)
-                        save_btn = page.query_selector('#save-syntactic-role')
-                        if save_btn:
-                            save_btn.click()
-                            time.sleep(1)
-                        mobile_screenshot('roof_created_mobile', 8)
-
-                        # Check roof elements
-                        svg_info = page.evaluate('''() => {
-                            const svg = document.getElementById("arch-svg");
-                            if (!svg) return {lines: 0, texts: 0};
-                            return {
-                                lines: svg.querySelectorAll("line").length,
-                                texts: svg.querySelectorAll("text").length
-                            };
-                        }''')
-                        has_roof = svg_info['lines'] > 0 or svg_info['texts'] > 0
-                        results.append(('M: Roof created', has_roof))
-                        print(f'  SVG: {svg_info["lines"]} lines, {svg_info["texts"]} texts — {"PASS" if has_roof else "FAIL"}')
-                    else:
-                        results.append(('M: Roof created', False))
-                        print('  FAIL: No role buttons in modal')
-                else:
-                    results.append(('M: Roof created', False))
-                    print('  FAIL: Modal not shown')
-            else:
-                results.append(('M: Roof created', False))
-                print('  FAIL: No syntactic-role-modal')
-        else:
-            results.append(('M: Roof created', False))
-            print('  FAIL: Not enough words')
-
-        # Mobile Test 8: Modal fits screen (no overflow)
-        print('\n=== MOBILE TEST 8: Modal fits screen ===')
-        modal_fit = page.evaluate('''() => {
-            const modal = document.querySelector('.modal-content');
-            if (!modal) return true;
-            const rect = modal.getBoundingClientRect();
-            return rect.width <= window.innerWidth && rect.right <= window.innerWidth + 5;
-        }''')
-        results.append(('M: Modal fits screen', modal_fit))
-        print(f'  {"PASS" if modal_fit else "FAIL"}: Modal fits within viewport')
+        if CAPTURE['screenshots']:
+            results.extend(visual_check(run_started, ['mobile'], label='M: '))
+        results.extend((f'M: {name}', passed) for name, passed in snapshot_results)
 
         # Summary
         print('\n' + '=' * 50)
@@ -389,19 +543,224 @@ def run_mobile_tests():
             status = 'PASS' if result is True else 'FAIL'
             print(f'  [{status}] {name}')
         print(f'\nTotal: {passed} passed, {failed} failed')
-        print(f'Screenshots saved to: {mobile_dir}')
+        print(f'Screenshots saved to: {MOBILE_SCREENSHOTS_DIR}')
 
         browser.close()
 
     httpd.shutdown()
     return results
 
+# ========== STAGE SWEEP ==========
+
+# Wraps the named global functions so every call made by the app is timed in-page.
+# Call sites resolve these functions through the global object, so the wrappers apply.
+TIMING_INSTRUMENT_JS = """(names) => {
+    const timings = window.__plonterTimings = {};
+    names.forEach(name => {
+        const original = window[name];
+        timings[name] = [];
+        window[name] = function (...args) {
+            const start = performance.now();
+            try {
+                return original.apply(this, args);
+            } finally {
+                timings[name].push(performance.now() - start);
+            }
+        };
+    });
+}"""
+
+# Clicks in-page so the start timestamp is taken on the same clock as __plonterRenderAt
+TIMED_CLICK_JS = """(el) => {
+    window.__sweepClickAt = performance.now();
+    el.click();
+}"""
+
+def timed_click_and_wait_render(page, element, timeout=10000):
+    """Click an element in-page and return ms until the render pass it triggered completed."""
+    since = render_seq(page)
+    page.evaluate(TIMED_CLICK_JS, element)
+    if not wait_for_render(page, since, timeout):
+        return None
+    return page.evaluate('window.__plonterRenderAt - window.__sweepClickAt')
+
+def sweep_stage(browser, stage_id, port):
+    """Run one stage in its own browser context and time load, render and roof creation."""
+    context = browser.new_context(viewport={'width': 1280, 'height': 900}, locale='he-IL')
+    page = context.new_page()
+    entry = {'id': stage_id, 'ok': False}
+
+    try:
+        start = time.perf_counter()
+        open_app(page, port)
+        entry['load_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        page.evaluate(TIMING_INSTRUMENT_JS, ['renderSentence', 'renderCombinationLines', 'renderArches'])
+
+        stage = page.evaluate('id => corpus.loadAll().then(() => getStageById(id))', stage_id)
+        entry['number'] = stage['number']
+        entry['sentence'] = stage['sentence']
+
+        # Stage lists are windowed, so search for the number to bring its card
+        # into the first rows, then locate the card by its number
+        page.fill('#stage-search', stage['number'])
+        index = page.evaluate("""number => [...document.querySelectorAll('.stage-item .stage-number')]
+            .findIndex(el => el.textContent.trim() === number)""", stage['number'])
+        if index < 0:
+            entry['error'] = 'stage card not found'
+            return entry
+        entry['render_ms'] = timed_click_and_wait_render(page, page.query_selector_all('.stage-item')[index])
+
+        words = page.query_selector_all('.word-block')
+        entry['words'] = len(words)
+
+        # Roof over the whole sentence: widest geometry renderArches() has to draw
+        if len(words) >= 2:
+            click_and_wait_render(page, words[0])
+            words = page.query_selector_all('.word-block')
+            if click_and_wait_modal(page, words[-1], '#syntactic-role-modal'):
+                page.query_selector_all('#syntactic-role-modal .role-btn')[0].click()
+                entry['roof_ms'] = timed_click_and_wait_render(page, page.query_selector('#save-syntactic-role'))
+                entry['roof_lines'] = page.evaluate(
+                    '() => document.querySelectorAll("#arch-svg line").length')
+
+        timings = page.evaluate('window.__plonterTimings')
+        for name, samples in timings.items():
+            entry[f'{name}_calls'] = len(samples)
+            entry[f'{name}_max_ms'] = round(max(samples), 2) if samples else None
+        entry['ok'] = entry.get('render_ms') is not None and entry.get('roof_lines', 0) > 0
+    except Exception as e:
+        entry['error'] = str(e)
+    finally:
+        context.close()
+
+    return entry
+
+def sweep_shard(shard_index, stage_ids):
+    """Worker entry point: sweep a shard of stages with its own server, port and browser."""
+    port = SWEEP_PORT + shard_index
+    httpd = start_server(port)
+    wait_for_server(port)
+    entries = []
+
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            for stage_id in stage_ids:
+                entry = sweep_stage(browser, stage_id, port)
+                print(f'  [{entry.get("number", stage_id)}] '
+                      f'render={entry.get("render_ms")}ms roof={entry.get("roof_ms")}ms '
+                      f'{"OK" if entry["ok"] else "FAIL " + entry.get("error", "")}')
+                entries.append(entry)
+            browser.close()
+    finally:
+        httpd.shutdown()
+
+    return entries
+
+def list_stage_ids():
+    """Enumerate stages the same way the app does, via getAllStages() once the whole corpus is in."""
+    httpd = start_server(SWEEP_PORT)
+    wait_for_server(SWEEP_PORT)
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            open_app(page, SWEEP_PORT)
+            stage_ids = page.evaluate('() => corpus.loadAll().then(() => getAllStages().map(s => s.id))')
+            browser.close()
+    finally:
+        httpd.shutdown()
+    return stage_ids
+
+def run_stage_sweep(jobs=1, budget_ms=RENDER_BUDGET_MS, report_path=SWEEP_REPORT):
+    """Exercise every stage in STAGES, in parallel, and write per-stage timings to JSON."""
+    stage_ids = list_stage_ids()
+    jobs = max(1, min(jobs, len(stage_ids)))
+    shards = [stage_ids[i::jobs] for i in range(jobs)]
+    print(f'\n=== STAGE SWEEP: {len(stage_ids)} stages, {jobs} worker{"s" if jobs > 1 else ""} ===')
+
+    start = time.perf_counter()
+    if jobs == 1:
+        entries = sweep_shard(0, stage_ids)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(sweep_shard, i, shard) for i, shard in enumerate(shards)]
+            entries = [entry for future in futures for entry in future.result()]
+    elapsed = time.perf_counter() - start
+
+    # Report in getAllStages() order, flag anything whose renderArches() exceeded the budget
+    order = {stage_id: i for i, stage_id in enumerate(stage_ids)}
+    entries.sort(key=lambda e: order[e['id']])
+    for entry in entries:
+        arches_ms = entry.get('renderArches_max_ms')
+        entry['over_budget'] = arches_ms is not None and arches_ms > budget_ms
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'budget_ms': budget_ms,
+        'jobs': jobs,
+        'wall_clock_s': round(elapsed, 2),
+        'stages': entries,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print('\n' + '=' * 50)
+    print('STAGE SWEEP SUMMARY')
+    print('=' * 50)
+    for entry in sorted(entries, key=lambda e: e.get('renderArches_max_ms') or 0, reverse=True):
+        flag = 'OVER' if entry['over_budget'] else ('FAIL' if not entry['ok'] else ' ok ')
+        print(f'  [{flag}] {entry.get("number", entry["id"]):>6}  {entry.get("words", "?"):>3} words  '
+              f'renderArches max {entry.get("renderArches_max_ms")}ms')
+    failed = sum(1 for e in entries if not e['ok'])
+    over = sum(1 for e in entries if e['over_budget'])
+    print(f'\nTotal: {len(entries) - failed} ok, {failed} failed, {over} over {budget_ms}ms budget '
+          f'({elapsed:.1f}s wall clock)')
+    print(f'Report saved to: {report_path}')
+    return report
+
+def has_failures(results):
+    """Whether any (name, result) of a protocol run failed."""
+    return any(r is False for _, r in results)
+
 
 if __name__ == '__main__':
-    import sys
-    if '--mobile' in sys.argv:
-        run_mobile_tests()
-    elif '--all' in sys.argv:
+    parser = argparse.ArgumentParser(description='Plonter roof system test protocol.')
+    parser.add_argument('--mobile', action='store_true', help='run the mobile protocol only')
+    parser.add_argument('--all', action='store_true', help='run the desktop and mobile protocols')
+    parser.add_argument('--sweep', action='store_true', help='time every stage from getAllStages()')
+    parser.add_argument('--jobs', type=int, default=0, metavar='N',
+                        help='parallel sweep workers (default: one per CPU core)')
+    parser.add_argument('--budget-ms', type=float, default=RENDER_BUDGET_MS,
+                        help=f'renderArches() latency budget for the sweep (default: {RENDER_BUDGET_MS})')
+    parser.add_argument('--report', default=SWEEP_REPORT, help='sweep report path')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='compare SVG geometry per step with the golden files in geometry_snapshots/')
+    parser.add_argument('--update-snapshots', action='store_true', help='rewrite the geometry golden files')
+    parser.add_argument('--tolerance', type=float, default=geometry_snapshot.DEFAULT_TOLERANCE,
+                        help=f'geometry tolerance in px (default: {geometry_snapshot.DEFAULT_TOLERANCE})')
+    parser.add_argument('--no-screenshots', action='store_true', help='skip the full-page screenshots')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='fail screenshots without a baseline and geometry steps without a golden file')
+    parser.add_argument('--trace', action='store_true',
+                        help='record each scenario with ?trace=1 and a CPU profile, write traces/<scenario>.json')
+    args = parser.parse_args()
+    CAPTURE.update(
+        screenshots=not args.no_screenshots,
+        snapshot=args.snapshot or args.update_snapshots,
+        update_snapshots=args.update_snapshots,
+        tolerance=args.tolerance,
+        trace=args.trace,
+        require_baseline=args.require_baseline and not args.update_snapshots,
+    )
+
+    if args.sweep:
+        report = run_stage_sweep(jobs=args.jobs or os.cpu_count() or 1, budget_ms=args.budget_ms,
+                                 report_path=args.report)
+        sys.exit(1 if any(not e['ok'] or e['over_budget'] for e in report['stages']) else 0)
+    elif args.mobile:
+        sys.exit(1 if has_failures(run_mobile_tests()) else 0)
+    elif args.all:
         print('Running DESKTOP tests...')
         desktop_results = run_tests()
         print('\n\nRunning MOBILE tests...')
@@ -415,5 +774,6 @@ if __name__ == '__main__':
         m_fail = sum(1 for _, r in mobile_results if r is False)
         print(f'  Desktop: {d_pass} passed, {d_fail} failed')
         print(f'  Mobile:  {m_pass} passed, {m_fail} failed')
+        sys.exit(1 if d_fail or m_fail else 0)
     else:
-        run_tests()
+        sys.exit(1 if has_failures(run_tests()) else 0)
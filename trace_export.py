@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Chrome-trace export for the Plonter harnesses.
+With --trace, test_roofs.py (and harness_daemon.py) open the app with
+?trace=1, so js/trace.js records User Timing measures of the renderers,
+validators and modal openers, long tasks and layout shifts in
+window.__plonterTrace. Around each scenario a CDP CPU profile is recorded as
+well; both are written to traces/<scenario>.json in the Chrome trace event
+format, which chrome://tracing, Perfetto (ui.perfetto.dev) and the DevTools
+performance panel open as a flame view.
+
+Threads in the trace:
+  1  User Timing   app functions, worker round trips, long tasks, layout shifts
+  2  CPU profile   sampled JS stacks, merged into spans
+
+Profile samples are placed on the performance.now() clock of the page using
+the time at which the profiler was started, so the two threads line up to
+within a millisecond or so.
+
+Usage (standalone):
+    python3 trace_export.py             # list the traces written so far
+"""
+
+import json
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACE_DIR = os.path.join(APP_DIR, 'traces')
+PID = 1
+USER_TIMING_TID = 1
+CPU_PROFILE_TID = 2
+PROFILER_INTERVAL_US = 100  # sampling interval requested from V8
+IGNORED_FRAMES = {'(root)', '(program)', '(idle)', '(garbage collector)'}
+
+DRAIN_JS = """() => window.__plonterTrace ? window.__plonterTrace.drain() : null"""
+
+class ScenarioTrace:
+    """CPU profile plus in-page trace buffer for one scenario on one page."""
+
+    def __init__(self, page):
+        self.page = page
+        self.session = page.context.new_cdp_session(page)
+        self.started_at = None
+
+    def start(self):
+        self.page.evaluate(DRAIN_JS)  # drop whatever earlier scenarios left behind
+        self.session.send('Profiler.enable')
+        self.session.send('Profiler.setSamplingInterval', {'interval': PROFILER_INTERVAL_US})
+        self.session.send('Profiler.start')
+        self.started_at = self.page.evaluate('performance.now()')
+
+    def stop(self, name):
+        """Stop recording and write traces/<name>.json; returns the path."""
+        profile = self.session.send('Profiler.stop')['profile']
+        self.session.send('Profiler.disable')
+        self.session.detach()
+        buffer = self.page.evaluate(DRAIN_JS) or {'events': [], 'dropped': 0, 'timeOrigin': 0}
+        return write_trace(name, build_trace(buffer, profile, self.started_at))
+
+def metadata_events():
+    return [
+        {'ph': 'M', 'pid': PID, 'name': 'process_name', 'args': {'name': 'Plonter'}},
+        {'ph': 'M', 'pid': PID, 'tid': USER_TIMING_TID, 'name': 'thread_name', 'args': {'name': 'User Timing'}},
+        {'ph': 'M', 'pid': PID, 'tid': CPU_PROFILE_TID, 'name': 'thread_name', 'args': {'name': 'CPU profile'}},
+    ]
+
+def user_timing_events(buffer):
+    """__plonterTrace events (ms) as trace events (us)."""
+    events = []
+    for event in buffer['events']:
+        out = {'name': event['name'], 'cat': event['cat'], 'pid': PID, 'tid': USER_TIMING_TID,
+               'ts': event['ts'] * 1000, 'args': event.get('args', {})}
+        if 'dur' in event:
+            out.update(ph='X', dur=event['dur'] * 1000)
+        else:
+            out.update(ph='i', s='t')
+        events.append(out)
+    return events
+
+def frame_name(node):
+    frame = node['callFrame']
+    return frame['functionName'] or '(anonymous)'
+
+def cpu_profile_events(profile, started_at_ms):
+    """Samples of a CDP profile as nested 'X' spans: consecutive samples that
+    share a stack prefix extend the same spans."""
+    nodes = {node['id']: node for node in profile['nodes']}
+    parents = {}
+    for node in profile['nodes']:
+        for child in node.get('children', []):
+            parents[child] = node['id']
+
+    stacks = {}
+    def stack_of(node_id):
+        if node_id not in stacks:
+            frames = []
+            current = node_id
+            while current is not None:
+                if frame_name(nodes[current]) not in IGNORED_FRAMES:
+                    frames.append(current)
+                current = parents.get(current)
+            stacks[node_id] = frames[::-1]
+        return stacks[node_id]
+
+    offset = started_at_ms * 1000 - profile['startTime']
+    events = []
+    open_frames = []  # [(node id, start us)] root first
+
+    def close(depth, end):
+        while len(open_frames) > depth:
+            node_id, start = open_frames.pop()
+            frame = nodes[node_id]['callFrame']
+            events.append({'ph': 'X', 'name': frame_name(nodes[node_id]), 'cat': 'cpu', 'pid': PID,
+                           'tid': CPU_PROFILE_TID, 'ts': start + offset, 'dur': max(end - start, 1),
+                           'args': {'url': frame['url'], 'line': frame['lineNumber'] + 1}})
+
+    time = profile['startTime']
+    for node_id, delta in zip(profile.get('samples', []), profile.get('timeDeltas', [])):
+        time += delta
+        stack = stack_of(node_id)
+        common = 0
+        while common < len(open_frames) and common < len(stack) and open_frames[common][0] == stack[common]:
+            common += 1
+        close(common, time)
+        for frame_id in stack[common:]:
+            open_frames.append((frame_id, time))
+    close(0, profile['endTime'])
+    return events
+
+def build_trace(buffer, profile, started_at_ms):
+    events = metadata_events() + user_timing_events(buffer) + cpu_profile_events(profile, started_at_ms)
+    return {
+        'traceEvents': events,
+        'displayTimeUnit': 'ms',
+        'metadata': {'timeOrigin': buffer.get('timeOrigin'), 'droppedEvents': buffer.get('dropped', 0)},
+    }
+
+def write_trace(name, trace):
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = os.path.join(TRACE_DIR, f'{name}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f, separators=(',', ':'))
+    return path
+
+def summarize(trace, top=5):
+    """The slowest app functions in a trace: [(name, calls, total ms, max ms)]."""
+    totals = {}
+    for event in trace['traceEvents']:
+        if event.get('tid') != USER_TIMING_TID or event.get('ph') != 'X':
+            continue
+        calls, total, longest = totals.get(event['name'], (0, 0.0, 0.0))
+        dur = event['dur'] / 1000
+        totals[event['name']] = (calls + 1, total + dur, max(longest, dur))
+    rows = sorted(((name, *values) for name, values in totals.items()), key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+def main():
+    if not os.path.isdir(TRACE_DIR):
+        print('No traces yet - run python3 test_roofs.py --trace')
+        return 0
+    for name in sorted(os.listdir(TRACE_DIR)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(TRACE_DIR, name), encoding='utf-8') as f:
+            trace = json.load(f)
+        print(f'{name}: {len(trace["traceEvents"])} events')
+        for function, calls, total, longest in summarize(trace):
+            print(f'    {function:<36} {calls:>5} calls  {total:8.1f}ms total  {longest:7.1f}ms max')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
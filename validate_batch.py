@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Headless batch validation for Plonter analyses.
+Loads the DOM-free validation core (word.js, combinations.js, archIndex.js,
+validationCore.js) into a single long-lived browser page and streams every
+submission through it, writing one JSON result per line.
+
+Input is JSONL (one analysis per line) or a JSON array; see the format at the
+top of the batch section in js/validationCore.js.
+
+Usage:
+    python3 validate_batch.py submissions.jsonl                      # results to stdout
+    python3 validate_batch.py submissions.jsonl --keys keys.json -o results.jsonl
+    cat submissions.jsonl | python3 validate_batch.py -               # read stdin
+
+--keys takes a JSON object mapping stageId (or sentence) to an answer key, or a
+list of key analyses carrying their own stageId/sentence.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from playwright.sync_api import sync_playwright
+
+import compile_corpus
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CORE_SCRIPTS = ['stages.js', 'partsOfSpeech.js', 'word.js', 'combinations.js', 'archIndex.js', 'validationCore.js']
+
+def parse_error(line_number, message):
+    return {'id': None, '_parse_error': f'line {line_number}: {message}', '_line': line_number}
+
+def parse_line(line, line_number):
+    """The analysis on a JSONL line, or a parse error entry when it is not a JSON object."""
+    try:
+        analysis = json.loads(line)
+    except json.JSONDecodeError as e:
+        return parse_error(line_number, e)
+    if not isinstance(analysis, dict):
+        return parse_error(line_number, f'expected an analysis object, got {type(analysis).__name__}')
+    return analysis
+
+def read_analyses(path):
+    """Yield analyses from a JSONL file, a JSON array file or stdin ('-').
+    Input that is not an analysis object comes out as a parse error entry
+    (with '_parse_error' and '_line') in its place, so one bad line never stops a batch."""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        skipped_lines = 0  # blank lines before the first character
+        first = stream.read(1)
+        while first and first.isspace():
+            skipped_lines += first == '\n'
+            first = stream.read(1)
+        if first == '[':
+            try:
+                analyses = json.loads(first + stream.read())
+            except json.JSONDecodeError as e:
+                yield parse_error(skipped_lines + e.lineno, e)
+                return
+            for index, analysis in enumerate(analyses):
+                yield analysis if isinstance(analysis, dict) else parse_error(
+                    skipped_lines + 1, f'array item {index}: expected an analysis object, got {type(analysis).__name__}')
+            return
+        pending = first
+        line_number = skipped_lines
+        for line_number, line in enumerate(stream, skipped_lines + 1):
+            line = pending + line
+            pending = ''
+            if line.strip():
+                yield parse_line(line, line_number)
+        if pending.strip():
+            # A file of one character and no newline
+            yield parse_line(pending, line_number + 1)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def load_keys(path):
+    if not path:
+        return {}
+    with open(path, encoding='utf-8') as f:
+        keys = json.load(f)
+    if isinstance(keys, list):
+        return {key.get('stageId') or key.get('sentence'): key for key in keys}
+    return keys
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Groups the corpus by category and publishes it the way corpus.js does in the app
+LOAD_CORPUS_JS = """(stages) => {
+    const byCategory = {};
+    stages.forEach(stage => (byCategory[stage.category] = byCategory[stage.category] || []).push(stage));
+    Object.entries(byCategory).forEach(([category, list]) => setCategoryStages(category, list));
+    return stages.length;
+}"""
+
+def open_engine(browser):
+    """A blank page with the validation core scripts and the corpus loaded - no server needed."""
+    page = browser.new_page()
+    page.set_content('<!DOCTYPE html><html><head><meta charset="UTF-8"></head><body></body></html>')
+    for script in CORE_SCRIPTS:
+        page.add_script_tag(path=os.path.join(APP_DIR, 'js', script))
+    page.wait_for_function("typeof validateAnalyses === 'function'")
+    # Analyses that give only a stageId are resolved against the corpus
+    page.evaluate(LOAD_CORPUS_JS, compile_corpus.load_corpus())
+    return page
+
+def run_batch(analyses, keys, out, batch_size):
+    totals = {'total': 0, 'ok': 0, 'failed': 0, 'errors': 0}
+    started = time.perf_counter()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = open_engine(browser)
+
+        for chunk in chunked(analyses, batch_size):
+            valid = [a for a in chunk if '_parse_error' not in a]
+            validated = iter(page.evaluate('([analyses, keys]) => validateAnalyses(analyses, keys)', [valid, keys])
+                             if valid else [])
+            # One result per input, in input order; lines that did not parse keep their line number
+            results = [{'id': None, 'line': a['_line'], 'ok': False, 'errors': [a['_parse_error']]}
+                       if '_parse_error' in a else next(validated) for a in chunk]
+
+            for result in results:
+                totals['total'] += 1
+                if result.get('ok'):
+                    totals['ok'] += 1
+                elif result.get('errors'):
+                    totals['errors'] += 1
+                else:
+                    totals['failed'] += 1
+                out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+
+        browser.close()
+
+    totals['seconds'] = round(time.perf_counter() - started, 2)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate Plonter analyses in bulk and stream JSONL results.')
+    parser.add_argument('input', help='JSONL or JSON array of analyses, or - for stdin')
+    parser.add_argument('--keys', help='answer keys (JSON) to grade submissions against')
+    parser.add_argument('-o', '--output', help='write results here instead of stdout')
+    parser.add_argument('--batch-size', type=int, default=200, help='analyses per call into the engine')
+    args = parser.parse_args()
+
+    keys = load_keys(args.keys)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        totals = run_batch(read_analyses(args.input), keys, out, max(1, args.batch_size))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Validated {totals['total']} analyses in {totals['seconds']}s: "
+          f"{totals['ok']} ok, {totals['failed']} with mistakes, {totals['errors']} with errors", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -40,6 +40,14 @@ required_files=(
     "js/partsOfSpeech.js"
     "js/word.js"
     "js/combinations.js"
+    "js/archIndex.js"
+    "js/validationCore.js"
+    "js/validationWorker.js"
+    "js/persistence.js"
+    "js/corpus.js"
+    "corpus/manifest.json"
+    "js/stageList.js"
+    "js/trace.js"
     "package.json"
     "README.md"
     "DEPLOYMENT.md"
@@ -110,6 +118,21 @@ else
     echo -e "${RED}❌ Python3 not found${NC}"
 fi
 
+# Python packages used by the test harnesses (see DEVELOPMENT.md)
+for module in playwright numpy PIL; do
+    if python3 -c "import $module" > /dev/null 2>&1; then
+        echo -e "${GREEN}✅ Python package $module available${NC}"
+    else
+        case $module in
+            playwright) hint="pip install playwright && python3 -m playwright install chromium" ;;
+            PIL) hint="pip install Pillow (screenshot diffing only)" ;;
+            *) hint="pip install $module (screenshot diffing only)" ;;
+        esac
+        echo -e "${YELLOW}⚠️  Python package $module not found${NC}"
+        echo -e "${YELLOW}   Run: $hint${NC}"
+    fi
+done
+
 # Check if development server script is executable
 if [ -x "dev-server.sh" ]; then
     echo -e "${GREEN}✅ Development server script executable${NC}"